@@ -0,0 +1,159 @@
+"""모기 대시보드 공용 장비 컨텍스트.
+
+종합현황·민원가능지역·AI 예측·위험도 예보·장비 신뢰도·이상 이력 view 가 각자
+list_devices → filter_devices → MoscomDevice/Region 전체 조회 → _station_name/_valid_kor 메타 구성을
+반복하던 것을 한 곳에서 만든다.
+
+- 캐시 키: (동기화 세대, 사용자 범위). 세대는 run_sync·장비/권역 수정 시 bump_generation() 으로 올린다.
+- 같은 요청 안에서는 request 객체에 memo — 두 번째 호출부터는 캐시 조회도 없음.
+- 배터리·팬·수신 시각처럼 분 단위로 바뀌는 값은 담지 않는다 — ctx.devices() 가 list_devices()
+  (60초 캐시) 결과를 허용 범위로 걸러 준다.
+
+meta[uuid] 키:
+  name, addr, sido, gungu, dong, detail (깨진 문자열은 ''), region_code, region_name,
+  region_group (권역명 → 없으면 시도+군구 → '기타'), region_type, form_type, dev_bad_min,
+  md_name, md_sido, md_gungu, weather ({temperature, humidity, precipitation, wind_speed} 또는 {}),
+  weather_cell
+"""
+import hashlib
+import logging
+
+from django.core.cache import cache
+
+from core import moscom_client
+from core import user_store
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'moscom:devctx:gen'
+CONTEXT_KEY = 'moscom:devctx'
+CONTEXT_TTL = 2 * 60 * 60  # 세대가 안 바뀌어도 2시간이면 다시 만든다 (run_sync 는 1시간 주기)
+_REQUEST_ATTR = '_moscom_device_context'
+
+
+def bump_generation():
+    """동기화·관리자 수정 후 호출 — 모든 사용자 범위의 컨텍스트를 무효화."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def _generation():
+    gen = cache.get(GENERATION_KEY)
+    if gen is None:
+        cache.add(GENERATION_KEY, 1, None)
+        gen = cache.get(GENERATION_KEY) or 1
+    return gen
+
+
+def scope_key(su):
+    """사용자 범위 키. admin 은 'all', 그 외는 허용 장비 목록 해시 (같은 권한이면 사용자 달라도 공유).
+    su 가 None 이면 user_store.filter_devices 가 전체 장비를 돌려주므로 admin 과 같은 'all'
+    (빈 허용 목록 = 장비 없음 과 같은 키가 되면 먼저 채운 쪽 장비 목록이 다른 쪽에 보인다)."""
+    if not su or su.get('is_admin'):
+        return 'all'
+    allowed = sorted((su or {}).get('allowed_devices') or [])
+    return hashlib.sha1('\n'.join(allowed).encode()).hexdigest()[:16]
+
+
+def _region_group(rcode, region_name_by_code, dv):
+    """AI 예측 region 그룹 키: 권역명 우선, 없으면 시도+군구 (깨진 문자열 제외), 그것도 없으면 '기타'."""
+    if rcode and region_name_by_code.get(rcode):
+        return region_name_by_code[rcode]
+    parts = [dv.get('address_sido'), dv.get('address_gungu')]
+    return ' '.join(p for p in parts if p and len(p) < 40 and any(ord(c) < 0x3400 or 0xAC00 <= ord(c) <= 0xD7A3 for c in p)) or '기타'
+
+
+def _build(su):
+    from core.views import _station_name, _valid_kor
+
+    devices = user_store.filter_devices(su, moscom_client.list_devices())
+    region_name_by_code = {}
+    md_map = {}
+    try:
+        from moscom.models import Device as MoscomDevice, Region as MoscomRegion
+        region_name_by_code = {r.code: r.name for r in MoscomRegion.objects.all()}
+        allowed = [d.get('device_uuid') for d in devices]
+        md_map = {md.device_uuid: md for md in MoscomDevice.objects.filter(device_uuid__in=allowed)}
+    except Exception as e:
+        logger.warning(f'device context db lookup failed: {e}')
+
+    uuids = []
+    meta = {}
+    for d in devices:
+        u = d.get('device_uuid')
+        if not u:
+            continue
+        dv = d.get('device') or {}
+        md = md_map.get(u)
+        sido = (dv.get('address_sido') or '').strip()
+        gungu = (dv.get('address_gungu') or '').strip()
+        dong = (dv.get('address_dong') or '').strip()
+        detail = (dv.get('address_detail') or '').strip()
+        rcode = (md.region_code if md else '') or ''
+        uuids.append(u)
+        meta[u] = {
+            'name': _station_name(dv.get('device_name') or '') or u,
+            'addr': ' '.join(p for p in [dv.get('address_gungu'), dv.get('address_dong')]
+                             if p and len(p) < 40 and _valid_kor(p)).strip(),
+            'sido': sido if _valid_kor(sido) else '',
+            'gungu': gungu if _valid_kor(gungu) else '',
+            'dong': dong if _valid_kor(dong) else '',
+            'detail': detail if _valid_kor(detail) else '',
+            'region_code': rcode,
+            'region_name': region_name_by_code.get(rcode, rcode) or '미지정',
+            'region_group': _region_group(rcode, region_name_by_code, dv),
+            'region_type': (md.region_type if md else '') or '',
+            'form_type': (md.form_type if md else '') or '',
+            'dev_bad_min': ((dv.get('deviceSetting') or {}).get('bad_min')) or 100,
+            'md_name': (md.device_name if md else '') or '',
+            'md_sido': (md.address_sido if md else '') or '',
+            'md_gungu': (md.address_gungu if md else '') or '',
+            'weather': {
+                'temperature': md.temperature,
+                'humidity': md.humidity,
+                'precipitation': md.precipitation,
+                'wind_speed': md.wind_speed,
+            } if md else {},
+            'weather_cell': (md.weather_cell if md else '') or '',
+        }
+    return {'uuids': uuids, 'meta': meta, 'region_name_by_code': region_name_by_code}
+
+
+class DeviceContext:
+    """get_device_context() 결과. meta/uuids/region_name_by_code + 실시간 장비 목록 헬퍼."""
+
+    def __init__(self, su, data):
+        self.su = su
+        self.uuids = data['uuids']
+        self.meta = data['meta']
+        self.region_name_by_code = data['region_name_by_code']
+        self.allowed = set(self.uuids)
+        self._devices = None
+
+    def devices(self):
+        """허용 범위 listAll 항목 (배터리·팬 등 최신 값 — list_devices 60초 캐시). 인스턴스 안에서 1회."""
+        if self._devices is None:
+            self._devices = user_store.filter_devices(self.su, moscom_client.list_devices())
+        return self._devices
+
+    def weather(self, uuid):
+        return (self.meta.get(uuid) or {}).get('weather') or {}
+
+
+def get_device_context(su, request=None):
+    """(동기화 세대, 사용자 범위) 단위로 캐시된 장비 컨텍스트. request 를 주면 요청 안에서 memo."""
+    if request is not None:
+        ctx = getattr(request, _REQUEST_ATTR, None)
+        if ctx is not None:
+            return ctx
+    key = f'{CONTEXT_KEY}:{_generation()}:{scope_key(su)}'
+    data = cache.get(key)
+    if data is None:
+        data = _build(su)
+        cache.set(key, data, CONTEXT_TTL)
+    ctx = DeviceContext(su, data)
+    if request is not None:
+        setattr(request, _REQUEST_ATTR, ctx)
+    return ctx
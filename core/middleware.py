@@ -0,0 +1,22 @@
+"""MOSCOM 캐시 신선도 미들웨어.
+
+요청마다 moscom_client 의 캐시 읽기 기록을 초기화하고, 응답 헤더에
+stale-while-revalidate 상태를 붙인다.
+- X-Moscom-Cache: fresh | stale
+- X-Moscom-Cache-Age: 가장 오래된 캐시 값의 나이(초)
+"""
+from core import moscom_client
+
+
+class MoscomCacheMetaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        moscom_client.reset_cache_meta()
+        response = self.get_response(request)
+        meta = moscom_client.cache_meta()
+        if meta['reads']:
+            response['X-Moscom-Cache'] = 'stale' if meta['served_stale'] else 'fresh'
+            response['X-Moscom-Cache-Age'] = str(meta['max_age'])
+        return response
@@ -0,0 +1,202 @@
+"""AI 예측 모델 레지스트리 — 버전별 산출물 디렉터리 + 프로세스 간 무중단 교체.
+
+moscom_train 은 moscom/ml/versions/<YYYYmmdd-HHMMSS>/ 에 산출물을 쓰고 publish(version) 한다.
+  - moscom/ml/CURRENT 파일을 원자적으로 바꾸고 (os.replace)
+  - Redis 캐시 키 moscom:model:version 에 새 버전을 올린다.
+각 프로세스(gunicorn worker, celery worker)는 get() 호출 때 CHECK_SECONDS 마다 그 키를 보고,
+버전이 바뀌었으면 백그라운드 스레드에서 새 모델을 다 읽은 뒤 참조 하나만 바꾼다 — 그동안은 이전 모델로 응답.
+처음 한 번(cold)만 동기 로드. warm() 을 wsgi.py(gunicorn --preload 면 fork 전 master)와
+celery worker_init 에서 불러 첫 요청이 cold 가 되지 않게 하고, fork 된 worker 는 그 메모리를 copy-on-write 로 공유한다.
+
+버전 디렉터리가 없으면 예전 배치(moscom/ml/*.joblib → core/ml/*.joblib)를 그대로 읽는다.
+모델 파일은 tree_engine.load 로 읽는다 — MOSCOM_TREE_ENGINE=compiled 면 컴파일된 배열(mmap), 아니면 joblib.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+_PROJ_ROOT = os.path.dirname(os.path.dirname(__file__))
+ML_DIR = os.path.join(_PROJ_ROOT, 'moscom', 'ml')
+VERSIONS_DIR = os.path.join(ML_DIR, 'versions')
+CURRENT_FILE = os.path.join(ML_DIR, 'CURRENT')
+_OLD_ML_DIR = os.path.join(os.path.dirname(__file__), 'ml')
+
+VERSION_KEY = 'moscom:model:version'
+# 다른 프로세스의 새 버전 공지를 확인하는 주기 (초)
+CHECK_SECONDS = int(os.environ.get('MOSCOM_MODEL_CHECK_SECONDS', '30'))
+# 남겨 둘 버전 디렉터리 수 (CURRENT 포함)
+KEEP_VERSIONS = int(os.environ.get('MOSCOM_MODEL_KEEP_VERSIONS', '5'))
+
+MODEL_FILE = 'best_model_RandomForest.joblib'
+INDEX_FILE = 'best_model_MosquitoIndex.joblib'
+FEATURES_FILE = 'feature_cols.joblib'
+META_FILE = 'training_meta.joblib'
+
+# predictor._load() 반환 5-튜플 + 버전 문자열
+Bundle = namedtuple('Bundle', 'model feature_cols ver idx_model meta version')
+
+_LOCK = threading.Lock()
+_STATE = {'bundle': None, 'checked_at': 0.0, 'loading': None}
+
+
+# ─ 버전 디렉터리 ─────────────────────────────
+
+def new_version_dir():
+    """새 버전 디렉터리 생성 → (version, path). 학습 산출물은 여기에 쓰고 publish()."""
+    version = datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(VERSIONS_DIR, version)
+    os.makedirs(path, exist_ok=False)
+    return version, path
+
+
+def current_version():
+    """CURRENT 파일의 버전. 없으면 None (예전 배치)."""
+    try:
+        with open(CURRENT_FILE, 'r', encoding='utf-8') as f:
+            v = f.read().strip()
+        return v if v and os.path.isdir(os.path.join(VERSIONS_DIR, v)) else None
+    except OSError:
+        return None
+
+
+def publish(version):
+    """version 을 현재 모델로 — CURRENT 원자 교체 + 캐시 키 공지 + 오래된 버전 정리."""
+    tmp = CURRENT_FILE + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp, CURRENT_FILE)
+    cache.set(VERSION_KEY, version, None)
+    _prune(keep=version)
+    logger.info('model version published: %s', version)
+
+
+def _prune(keep):
+    try:
+        names = sorted(n for n in os.listdir(VERSIONS_DIR) if os.path.isdir(os.path.join(VERSIONS_DIR, n)))
+    except OSError:
+        return
+    for n in names[:-KEEP_VERSIONS]:
+        if n != keep:
+            shutil.rmtree(os.path.join(VERSIONS_DIR, n), ignore_errors=True)
+
+
+def _paths(version):
+    """version → (디렉터리, 모델 세대 표기). None 이면 예전 배치 (moscom/ml → core/ml)."""
+    if version:
+        return os.path.join(VERSIONS_DIR, version), 'v2'
+    if os.path.exists(os.path.join(ML_DIR, MODEL_FILE)) and os.path.exists(os.path.join(ML_DIR, FEATURES_FILE)):
+        return ML_DIR, 'v2'
+    return _OLD_ML_DIR, 'v1'
+
+
+# ─ 로드 / 교체 ───────────────────────────────
+
+def _load_bundle(version):
+    import joblib
+    from core import tree_engine
+
+    base_dir, ver = _paths(version)
+    mp = os.path.join(base_dir, MODEL_FILE)
+    if not os.path.exists(mp):
+        raise FileNotFoundError(f'model not found: {mp}')
+    t0 = time.monotonic()
+    model = tree_engine.load(mp)
+    feature_cols = joblib.load(os.path.join(base_dir, FEATURES_FILE))
+    # 모기지수 모델 + 메타 (선택)
+    idx_model = None
+    meta = None
+    idx_path = os.path.join(base_dir, INDEX_FILE)
+    meta_path = os.path.join(base_dir, META_FILE)
+    if os.path.exists(idx_path):
+        try:
+            idx_model = tree_engine.load(idx_path)
+        except Exception as e:
+            logger.warning('mosquito index model load failed: %s', e)
+    if os.path.exists(meta_path):
+        try:
+            meta = joblib.load(meta_path)
+        except Exception as e:
+            logger.warning('training meta load failed: %s', e)
+    label = version or f'{ver}-{int(os.path.getmtime(mp))}'
+    logger.info('AI model loaded (%s, %d features, %.2fs)', label, len(feature_cols), time.monotonic() - t0)
+    return Bundle(model, feature_cols, ver, idx_model, meta, label)
+
+
+def _announced_version():
+    """공지된 버전 — 캐시 키 우선, 없으면 CURRENT 파일 (Redis 재시작 대비)."""
+    try:
+        v = cache.get(VERSION_KEY)
+    except Exception:
+        v = None
+    return v or current_version()
+
+
+def _swap_in_background(version):
+    def run():
+        try:
+            bundle = _load_bundle(version)
+            _STATE['bundle'] = bundle  # 참조 하나 교체 — 읽는 쪽은 항상 완전한 Bundle 을 본다
+        except Exception:
+            logger.exception('model hot swap to %s failed; keeping %s', version,
+                             _STATE['bundle'].version if _STATE['bundle'] else None)
+        finally:
+            with _LOCK:
+                _STATE['loading'] = None
+
+    with _LOCK:
+        if _STATE['loading'] == version:
+            return
+        _STATE['loading'] = version
+    threading.Thread(target=run, name=f'model-swap-{version}', daemon=True).start()
+
+
+def get():
+    """현재 프로세스의 모델 Bundle. 처음이면 동기 로드, 이후엔 새 버전을 백그라운드로 받아 교체."""
+    bundle = _STATE['bundle']
+    if bundle is None:
+        with _LOCK:
+            if _STATE['bundle'] is None:
+                _STATE['bundle'] = _load_bundle(_announced_version())
+                _STATE['checked_at'] = time.monotonic()
+            return _STATE['bundle']
+    now = time.monotonic()
+    if now - _STATE['checked_at'] >= CHECK_SECONDS:
+        _STATE['checked_at'] = now
+        announced = _announced_version()
+        if announced and announced != bundle.version:
+            _swap_in_background(announced)
+    return bundle
+
+
+def refresh():
+    """지금 공지된 버전으로 동기 교체 (재학습 직후 같은 프로세스에서)."""
+    bundle = _load_bundle(_announced_version())
+    _STATE['bundle'] = bundle
+    _STATE['checked_at'] = time.monotonic()
+    return bundle
+
+
+def ensure_current():
+    """공지된 버전과 다르면 지금 동기 교체 — 배치 작업(예측 저장소 채우기)이 이전 모델로 돌지 않게."""
+    bundle = _STATE['bundle']
+    announced = _announced_version()
+    if bundle is None or (announced and announced != bundle.version):
+        return refresh()
+    return bundle
+
+
+def warm():
+    """프로세스 시작 시 미리 로드. 실패해도 서비스는 뜨게 (첫 요청에서 다시 시도)."""
+    try:
+        return get()
+    except Exception as e:
+        logger.warning('model warm load skipped: %s', e)
+        return None
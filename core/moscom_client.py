@@ -7,11 +7,23 @@ https://api.moscom.co.kr 에 접속해서 장비 데이터를 가져온다.
 
 토큰은 메모리에 캐싱하고, 401 발생 시 자동 재로그인한다.
 장비 목록은 Redis에 60초간 캐싱해서 외부 API 부하를 줄인다.
+
+HTTP 연결은 프로세스 단위 공유 Session(커넥션 풀 + keep-alive)을 재사용해서
+요청마다 TCP/TLS 핸드셰이크를 다시 하지 않는다. 5xx/타임아웃은 backoff 재시도.
+동기화용 raw 대량 조회(iter_statistics_raw)는 응답을 스트리밍 파싱해서 배치 단위로 넘긴다.
 """
 import os
+import json
 import time
+import codecs
 import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
@@ -24,16 +36,122 @@ TOKEN_CACHE_KEY = 'moscom:jwt'
 DEVICES_CACHE_KEY = 'moscom:devices'
 TOKEN_TTL = 23 * 60 * 60  # JWT는 24시간 유효, 23시간 캐싱
 DEVICES_TTL = 60  # 장비 데이터는 60초 캐싱
+DEVICES_HARD_TTL = 30 * 60  # 60초 지나면 stale 로 서빙하며 백그라운드 갱신, 30분 지나면 폐기
+
+
+# ─ 커넥션 풀 ───────────────────────────────────
+# 풀 크기 = 한 프로세스에서 동시에 MOSCOM 을 부를 수 있는 스레드 수 (gunicorn threads / celery concurrency)
+POOL_MAXSIZE = int(os.environ.get('MOSCOM_POOL_MAXSIZE', '10'))
+RETRY_TOTAL = int(os.environ.get('MOSCOM_RETRY_TOTAL', '2'))
+RETRY_BACKOFF = float(os.environ.get('MOSCOM_RETRY_BACKOFF', '0.5'))  # 0.5s, 1s, 2s ...
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# 엔드포인트별 (connect, read) 타임아웃 — statisticsByDate raw 는 응답이 커서 길게
+DEFAULT_TIMEOUT = (3.05, 15)
+ENDPOINT_TIMEOUTS = {
+    '/account/login': (3.05, 10),
+    '/device/listAll': (3.05, 10),
+    '/device/listUUID': (3.05, 10),
+    '/device/statistics': (3.05, 15),
+    '/device/statisticsByDate': (3.05, 60),
+    '/device/rawCollectionBulk': (3.05, 60),
+}
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
 
 
 class MoscomAPIError(Exception):
     pass
 
 
+def _build_session():
+    retry = Retry(
+        total=RETRY_TOTAL, connect=RETRY_TOTAL, read=RETRY_TOTAL, status=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        # rawCollectionBulk 는 POST 지만 조회용이라 재시도해도 안전
+        allowed_methods=frozenset(['GET', 'POST']),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    s = requests.Session()
+    s.mount('https://', adapter)
+    s.mount('http://', adapter)
+    s.headers['Connection'] = 'keep-alive'
+    return s
+
+
+def _get_session():
+    """프로세스 공유 Session. fork 후(gunicorn/celery worker) 에는 소켓 공유를 피하려고 새로 만든다."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            _session = _build_session()
+            _session_pid = pid
+    return _session
+
+
+def _timeout_for(path):
+    return ENDPOINT_TIMEOUTS.get(path, DEFAULT_TIMEOUT)
+
+
+def pool_stats():
+    """커넥션 풀 재사용 현황.
+    requests = 보낸 요청 수, new_connections = 새로 맺은 연결 수 (= 풀 miss),
+    reused = 재사용된 연결 수 (= 풀 hit).
+    """
+    s = _session if _session_pid == os.getpid() else None
+    out = {'pid': os.getpid(), 'pool_maxsize': POOL_MAXSIZE,
+           'requests': 0, 'new_connections': 0, 'reused': 0, 'hit_rate': None, 'hosts': {}}
+    if s is None:
+        return out
+    adapter = s.get_adapter(API_BASE)
+    pools = adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        n_req = getattr(pool, 'num_requests', 0)
+        n_conn = getattr(pool, 'num_connections', 0)
+        out['hosts'][f'{pool.scheme}://{pool.host}:{pool.port}'] = {
+            'requests': n_req, 'new_connections': n_conn, 'reused': max(0, n_req - n_conn),
+        }
+        out['requests'] += n_req
+        out['new_connections'] += n_conn
+    out['reused'] = max(0, out['requests'] - out['new_connections'])
+    if out['requests']:
+        out['hit_rate'] = round(out['reused'] / out['requests'], 3)
+    return out
+
+
+# 프로세스 누적 수신량 — 동기화 run 이 구간 전후 차이로 phase 별 upstream 바이트를 잰다
+_transfer_lock = threading.Lock()
+_transfer = {'requests': 0, 'bytes': 0}
+
+
+def _record_transfer(nbytes, requests_=1):
+    with _transfer_lock:
+        _transfer['requests'] += requests_
+        _transfer['bytes'] += nbytes
+
+
+def transfer_totals():
+    """프로세스 시작 후 MOSCOM 응답 누적 {'requests', 'bytes'} (본문 기준)."""
+    with _transfer_lock:
+        return dict(_transfer)
+
+
 def _login():
     """MOSCOM 로그인, JWT 반환"""
     url = f'{API_BASE}/account/login'
-    resp = requests.get(url, params={'loginId': LOGIN_ID, 'password': LOGIN_PASSWORD}, timeout=10)
+    resp = _get_session().get(url, params={'loginId': LOGIN_ID, 'password': LOGIN_PASSWORD},
+                              timeout=_timeout_for('/account/login'))
     resp.raise_for_status()
     data = resp.json()
     token = data.get('token')
@@ -48,7 +166,10 @@ def _get_token():
     """캐시된 JWT 반환, 없으면 로그인"""
     token = cache.get(TOKEN_CACHE_KEY)
     if not token:
+        _count(TOKEN_CACHE_KEY, 'miss')
         token = _login()
+    else:
+        _count(TOKEN_CACHE_KEY, 'hit')
     return token
 
 
@@ -60,27 +181,317 @@ def _request(method, path, **kwargs):
     headers.setdefault('Origin', 'https://moscom.co.kr')
 
     url = f'{API_BASE}{path}'
-    resp = requests.request(method, url, headers=headers, timeout=15, **kwargs)
+    session = _get_session()
+    timeout = kwargs.pop('timeout', None) or _timeout_for(path)
+    resp = session.request(method, url, headers=headers, timeout=timeout, **kwargs)
 
     if resp.status_code == 401:
         cache.delete(TOKEN_CACHE_KEY)
         token = _login()
         headers['Authorization'] = f'Bearer {token}'
-        resp = requests.request(method, url, headers=headers, timeout=15, **kwargs)
+        resp = session.request(method, url, headers=headers, timeout=timeout, **kwargs)
 
     resp.raise_for_status()
+    _record_transfer(len(resp.content))
     return resp.json()
 
 
+def _request_stream(method, path, **kwargs):
+    """_request 의 스트리밍 버전 — 본문을 읽지 않은 Response(stream=True) 반환. 호출자가 close."""
+    token = _get_token()
+    headers = kwargs.pop('headers', {})
+    headers['Authorization'] = f'Bearer {token}'
+    headers.setdefault('Origin', 'https://moscom.co.kr')
+
+    url = f'{API_BASE}{path}'
+    session = _get_session()
+    timeout = kwargs.pop('timeout', None) or _timeout_for(path)
+    resp = session.request(method, url, headers=headers, timeout=timeout, stream=True, **kwargs)
+
+    if resp.status_code == 401:
+        resp.close()
+        cache.delete(TOKEN_CACHE_KEY)
+        token = _login()
+        headers['Authorization'] = f'Bearer {token}'
+        resp = session.request(method, url, headers=headers, timeout=timeout, stream=True, **kwargs)
+
+    if resp.status_code >= 400:
+        resp.close()
+    resp.raise_for_status()
+    return resp
+
+
+_JSON_WS = ' \t\r\n'
+
+
+def iter_json_array(chunks):
+    """bytes 조각 iterable → 최상위 JSON 배열의 원소를 하나씩 yield.
+    전체 본문을 메모리에 올리지 않고, 아직 덜 들어온 원소만 버퍼에 남긴다.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf, pos = '', 0
+    started = closed = False
+    for raw in chunks:
+        if closed:
+            break
+        buf = buf[pos:] + utf8.decode(raw)
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in _JSON_WS:
+                pos += 1
+            if pos >= len(buf):
+                break
+            ch = buf[pos]
+            if not started:
+                if ch != '[':
+                    raise ValueError(f'JSON 배열 응답이 아님: {buf[pos:pos + 80]!r}')
+                started = True
+                pos += 1
+            elif ch == ',':
+                pos += 1
+            elif ch == ']':
+                closed = True
+                break
+            else:
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    break  # 원소가 아직 덜 들어옴 — 다음 조각에서 이어서
+                if end == len(buf) and not isinstance(item, (dict, list, str)):
+                    break  # 숫자/리터럴이 조각 경계에서 잘렸을 수 있음
+                yield item
+                pos = end
+    if not closed:
+        raise ValueError('JSON 배열이 끝나지 않음 (응답 잘림)')
+
+
+# ─ single-flight 캐시 ────────────────────────────
+# 캐시 만료 순간 동시 요청이 모두 MOSCOM 을 치는 thundering herd 방지.
+# - 같은 프로세스의 스레드끼리: 키별 스레드 락 (기다리는 스레드가 없어지면 dict 에서 지움 → 메모리 안 늘어남,
+#   다른 키의 느린 fetch 뒤에서 기다리는 일 없음)
+# - 프로세스끼리(gunicorn/celery worker): cache.add 로 '<cache_key>:lock' 선점
+# 락을 못 잡은 쪽은 결과가 캐시에 올라올 때까지 짧게 폴링하고, 대기 초과면 직접 가져온다.
+SINGLEFLIGHT_LOCK_TTL = 30  # 락 보유 최대 시간(초) — fetch 도중 죽어도 자동 해제
+SINGLEFLIGHT_WAIT = 20      # 결과 대기 최대 시간(초)
+SINGLEFLIGHT_POLL = 0.1
+
+_LOCAL_LOCKS = {}  # cache_key → [Lock, 잡았거나 기다리는 스레드 수]
+_LOCAL_LOCKS_GUARD = threading.Lock()
+
+
+@contextmanager
+def _local_lock(cache_key):
+    """cache_key 전용 스레드 락 — 같은 키 호출자끼리만 기다린다. yield: 잡았는지 (SINGLEFLIGHT_WAIT 초과면 False)."""
+    with _LOCAL_LOCKS_GUARD:
+        entry = _LOCAL_LOCKS.setdefault(cache_key, [threading.Lock(), 0])
+        entry[1] += 1
+    got = entry[0].acquire(timeout=SINGLEFLIGHT_WAIT)
+    try:
+        yield got
+    finally:
+        if got:
+            entry[0].release()
+        with _LOCAL_LOCKS_GUARD:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _LOCAL_LOCKS[cache_key]
+
+
+def _store(cache_key, data, hard_ttl):
+    """값을 fetch 시각과 함께 envelope 으로 저장. 캐시 자체는 hard TTL 까지 유지."""
+    env = {'swr': 1, 'v': data, 't': time.time()}
+    cache.set(cache_key, env, hard_ttl)
+    return env
+
+
+def _load(cache_key):
+    env = cache.get(cache_key)
+    # 배포 직후 남아있는 옛 형식(맨 리스트) 값은 miss 로 취급
+    if isinstance(env, dict) and env.get('swr') == 1:
+        return env
+    return None
+
+
+def _single_flight(cache_key, hard_ttl, fetch, load=None, store=None):
+    """캐시 miss 시 한 호출자만 fetch() 하고 나머지는 그 결과를 읽는다. envelope 반환.
+    load/store 를 주면 cache_key 는 락 이름으로만 쓰고 조회·저장은 그 함수로 한다 (일 단위 slice 등)."""
+    load = load or (lambda: _load(cache_key))
+    store = store or (lambda data: _store(cache_key, data, hard_ttl))
+    with _local_lock(cache_key):
+        # 락 대기 중 다른 스레드가 채웠을 수 있음
+        env = load()
+        if env is not None:
+            return env
+
+        lock_key = f'{cache_key}:lock'
+        owner = cache.add(lock_key, os.getpid(), SINGLEFLIGHT_LOCK_TTL)
+        if not owner:
+            deadline = time.monotonic() + SINGLEFLIGHT_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(SINGLEFLIGHT_POLL)
+                env = load()
+                if env is not None:
+                    return env
+                # 선점자가 실패하고 락을 풀었으면 이어받는다
+                if cache.add(lock_key, os.getpid(), SINGLEFLIGHT_LOCK_TTL):
+                    owner = True
+                    break
+            else:
+                logger.warning('single-flight wait timeout: %s', cache_key)
+        try:
+            return store(fetch())
+        finally:
+            if owner:
+                cache.delete(lock_key)
+
+
+# ─ stale-while-revalidate ───────────────────────
+# soft TTL 이 지난 값은 즉시 돌려주고(stale) 백그라운드 스레드에서 갱신한다.
+# hard TTL 이 지나야 비로소 캐시에서 사라져 동기 호출이 일어난다.
+# MOSCOM_SWR=0 이면 hard TTL = soft TTL (기존 동작).
+SWR_ENABLED = os.environ.get('MOSCOM_SWR', '1') != '0'
+
+_meta = threading.local()
+
+
+def _note(cache_key, env, stale):
+    served = getattr(_meta, 'served', None)
+    if served is None:
+        served = _meta.served = []
+    served.append((cache_key, stale, time.time() - env['t']))
+
+
+def reset_cache_meta():
+    """요청 시작 시 호출 (MoscomCacheMetaMiddleware)."""
+    _meta.served = []
+
+
+def cache_meta():
+    """현재 요청(스레드)에서 읽은 MOSCOM 캐시 값의 신선도 요약."""
+    served = getattr(_meta, 'served', None) or []
+    if not served:
+        return {'served_stale': False, 'max_age': None, 'reads': 0}
+    return {
+        'served_stale': any(stale for _, stale, _ in served),
+        'max_age': round(max(age for _, _, age in served), 1),
+        'reads': len(served),
+    }
+
+
+def _revalidate_async(cache_key, refresh):
+    """백그라운드 갱신. 키당 하나만 돌도록 '<cache_key>:refresh' 락을 잡는다.
+    refresh: 가져와서 캐시에 저장까지 하는 함수."""
+    refresh_key = f'{cache_key}:refresh'
+    if not cache.add(refresh_key, os.getpid(), SINGLEFLIGHT_LOCK_TTL):
+        return
+
+    def _run():
+        try:
+            refresh()
+        except Exception as e:
+            # 실패해도 stale 값은 hard TTL 까지 계속 서빙됨
+            logger.warning('MOSCOM background refresh failed (%s): %s', cache_key, e)
+        finally:
+            cache.delete(refresh_key)
+
+    threading.Thread(target=_run, name=f'moscom-swr:{cache_key[:40]}', daemon=True).start()
+
+
+# ─ 캐시 hit/miss 통계 ────────────────────────────
+# 프로세스 로컬로 세다가 STATS_FLUSH_INTERVAL 마다 공유 캐시 카운터에 합산 (워커 전체 합계).
+STATS_COUNTER_KEY = 'moscom:cachestats'
+STATS_FLUSH_INTERVAL = 10
+STATS_KINDS = ('hit', 'stale', 'miss', 'refresh')
+
+_stats_lock = threading.Lock()
+_stats_local = {}
+_stats_flushed_at = time.monotonic()
+
+
+def _count(cache_key, kind):
+    global _stats_flushed_at
+    ns = cache_key.split(':')[1] if ':' in cache_key else cache_key
+    with _stats_lock:
+        _stats_local[(ns, kind)] = _stats_local.get((ns, kind), 0) + 1
+        if time.monotonic() - _stats_flushed_at < STATS_FLUSH_INTERVAL:
+            return
+        pending = dict(_stats_local)
+        _stats_local.clear()
+        _stats_flushed_at = time.monotonic()
+    _flush_stats(pending)
+
+
+def _flush_stats(pending):
+    try:
+        for (ns, kind), n in pending.items():
+            key = f'{STATS_COUNTER_KEY}:{ns}:{kind}'
+            cache.add(key, 0, None)
+            cache.incr(key, n)
+        cache.add(f'{STATS_COUNTER_KEY}:since', time.time(), None)
+        namespaces = set(cache.get(f'{STATS_COUNTER_KEY}:namespaces') or [])
+        if not {ns for ns, _ in pending} <= namespaces:
+            cache.set(f'{STATS_COUNTER_KEY}:namespaces',
+                      sorted(namespaces | {ns for ns, _ in pending}), None)
+    except Exception as e:
+        logger.warning('cache stats flush failed: %s', e)
+
+
+def cache_stats():
+    """MOSCOM 캐시 hit/stale/miss 누적 카운트 (전 워커 합산 + 이 프로세스의 미반영분)."""
+    with _stats_lock:
+        local = dict(_stats_local)
+    namespaces = set(cache.get(f'{STATS_COUNTER_KEY}:namespaces') or []) | {ns for ns, _ in local}
+    out = {}
+    for ns in sorted(namespaces):
+        row = {}
+        for kind in STATS_KINDS:
+            row[kind] = (cache.get(f'{STATS_COUNTER_KEY}:{ns}:{kind}') or 0) + local.get((ns, kind), 0)
+        reads = row['hit'] + row['stale'] + row['miss']
+        row['hit_rate'] = round((row['hit'] + row['stale']) / reads, 3) if reads else None
+        out[ns] = row
+    return {'since': cache.get(f'{STATS_COUNTER_KEY}:since'), 'namespaces': out}
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats_local.clear()
+    keys = [f'{STATS_COUNTER_KEY}:since', f'{STATS_COUNTER_KEY}:namespaces']
+    for ns in cache.get(f'{STATS_COUNTER_KEY}:namespaces') or []:
+        keys += [f'{STATS_COUNTER_KEY}:{ns}:{kind}' for kind in STATS_KINDS]
+    cache.delete_many(keys)
+
+
+def _cached_call(cache_key, ttl, fetch, force_refresh=False, hard_ttl=None):
+    """캐시 조회 → miss 면 single-flight 로 fetch, soft TTL 초과면 stale 반환 + 백그라운드 갱신.
+    ttl: soft TTL, hard_ttl: 캐시 보존 한계. force_refresh 는 캐시를 건너뛰고 바로 갱신."""
+    hard_ttl = max(ttl, hard_ttl or ttl) if SWR_ENABLED else ttl
+    if force_refresh:
+        env = _store(cache_key, fetch(), hard_ttl)
+        _count(cache_key, 'refresh')
+        _note(cache_key, env, stale=False)
+        return env['v']
+    env = _load(cache_key)
+    if env is None:
+        _count(cache_key, 'miss')
+        env = _single_flight(cache_key, hard_ttl, fetch)
+        _note(cache_key, env, stale=False)
+        return env['v']
+    stale = time.time() - env['t'] >= ttl
+    if stale:
+        _revalidate_async(cache_key, lambda: _store(cache_key, fetch(), hard_ttl))
+    _count(cache_key, 'stale' if stale else 'hit')
+    _note(cache_key, env, stale=stale)
+    return env['v']
+
+
 def list_devices(force_refresh=False):
     """전체 장비 목록 조회 (60초 캐싱)"""
-    if not force_refresh:
-        cached = cache.get(DEVICES_CACHE_KEY)
-        if cached is not None:
-            return cached
-    data = _request('GET', '/device/listAll')
-    cache.set(DEVICES_CACHE_KEY, data, DEVICES_TTL)
-    return data
+    return _cached_call(
+        DEVICES_CACHE_KEY, DEVICES_TTL,
+        lambda: _request('GET', '/device/listAll'),
+        force_refresh=force_refresh, hard_ttl=DEVICES_HARD_TTL,
+    )
 
 
 def list_devices_uuid():
@@ -102,6 +513,7 @@ def raw_collection_bulk(start_dt, end_dt, mosquito_count=None, device_uuid=None)
 
 STATS_CACHE_KEY = 'moscom:stats'
 STATS_TTL = 300  # 통계는 5분 캐시 (일별 집계라 자주 안 바뀜)
+STATS_HARD_TTL = 6 * 60 * 60
 
 
 def get_statistics(device_uuid='', period_type='2', offset=0, force_refresh=False):
@@ -110,21 +522,33 @@ def get_statistics(device_uuid='', period_type='2', offset=0, force_refresh=Fals
     device_uuid: 빈 문자열이면 전체 장비
     """
     cache_key = f'{STATS_CACHE_KEY}:{device_uuid}:{period_type}:{offset}'
-    if not force_refresh:
-        cached = cache.get(cache_key)
-        if cached is not None:
-            return cached
-    data = _request(
-        'GET',
-        '/device/statistics',
-        params={'deviceUUID': device_uuid, 'type': period_type, 'offset': offset},
+    return _cached_call(
+        cache_key, STATS_TTL,
+        lambda: _request(
+            'GET',
+            '/device/statistics',
+            params={'deviceUUID': device_uuid, 'type': period_type, 'offset': offset},
+        ),
+        force_refresh=force_refresh, hard_ttl=STATS_HARD_TTL,
     )
-    cache.set(cache_key, data, STATS_TTL)
-    return data
 
 
 BYDATE_CACHE_KEY = 'moscom:bydate'
 BYDATE_TTL = 180  # raw 데이터는 자주 바뀌니 3분 캐시
+BYDATE_HARD_TTL = 60 * 60  # 집계 창이 정시 경계일 때만 — 같은 키가 다시 요청될 수 있는 창
+
+
+def _bydate_hard_ttl(aggregation, start_dt, end_dt):
+    """statisticsByDate 키의 보존 한계. raw 나 초 단위 창(now 기준 등)은 같은 키가 다시 안 오므로
+    soft TTL 만큼만 두고(오래 남겨 봐야 못 쓰는 큰 값), 정시 경계 집계 창만 stale 제공용으로 오래 둔다."""
+    if aggregation == 'raw':
+        return BYDATE_TTL
+    try:
+        start, end = _parse_api_dt(start_dt), _parse_api_dt(end_dt)
+    except (TypeError, ValueError):
+        return BYDATE_TTL
+    on_hour = all(d.minute == 0 and d.second == 0 and d.microsecond == 0 for d in (start, end))
+    return BYDATE_HARD_TTL if on_hour else BYDATE_TTL
 
 
 def get_statistics_by_date(start_dt, end_dt, aggregation='raw',
@@ -134,27 +558,218 @@ def get_statistics_by_date(start_dt, end_dt, aggregation='raw',
     """기간별 통계 조회
     aggregation: 'raw' (타임스탬프별) | 'day' (일별 집계)
     device_uuid='0' 또는 빈문자열이면 전체
+
+    aggregation='day' 이고 기간 양끝이 모두 UTC 자정(00:00:00Z)이면 일 단위 slice 로 캐싱해서
+    기간이 겹치는 호출끼리 공유한다. 그 밖의 창(KST 영업일 등)은 응답 값이 창 경계에 따라 달라지므로
+    예전처럼 창 그대로 호출·캐싱한다.
     """
+    filters = {
+        'deviceUUID': device_uuid,
+        'address_sido': address_sido,
+        'address_gungu': address_gungu,
+        'address_dong': address_dong,
+    }
+    if aggregation == 'day' and DAY_SLICE_ENABLED:
+        try:
+            start, end = _parse_api_dt(start_dt), _parse_api_dt(end_dt)
+        except (TypeError, ValueError):
+            start = end = None
+        if start is not None and end > start and _is_utc_midnight(start) and _is_utc_midnight(end):
+            return _get_day_sliced(start, end, filters, force_refresh=force_refresh)
+
     cache_key = f'{BYDATE_CACHE_KEY}:{device_uuid}:{aggregation}:{start_dt}:{end_dt}'
-    if not force_refresh:
-        cached = cache.get(cache_key)
-        if cached is not None:
-            return cached
-    data = _request(
-        'GET',
-        '/device/statisticsByDate',
+    return _cached_call(
+        cache_key, BYDATE_TTL,
+        lambda: _request(
+            'GET',
+            '/device/statisticsByDate',
+            params={
+                **filters,
+                'startDateTime': start_dt,
+                'endDateTime': end_dt,
+                'aggregation': aggregation,
+            },
+        ),
+        force_refresh=force_refresh, hard_ttl=_bydate_hard_ttl(aggregation, start_dt, end_dt),
+    )
+
+
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def iter_statistics_raw(start_dt, end_dt, device_uuid='0', batch_size=5000):
+    """statisticsByDate aggregation=raw 를 스트리밍으로 받아 batch_size 개씩 리스트로 yield.
+    동기화/백필 전용 — 캐시를 거치지 않고, 메모리는 응답 길이가 아니라 batch_size 에 비례한다.
+    """
+    resp = _request_stream(
+        'GET', '/device/statisticsByDate',
         params={
             'deviceUUID': device_uuid,
-            'address_sido': address_sido,
-            'address_gungu': address_gungu,
-            'address_dong': address_dong,
+            'address_sido': '',
+            'address_gungu': '',
+            'address_dong': '',
             'startDateTime': start_dt,
             'endDateTime': end_dt,
-            'aggregation': aggregation,
+            'aggregation': 'raw',
         },
     )
-    cache.set(cache_key, data, BYDATE_TTL)
-    return data
+    _record_transfer(0)
+
+    def _chunks():
+        for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+            _record_transfer(len(chunk), requests_=0)
+            yield chunk
+
+    try:
+        batch = []
+        for item in iter_json_array(_chunks()):
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        resp.close()
+
+
+# ─ 일 단위 slice 캐시 (aggregation='day') ─────────
+# 키: moscom:dayslice:<필터>:<YYYY-MM-DD>, 값: 그 날짜(created_date[:10]) 의 행 목록.
+# 기간 조회는 slice 를 get_many 로 모으고, 빠진 날만 연속 구간으로 묶어 MOSCOM 에 요청한다.
+# 지난 날(확정)은 길게, 오늘·어제(아직 수집/보정 중)는 BYDATE_TTL 로 짧게 캐싱.
+DAY_SLICE_ENABLED = os.environ.get('MOSCOM_DAY_SLICE', '1') != '0'
+DAY_SLICE_KEY = 'moscom:dayslice'
+DAY_SLICE_FINAL_TTL = 30 * 24 * 60 * 60
+DAY_SLICE_MAX_RUN = 31  # 한 번에 요청하는 최대 일수
+
+
+def _parse_api_dt(value):
+    """'2026-05-01T00:00:00.000Z' / '2026-05-01T00:00:00' (UTC) → aware datetime(UTC)."""
+    s = str(value).strip()
+    if s.endswith('Z'):
+        s = s[:-1] + '+00:00'
+    dt = datetime.fromisoformat(s)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=dt_timezone.utc)
+    return dt.astimezone(dt_timezone.utc)
+
+
+def _is_utc_midnight(dt):
+    return dt.hour == 0 and dt.minute == 0 and dt.second == 0 and dt.microsecond == 0
+
+
+def is_final_day(day):
+    """UTC 날짜 day 의 집계가 확정됐는지 — 하루가 끝나고 만 하루가 더 지났으면 확정."""
+    return day < datetime.now(dt_timezone.utc).date() - timedelta(days=1)
+
+
+def _day_ttls(day):
+    """(soft, hard) TTL."""
+    if is_final_day(day):
+        return DAY_SLICE_FINAL_TTL, DAY_SLICE_FINAL_TTL
+    return BYDATE_TTL, (BYDATE_HARD_TTL if SWR_ENABLED else BYDATE_TTL)
+
+
+def _day_slice_prefix(filters):
+    return '{}:{}:{}:{}:{}'.format(
+        DAY_SLICE_KEY, filters['deviceUUID'] or '0',
+        filters['address_sido'], filters['address_gungu'], filters['address_dong'])
+
+
+def _day_runs(days, max_run=DAY_SLICE_MAX_RUN):
+    """정렬된 날짜 목록 → 연속 구간 [(first, last), ...]."""
+    runs = []
+    for d in days:
+        if runs and d == runs[-1][1] + timedelta(days=1) and (d - runs[-1][0]).days < max_run:
+            runs[-1] = (runs[-1][0], d)
+        else:
+            runs.append((d, d))
+    return runs
+
+
+def _store_day_run(prefix, first, last, rows):
+    """[first, last] 구간 응답을 날짜별 slice 로 나눠 저장. 행이 없는 날도 빈 slice 로 저장."""
+    by_day = {}
+    for r in rows or []:
+        by_day.setdefault((r.get('created_date') or '')[:10], []).append(r)
+    now = time.time()
+    envs = {}
+    groups = {}
+    d = first
+    while d <= last:
+        env = {'swr': 1, 'v': by_day.get(d.isoformat(), []), 't': now}
+        envs[d] = env
+        groups.setdefault(_day_ttls(d)[1], {})[f'{prefix}:{d.isoformat()}'] = env
+        d += timedelta(days=1)
+    for hard_ttl, items in groups.items():
+        cache.set_many(items, hard_ttl)
+    return envs
+
+
+def _fetch_day_run(filters, first, last):
+    return _request(
+        'GET',
+        '/device/statisticsByDate',
+        params={
+            **filters,
+            'startDateTime': first.strftime('%Y-%m-%dT00:00:00.000Z'),
+            'endDateTime': (last + timedelta(days=1)).strftime('%Y-%m-%dT00:00:00.000Z'),
+            'aggregation': 'day',
+        },
+    )
+
+
+def _get_day_sliced(start, end, filters, force_refresh=False):
+    prefix = _day_slice_prefix(filters)
+    first = start.date()
+    last = (end - timedelta(microseconds=1)).date()
+    days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+    keys = {d: f'{prefix}:{d.isoformat()}' for d in days}
+
+    found = {} if force_refresh else cache.get_many(list(keys.values()))
+    envs, missing, stale = {}, [], []
+    now = time.time()
+    for d in days:
+        env = found.get(keys[d])
+        if not (isinstance(env, dict) and env.get('swr') == 1):
+            missing.append(d)
+            continue
+        envs[d] = env
+        if now - env['t'] >= _day_ttls(d)[0]:
+            stale.append(d)
+    # 호출 1번 = 카운트 1번 (날짜 수만큼 세면 hit/miss 가 부풀려진다)
+    _count(prefix, 'refresh' if force_refresh else 'miss' if missing else 'stale' if stale else 'hit')
+
+    for a, b in _day_runs(missing):
+        if force_refresh:
+            envs.update(_store_day_run(prefix, a, b, _fetch_day_run(filters, a, b)))
+            continue
+        run_key = f'{prefix}:run:{a.isoformat()}:{b.isoformat()}'
+        run_keys = [keys[d] for d in days if a <= d <= b]
+
+        def _load_run(run_keys=run_keys, a=a):
+            got = cache.get_many(run_keys)
+            if len(got) < len(run_keys):
+                return None
+            return {a + timedelta(days=i): got[k] for i, k in enumerate(run_keys)}
+
+        envs.update(_single_flight(
+            run_key, None,
+            lambda a=a, b=b: _fetch_day_run(filters, a, b),
+            load=_load_run,
+            store=lambda rows, a=a, b=b: _store_day_run(prefix, a, b, rows),
+        ))
+
+    for a, b in _day_runs(stale):
+        _revalidate_async(
+            f'{prefix}:run:{a.isoformat()}:{b.isoformat()}',
+            lambda a=a, b=b: _store_day_run(prefix, a, b, _fetch_day_run(filters, a, b)),
+        )
+
+    if envs:
+        oldest = min(envs.values(), key=lambda e: e['t'])
+        _note(prefix, oldest, stale=bool(stale))
+    return [r for d in days for r in envs[d]['v']]
 
 
 def get_daily_map(start_date, end_date, allowed_uuids=None, force_refresh=False):
@@ -163,23 +778,73 @@ def get_daily_map(start_date, end_date, allowed_uuids=None, force_refresh=False)
     ⚠️ 중요: Collection.mosquito_count 는 누적값이라 직접 Sum 하면 몇 배로 부풀려진다.
     반드시 이 함수를 통해 moscom API 의 일별 집계값을 사용할 것. (moscom.co.kr 과 동일)
 
+    확정된 날은 로컬 DailyCount(run_sync 가 채움) 에서 한 번의 쿼리로 읽고,
+    아직 확정 안 된 날(오늘·어제)과 로컬에 없는 구간만 MOSCOM API 로 가져온다.
+
     start_date, end_date: 'YYYY-MM-DD' (양끝 포함)
     allowed_uuids: 있으면 그 장비만 필터
     반환: { device_uuid: { 'YYYY-MM-DD': count, ... }, ... }
     """
-    from datetime import datetime, timedelta
     try:
         sd = datetime.strptime(str(start_date)[:10], '%Y-%m-%d').date()
         ed = datetime.strptime(str(end_date)[:10], '%Y-%m-%d').date()
     except Exception:
         return {}
+    allowed = set(allowed_uuids) if allowed_uuids is not None else None
+
+    out, lo, hi = _local_daily_map(sd, ed, allowed)
+    if lo is None:
+        return _api_daily_map(sd, ed, allowed, force_refresh)
+    if sd < lo:
+        _merge_daily(out, _api_daily_map(sd, lo - timedelta(days=1), allowed, force_refresh))
+    if hi < ed:
+        _merge_daily(out, _api_daily_map(hi + timedelta(days=1), ed, allowed, force_refresh))
+    return out
+
+
+def _merge_daily(out, extra):
+    for u, per in extra.items():
+        out.setdefault(u, {}).update(per)
+
+
+def _local_daily_map(sd, ed, allowed):
+    """DailyCount 에서 [sd, ed] 중 확정 구간을 읽는다.
+    반환: (out, lo, hi) — 로컬로 커버한 구간 [lo, hi]. 커버 못 하면 lo=hi=None.
+    """
+    try:
+        from django.db.models import Min
+        from moscom.models import DailyCount, SyncState
+        final_until = (SyncState.objects.filter(id=1)
+                       .values_list('daily_final_until', flat=True).first())
+        if not final_until:
+            return {}, None, None
+        first_day = DailyCount.objects.aggregate(mn=Min('date'))['mn']
+        if not first_day:
+            return {}, None, None
+        lo, hi = max(sd, first_day), min(ed, final_until)
+        if lo > hi:
+            return {}, None, None
+        qs = DailyCount.objects.filter(date__gte=lo, date__lte=hi)
+        if allowed is not None:
+            qs = qs.filter(device_uuid__in=list(allowed))
+        out = {}
+        for u, d, c in qs.values_list('device_uuid', 'date', 'mosquito_count').iterator(chunk_size=5000):
+            out.setdefault(u, {})[d.isoformat()] = c
+        return out, lo, hi
+    except Exception:
+        # 마이그레이션 전 / DB 장애 — API 로 대체
+        logger.exception('local daily map failed, falling back to MOSCOM API')
+        return {}, None, None
+
+
+def _api_daily_map(sd, ed, allowed, force_refresh=False):
+    """MOSCOM API 로 [sd, ed] 일별값 조회."""
     # API 는 [start, end) 로 동작하므로 end 다음날 00:00 까지
     start_iso = sd.strftime('%Y-%m-%dT00:00:00.000Z')
     end_iso = (ed + timedelta(days=1)).strftime('%Y-%m-%dT00:00:00.000Z')
     rows = get_statistics_by_date(
         start_dt=start_iso, end_dt=end_iso, aggregation='day',
         device_uuid='0', force_refresh=force_refresh) or []
-    allowed = set(allowed_uuids) if allowed_uuids is not None else None
     out = {}
     for r in rows:
         u = r.get('device_uuid')
@@ -0,0 +1,160 @@
+"""종합현황 확정 스냅샷 (영업일 × 사용자 범위).
+
+지난 영업일의 종합현황 중 포집량 기반 부분(합계·위험 점수·추세·전국 비교)은 일별 집계가
+확정(SyncState.daily_final_until)된 뒤로 바뀌지 않으므로 moscom.OverviewSnapshot 에 한 번 저장해 두고
+?date= 조회는 그 행을 읽는다. 지금 시각·현재 장비 상태로 정해지는 부분(배터리·수신 지연·신뢰도·상태,
+최근 48시간 raw 로 내는 민원 점수와 관련 KPI)은 읽을 때마다 core.views._overview_live 로 다시 채운다.
+그중 48시간 raw 야간 비율은 5분 단위 창으로 캐시(core.views._night_ratios)해 스냅샷 읽기는 upstream 호출 없이 끝난다.
+
+- get_overview(su, date_str, hour_str, ctx): moscom_overview 진입점.
+  ?hour 지정 / 아직 확정 안 된 날(기본값 = 영업일 어제 포함) → 매번 실시간 계산.
+  확정된 날 → 스냅샷 1행 조회, 없거나 무효면 계산 후 저장.
+- materialize(days): 동기화 후 Celery 태스크(moscom.overview_snapshots) — 최근 확정 days 일 × 전체 사용자 범위.
+- invalidate_from(day) / invalidate_for_time(dt): day 이후 스냅샷 삭제. 관리자 Collection 수정·삭제,
+  과거 구간 raw 재수집, 확정일 재동기화 시 호출.
+스냅샷 유효 조건: final_until(만들 당시 확정일) >= business_date, 그리고 labels(관측소·권역 표시명 지문)가
+지금 장비 컨텍스트와 같을 것 — 장비/권역 이름을 바꾸면(bump_generation) 다음 조회·materialize 때 다시 만든다.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import date, timedelta, timezone as dt_timezone
+
+from core import user_store
+from core.device_context import get_device_context, scope_key
+
+logger = logging.getLogger(__name__)
+
+# 동기화 후 미리 만들어 둘 최근 확정 영업일 수
+SNAPSHOT_DAYS = int(os.environ.get('MOSCOM_OVERVIEW_SNAPSHOT_DAYS', '14'))
+
+
+def _final_until():
+    from moscom.models import SyncState
+    return SyncState.objects.filter(id=1).values_list('daily_final_until', flat=True).first()
+
+
+def _target_date(date_str):
+    """_build_overview_data 와 같은 규칙 — 파싱 실패·미지정이면 영업일 어제."""
+    if date_str:
+        try:
+            return date.fromisoformat(date_str)
+        except ValueError:
+            pass
+    from moscom.timeutil import business_yesterday
+    return business_yesterday()
+
+
+def snapshot_scopes():
+    """admin + 저장된 사용자들의 세션 사용자 dict (같은 허용 범위는 1개로)."""
+    out = {}
+    admin = {'login_id': user_store.ADMIN_ID, 'is_admin': True, 'allowed_devices': None}
+    out[scope_key(admin)] = admin
+    for u in user_store.list_users():
+        su = {'login_id': u['login_id'], 'is_admin': False, 'allowed_devices': u['allowed_devices']}
+        out.setdefault(scope_key(su), su)
+    return out
+
+
+_LABEL_FIELDS = ('name', 'addr', 'region_code', 'region_name', 'region_type', 'form_type', 'dev_bad_min')
+
+
+def labels_key(ctx):
+    """스냅샷에 박히는 표시명(관측소 이름·주소·권역·2축 분류, 권역 overview 이름) 지문."""
+    from moscom.models import Region
+
+    if getattr(ctx, '_overview_labels', None) is None:
+        meta = {u: [m.get(k) for k in _LABEL_FIELDS] for u, m in sorted(ctx.meta.items())}
+        regions = list(Region.objects.order_by('code').values_list('code', 'name', 'overview_name'))
+        blob = json.dumps([meta, regions], ensure_ascii=False, sort_keys=True, default=str)
+        ctx._overview_labels = hashlib.sha1(blob.encode()).hexdigest()[:16]
+    return ctx._overview_labels
+
+
+def _build(su, day, final_until, ctx=None):
+    from core.views import _build_overview_data
+    from moscom.models import OverviewSnapshot
+
+    ctx = ctx or get_device_context(su)
+    t0 = time.monotonic()
+    data = _build_overview_data(su, date_str=day.isoformat(), ctx=ctx)
+    OverviewSnapshot.objects.update_or_create(
+        business_date=day, scope=scope_key(su),
+        defaults={'payload': data, 'final_until': final_until, 'labels': labels_key(ctx),
+                  'seconds': round(time.monotonic() - t0, 3)},
+    )
+    return data
+
+
+def get_overview(su, date_str='', hour_str='', ctx=None):
+    """종합현황 데이터 — 확정된 날은 스냅샷, 그 외는 _build_overview_data 실시간."""
+    from core.views import _build_overview_data
+    from moscom.models import OverviewSnapshot
+
+    if hour_str:
+        return _build_overview_data(su, date_str=date_str, hour_str=hour_str, ctx=ctx)
+    day = _target_date(date_str)
+    final_until = _final_until()
+    if final_until is None or day > final_until:
+        return _build_overview_data(su, date_str=date_str, ctx=ctx)
+    from core.views import _overview_live
+
+    ctx = ctx or get_device_context(su)
+    payload = (OverviewSnapshot.objects
+               .filter(business_date=day, scope=scope_key(su), final_until__gte=day, labels=labels_key(ctx))
+               .values_list('payload', flat=True).first())
+    if payload is not None:
+        # 장비 상태·48시간 raw 부분은 만든 시점 값이 아니라 지금 값으로
+        return _overview_live(payload, ctx)
+    return _build(su, day, final_until, ctx=ctx)
+
+
+def materialize(days=SNAPSHOT_DAYS):
+    """최근 확정 days 일 × 전체 사용자 범위 스냅샷을 채운다. 이미 유효한 행은 건너뛴다."""
+    from moscom.models import OverviewSnapshot
+
+    final_until = _final_until()
+    if final_until is None:
+        return {'built': 0, 'skipped': 0, 'final_until': None}
+    first = final_until - timedelta(days=days - 1)
+    have = {(d, s, lb) for d, s, f, lb in OverviewSnapshot.objects
+            .filter(business_date__gte=first, business_date__lte=final_until)
+            .values_list('business_date', 'scope', 'final_until', 'labels') if f and f >= d}
+    built = skipped = failed = 0
+    for scope, su in snapshot_scopes().items():
+        ctx = get_device_context(su)
+        labels = labels_key(ctx)
+        day = first
+        while day <= final_until:
+            if (day, scope, labels) in have:
+                skipped += 1
+            else:
+                try:
+                    _build(su, day, final_until, ctx=ctx)
+                    built += 1
+                except Exception as e:
+                    logger.warning(f'overview snapshot {day} [{scope}] failed: {e}')
+                    failed += 1
+            day += timedelta(days=1)
+    result = {'built': built, 'skipped': skipped, 'failed': failed,
+              'final_until': final_until.isoformat()}
+    logger.info(f'overview snapshots: {result}')
+    return result
+
+
+def invalidate_from(day):
+    """day(영업일) 이후 스냅샷 전부 삭제 — 기준일·전일·7일 평균 어디에 걸려도 빠짐없이."""
+    from moscom.models import OverviewSnapshot
+    n = OverviewSnapshot.objects.filter(business_date__gte=day).delete()[0]
+    if n:
+        logger.info(f'overview snapshots invalidated from {day}: {n}')
+    return n
+
+
+def invalidate_for_time(dt):
+    """측정 시각 dt 가 속한 날부터 무효화. 일별 집계 키(UTC 날짜)와 영업일(KST 05시) 중 이른 쪽."""
+    from moscom.timeutil import KST, business_today
+    return invalidate_from(min(dt.astimezone(dt_timezone.utc).date(),
+                               business_today(dt.astimezone(KST))))
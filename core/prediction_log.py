@@ -5,7 +5,7 @@
 
 - save_snapshot(preds, meta_by_uuid): 오늘자 예측을 PredictionLog 에 저장 (하루 1회, 중복 무시)
 - match_actuals(): 실측이 들어온 target_date 행에 actual/error 채우기
-- accuracy_summary(): 예측 간격(며칠 뒤 예측인지)별 정확도 요약
+- accuracy_summary(): 예측 간격(며칠 뒤 예측인지)별 정확도 요약 + P10~P90 구간 적중률(coverage)
 """
 import logging
 from datetime import date, datetime, timedelta, timezone
@@ -66,6 +66,9 @@ def save_snapshot(preds, meta_by_uuid=None, snapshot_date=None):
                         'predicted_index': pp.get('predicted_index'),
                         'grade': pp.get('grade') or '',
                         'remedy_factor': pp.get('remedy_factor') or 1.0,
+                        'predicted_p10': pp.get('p10'),
+                        'predicted_p50': pp.get('p50'),
+                        'predicted_p90': pp.get('p90'),
                         'lag1': lag1, 'lag7': lag7, 'ma3': ma3, 'ma7': ma7,
                         'temperature': w.get('temperature'),
                         'humidity': w.get('humidity'),
@@ -140,7 +143,8 @@ def accuracy_summary(days=30, allowed_uuids=None):
     if allowed_uuids is not None:
         qs = qs.filter(device_uuid__in=list(allowed_uuids))
 
-    rows = list(qs.values('horizon_days', 'predicted', 'actual', 'error', 'abs_error_pct'))
+    rows = list(qs.values('horizon_days', 'predicted', 'actual', 'error', 'abs_error_pct',
+                          'predicted_p10', 'predicted_p90'))
     # (actual 포함 — 오차율 계산에서 실측 0 제외에 사용)
     if not rows:
         return {'overall': None, 'by_horizon': [], 'count': 0}
@@ -159,6 +163,20 @@ def accuracy_summary(days=30, allowed_uuids=None):
             hit = sum(1 for p in pcts if p <= 20) / len(pcts) * 100
         else:
             mape = mdape = hit = 0
+        # 예측 구간 — 구간이 저장된 행만. 잘 맞춘 구간이면 coverage ≈ 80%, 아래/위 벗어남 ≈ 10%씩
+        band = [r for r in items if r['predicted_p10'] is not None and r['predicted_p90'] is not None]
+        if band:
+            below = sum(1 for r in band if r['actual'] < r['predicted_p10'])
+            above = sum(1 for r in band if r['actual'] > r['predicted_p90'])
+            interval = {
+                'band_count': len(band),
+                'coverage': round((len(band) - below - above) / len(band) * 100, 1),  # P10~P90 안에 든 비율(%)
+                'below_p10': round(below / len(band) * 100, 1),
+                'above_p90': round(above / len(band) * 100, 1),
+                'band_width': round(sum(r['predicted_p90'] - r['predicted_p10'] for r in band) / len(band), 1),
+            }
+        else:
+            interval = {'band_count': 0, 'coverage': None, 'below_p10': None, 'above_p90': None, 'band_width': None}
         return {
             'count': n,
             'pct_count': len(pct_items),   # 오차율 산출에 쓴 건수(실측>0)
@@ -168,6 +186,7 @@ def accuracy_summary(days=30, allowed_uuids=None):
             'mdape': round(mdape, 1),      # 중앙값 오차율(%) — 극단값에 안 흔들림
             'bias': round(bias, 1),        # 편향(+면 과소예측)
             'hit_rate': round(hit, 1),     # 오차 20% 이내 비율
+            **interval,
         }
 
     by_h = {}
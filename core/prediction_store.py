@@ -0,0 +1,187 @@
+"""일일 AI 예측 저장소 — (영업일 오늘, 모델 버전, 장비) 단위로 모델 출력을 캐시.
+
+AI 예측 · 위험도 예보 · 방역 시뮬레이션이 페이지마다 predict_for_devices 를 다시 돌리던 것을
+한 번 계산해 두고 나눠 쓴다. 입력이 바뀌는 시점은 매시 동기화 · 05:10 재학습 · 방역 계획 수정뿐.
+
+- 캐시 키: moscom:pred:{영업일}:{모델 버전}:{uuid} → {'input': 예측 입력, 'raw': STORE_DAYS 일 예측}
+  재학습으로 모델 파일이 바뀌면 버전이 달라져 이전 키는 자연히 안 쓰인다.
+- fill(): 동기화·재학습 직후 Celery 태스크(moscom.fill_predictions) — 전체 장비를 다시 계산해 덮어씀.
+- get_predictions(ctx, days_ahead): 캐시 조회, 없는 장비만 계산. 앞쪽 days_ahead 일만 잘라 요약.
+- apply_remedies(preds): 방역 계획 효과를 읽을 때 얹는다 (remedy_store 파일이 바뀌면 다음 호출부터 반영).
+"""
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+
+from core import moscom_client
+from core import predictor
+from core import remedy_store
+
+logger = logging.getLogger(__name__)
+
+KEY = 'moscom:pred'
+TTL = 26 * 60 * 60
+# 저장해 둘 예측 일수 — 방역 시뮬레이션(10일)까지 잘라 쓸 수 있게
+STORE_DAYS = int(os.environ.get('MOSCOM_PREDICT_STORE_DAYS', '10'))
+# lag7 까지 쓰니 넉넉하게
+HISTORY_DAYS = 10
+
+
+def _key(today, version, uuid):
+    return f'{KEY}:{today.isoformat()}:{version}:{uuid}'
+
+
+def build_inputs(ctx, today, uuids=None):
+    """predict_for_devices 입력 — 최근 HISTORY_DAYS 일 일별 실측 (오늘 제외) + 권역·기상 메타."""
+    uuids = list(ctx.uuids if uuids is None else uuids)
+    start_d = today - timedelta(days=HISTORY_DAYS)
+    start_iso = datetime(start_d.year, start_d.month, start_d.day, tzinfo=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    end_iso = (datetime(today.year, today.month, today.day, tzinfo=timezone.utc) + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    daily = moscom_client.get_statistics_by_date(start_dt=start_iso, end_dt=end_iso, aggregation='day', device_uuid='0')
+
+    # 오늘(기준일)은 아직 측정이 안 끝났으니 실측에 포함하지 않음 (예측 컬럼과 중복 방지)
+    today_iso = today.isoformat()
+    hist_by_uuid = {u: [] for u in uuids}
+    for r in (daily or []):
+        u = r.get('device_uuid')
+        d = (r.get('created_date') or '')[:10]
+        if u in hist_by_uuid and d and d < today_iso:
+            hist_by_uuid[u].append({'date': d, 'count': r.get('mosquito_count') or 0})
+
+    inputs = []
+    for u in uuids:
+        m = ctx.meta.get(u) or {}
+        inputs.append({
+            'uuid': u,
+            'name': m.get('name') or u,
+            # region 그룹 키: 권역명 우선, 없으면 시도+군구
+            'region': m.get('region_group') or '',
+            # 히스토리는 오름차순(과거 → 최신)으로 정렬: 차트와 lag 계산에 필요
+            'history': sorted(hist_by_uuid[u], key=lambda h: h['date']),
+            'region_code': m.get('region_code') or '',
+            'sido': (m.get('md_sido') if m.get('weather') else m.get('sido')) or '',
+            'weather': m.get('weather') or {},
+        })
+    return inputs
+
+
+def _compute(ctx, today, version, uuids=None):
+    inputs = build_inputs(ctx, today, uuids)
+    raw = predictor.forecast_raw(inputs, days_ahead=STORE_DAYS, today=today)
+    entries = {inp['uuid']: {'input': inp, 'raw': r} for inp, r in zip(inputs, raw)}
+    cache.set_many({_key(today, version, u): e for u, e in entries.items()}, TTL)
+    return entries
+
+
+def get_predictions(ctx, days_ahead=3, uuids=None):
+    """predict_for_devices 와 같은 구조의 결과 (방역 미반영). uuids 없으면 ctx 허용 장비 전체."""
+    today = predictor._today()
+    uuids = [u for u in (ctx.uuids if uuids is None else uuids) if u in ctx.allowed]
+    days_ahead = max(1, min(int(days_ahead or 3), 14))
+    if days_ahead > STORE_DAYS:
+        inputs = build_inputs(ctx, today, uuids)
+        return predictor.predict_for_devices(inputs, days_ahead=days_ahead)
+
+    version = predictor.model_version()
+    keys = {u: _key(today, version, u) for u in uuids}
+    got = cache.get_many(list(keys.values()))
+    entries = {u: got[k] for u, k in keys.items() if k in got}
+    missing = [u for u in uuids if u not in entries]
+    if missing:
+        entries.update(_compute(ctx, today, version, missing))
+    inputs = [entries[u]['input'] for u in uuids]
+    raw = [entries[u]['raw'][:days_ahead] for u in uuids]
+    return predictor.summarize_predictions(inputs, raw)
+
+
+def fill():
+    """전체 장비 예측을 새로 계산해 저장 — 동기화·재학습 직후 호출."""
+    from core import model_registry
+    from core.device_context import get_device_context
+
+    t0 = time.monotonic()
+    model_registry.ensure_current()
+    ctx = get_device_context({'is_admin': True})
+    today = predictor._today()
+    version = predictor.model_version()
+    entries = _compute(ctx, today, version)
+    result = {'devices': len(entries), 'date': today.isoformat(), 'version': version,
+              'seconds': round(time.monotonic() - t0, 3)}
+    logger.info(f'prediction store fill: {result}')
+    return result
+
+
+def _grade_count(n):
+    if n <= 10: return '안전'
+    if n <= 50: return '관심'
+    if n <= 100: return '주의'
+    if n <= 200: return '경고'
+    return '위험'
+
+
+def apply_remedies(preds):
+    """방역 계획 효과 반영 (post-processing, preds 를 직접 고침) — predicted_index/grade · p10/p50/p90 보존.
+    반환: {uuid: {date: [적용 방역, ...]}} (방역이 걸린 장비만)."""
+    remedy_summary_by_uuid = {}
+    for p in preds:
+        uid = p['uuid']
+        new_preds = []
+        applied_by_date = {}
+        for pp in p['predictions']:
+            factor, applied = remedy_store.adjustment_factor(uid, pp.get('date'))
+            orig = pp.get('predicted') or 0
+            adj = int(round(orig * factor))
+            # 모기지수도 방역 계수만큼 비례 감소 (마릿수가 줄면 지수도 줄어듦)
+            orig_idx = pp.get('predicted_index')
+            if orig_idx is not None:
+                adj_idx = round(max(0.0, min(100.0, orig_idx * factor)), 1)
+            else:
+                adj_idx = None
+            new_pp = {
+                'date': pp['date'],
+                'predicted': adj,
+                'predicted_raw': orig,
+                'predicted_index': adj_idx,
+                'predicted_index_raw': round(orig_idx, 1) if orig_idx is not None else None,
+                'grade': predictor._grade_idx(adj_idx),
+                'remedy_factor': round(factor, 3),
+            }
+            # 예측 구간도 같은 계수로 (방역 미반영 값은 *_raw)
+            for q in predictor.QUANTILES:
+                v = pp.get(f'p{q}')
+                new_pp[f'p{q}'] = int(round(v * factor)) if v is not None else None
+                new_pp[f'p{q}_raw'] = v
+            new_preds.append(new_pp)
+            if applied:
+                applied_by_date[pp['date']] = applied
+        p['predictions'] = new_preds
+        ps = [x['predicted'] for x in new_preds]
+        idxs = [x['predicted_index'] for x in new_preds if x['predicted_index'] is not None]
+        p['max_predicted'] = max(ps) if ps else 0
+        p['avg_predicted'] = round(sum(ps) / len(ps)) if ps else 0
+        if idxs:
+            avg_idx = sum(idxs) / len(idxs)
+            p['max_index'] = round(max(idxs), 1)
+            p['avg_index'] = round(avg_idx, 1)
+            p['grade'] = predictor._grade_idx(avg_idx)
+        else:
+            p['max_index'] = None
+            p['avg_index'] = None
+            p['grade'] = _grade_count(p['max_predicted'])
+        if applied_by_date:
+            p['remedy_applied'] = applied_by_date
+            remedy_summary_by_uuid[uid] = applied_by_date
+            # 추론 근거에 방역 반영 요약 덧붙임
+            names = []
+            for alist in applied_by_date.values():
+                for a in (alist or []):
+                    nm = (a.get('method_name') or a.get('name')) if isinstance(a, dict) else str(a)
+                    if nm and nm not in names:
+                        names.append(nm)
+            if names:
+                msg = f"방역 {len(applied_by_date)}일 반영(예: {names[0]})"
+                p['reasoning'] = (p.get('reasoning') or '') + ' · ' + msg if p.get('reasoning') else msg
+    return remedy_summary_by_uuid
@@ -7,61 +7,30 @@
 predictor 는 multi-day 예측 시 첫 번째 날만 모델로 예측하고, 그 결과를
 다음 날 lag1 로 넣어 재귀적으로 N일 예측 (recursive forecasting).
 """
-import os
 import logging
 from datetime import datetime, timedelta, timezone
-from functools import lru_cache
 
 import numpy as np
 import pandas as pd
 
+from core import model_registry
+from core import tree_engine
+
 logger = logging.getLogger(__name__)
 
-# 우선 moscom/ml 에서 찾고, 없으면 기존 core/ml 로 fallback
-_PROJ_ROOT = os.path.dirname(os.path.dirname(__file__))
-_NEW_ML_DIR = os.path.join(_PROJ_ROOT, 'moscom', 'ml')
-_OLD_ML_DIR = os.path.join(os.path.dirname(__file__), 'ml')
+# 예측 구간 — 트리별 예측의 분위수 (P10 · P50 · P90)
+QUANTILES = (10, 50, 90)
 
 
-def _model_paths():
-    """새 모델 우선, 없으면 기존 모델."""
-    new_model = os.path.join(_NEW_ML_DIR, 'best_model_RandomForest.joblib')
-    new_feat = os.path.join(_NEW_ML_DIR, 'feature_cols.joblib')
-    if os.path.exists(new_model) and os.path.exists(new_feat):
-        return new_model, new_feat, 'v2'
-    return (
-        os.path.join(_OLD_ML_DIR, 'best_model_RandomForest.joblib'),
-        os.path.join(_OLD_ML_DIR, 'feature_cols.joblib'),
-        'v1',
-    )
+def _load():
+    """(model, feature_cols, ver, idx_model, meta) — core.model_registry 의 현재 버전.
+    재학습된 새 버전은 registry 가 백그라운드로 읽어 교체한다."""
+    return tuple(model_registry.get())[:5]
 
 
-@lru_cache(maxsize=1)
-def _load():
-    import joblib
-    mp, fp, ver = _model_paths()
-    if not os.path.exists(mp):
-        raise FileNotFoundError(f'model not found: {mp}')
-    model = joblib.load(mp)
-    feature_cols = joblib.load(fp)
-    logger.info('AI model loaded (%s, %d features)', ver, len(feature_cols))
-    # 모기지수 모델 + 메타 (선택)
-    idx_model = None
-    meta = None
-    base_dir = os.path.dirname(mp)
-    idx_path = os.path.join(base_dir, 'best_model_MosquitoIndex.joblib')
-    meta_path = os.path.join(base_dir, 'training_meta.joblib')
-    if os.path.exists(idx_path):
-        try:
-            idx_model = joblib.load(idx_path)
-        except Exception as e:
-            logger.warning('mosquito index model load failed: %s', e)
-    if os.path.exists(meta_path):
-        try:
-            meta = joblib.load(meta_path)
-        except Exception as e:
-            logger.warning('training meta load failed: %s', e)
-    return model, feature_cols, ver, idx_model, meta
+def model_version():
+    """현재 프로세스가 쓰는 모델 버전 (버전 디렉터리명, 예전 배치면 'v2-<파일 mtime>')."""
+    return model_registry.get().version
 
 
 def _build_v2_row(history, target_date, region_code, sido, weather):
@@ -121,104 +90,207 @@ def _build_v1_row(history, target_date, weather, station_code):
     return row
 
 
-def predict_for_devices(devices_stats, weather_by_region=None, days_ahead=3):
-    """장비별 예측 (recursive). devices_stats:
-       [{uuid, name, region, history:[{date,count}], region_code?, sido?, weather?}]
-    """
+# v2 재귀 예측에 필요한 최근 일수 (lag7·ma7)
+_TAIL = 7
+
+
+def _v2_static(devices_stats, feature_cols):
+    """장비별로 날짜와 무관한 v2 피처(기상·region/sido one-hot) 행렬 (N, F)."""
+    pos = {c: i for i, c in enumerate(feature_cols)}
+    static = np.zeros((len(devices_stats), len(feature_cols)), dtype='float64')
+    for i, dev in enumerate(devices_stats):
+        w = dev.get('weather') or {}
+        if w:
+            for k, dflt in (('temperature', 22.0), ('humidity', 60.0),
+                            ('precipitation', 0.0), ('wind_speed', 2.0)):
+                if k in pos:
+                    static[i, pos[k]] = w.get(k, dflt) or dflt
+        for col in (f'region_code_{dev.get("region_code") or "NONE"}', f'sido_{dev.get("sido") or "NONE"}'):
+            if col in pos:
+                static[i, pos[col]] = 1
+    return static, pos
+
+
+def _v2_tail(hists):
+    """history 카운트 리스트들 → (tail (N, 7), n (N,)). tail 은 오른쪽 정렬, 모자란 앞칸은 첫 값으로 채움
+    — _build_v2_row 의 lag(k) (n < k 이면 counts[0]) 규칙을 열 인덱스 하나로 만족시킨다."""
+    tail = np.zeros((len(hists), _TAIL), dtype='float64')
+    n = np.zeros(len(hists), dtype='int64')
+    for i, c in enumerate(hists):
+        if not c:
+            continue
+        last = c[-_TAIL:]
+        tail[i, :_TAIL - len(last)] = c[0]
+        tail[i, _TAIL - len(last):] = last
+        n[i] = len(c)
+    return tail, n
+
+
+def _v2_step_matrix(static, pos, tail, n, td):
+    """target_date td 하루치 v2 피처 행렬 — _build_v2_row 를 장비 전체에 한 번에."""
+    X = static.copy()
+
+    def put(col, v):
+        if col in pos:
+            X[:, pos[col]] = v
+
+    for k in (1, 2, 3, 7):
+        put(f'lag{k}', tail[:, -k])
+    for w in (3, 7):
+        valid = np.arange(w, 0, -1)[None, :] <= n[:, None]   # 끝에서 p번째 칸은 p <= n 일 때만
+        put(f'ma{w}', (tail[:, -w:] * valid).sum(axis=1) / np.maximum(np.minimum(w, n), 1))
+    wd = td.weekday()
+    put('weekday', wd)
+    put('is_weekend', 1 if wd >= 5 else 0)
+    put('month', td.month)
+    put('day', td.day)
+    return X
+
+
+def _v2_push(tail, n, y):
+    """예측값 y (N,) 를 다음 날 lag 로 — 왼쪽으로 한 칸 밀고 끝에 붙인다. 빈 history 는 첫 값 = y."""
+    tail[:, :-1] = tail[:, 1:]
+    tail[:, -1] = y
+    empty = n == 0
+    if empty.any():
+        tail[empty, :] = y[empty, None]
+    n += 1
+
+
+def _v1_station_code(nm):
+    station_map = {'가경천변': 0, '송절방죽': 1, '오송호수공원': 2}
+    for key, code in station_map.items():
+        if key in nm:
+            return code
+    return 0
+
+
+def _forecast_batch(devices_stats, future_dates, weather_by_region=None):
+    """장비 전체 recursive 예측. 하루(step)마다 트리별 예측 1회 (+ idx_model 1회) —
+    트리 평균이 점 예측(model.predict 와 같음), 트리 분위수가 예측 구간.
+    구간은 점 예측을 lag 로 이어 간 입력 기준 (2일 후부터 앞날 불확실성은 안 쌓인다).
+    반환: (yhat_int (N, D) int 배열, idx (N, D) float 배열 — 모기지수 모델 없으면 NaN,
+           bands (N, D, 3) float 배열 — P10/P50/P90, 트리 앙상블이 아니면 NaN)."""
     model, feature_cols, ver, idx_model, meta = _load()
-    days_ahead = max(1, min(int(days_ahead or 3), 14))
-    # 모기지수 메타
-    p95 = (meta or {}).get('p95', 300.0)
+    N, D = len(devices_stats), len(future_dates)
+    yhat = np.zeros((N, D), dtype='int64')
+    idx = np.full((N, D), np.nan)
+    bands = np.full((N, D, len(QUANTILES)), np.nan)
+    if N == 0:
+        return yhat, idx, bands
+
+    if ver == 'v2':
+        static, pos = _v2_static(devices_stats, feature_cols)
+        tail, n = _v2_tail([[h['count'] for h in (dev.get('history') or [])] for dev in devices_stats])
+    else:
+        stations = [_v1_station_code(dev.get('name', '') or '') for dev in devices_stats]
+    for j, td in enumerate(future_dates):
+        if ver == 'v2':
+            X = pd.DataFrame(_v2_step_matrix(static, pos, tail, n, td), columns=feature_cols)
+        else:
+            # v1 피처는 history 와 무관 (기상·날짜·측정소) — 행 dict 그대로 한 번에
+            rows = [_build_v1_row([], td, (weather_by_region or {}).get(dev.get('region', '')), st)
+                    for dev, st in zip(devices_stats, stations)]
+            X = pd.DataFrame(rows).reindex(columns=feature_cols, fill_value=0).astype('float64')
+        trees = tree_engine.per_tree(model, X)
+        if trees is not None:
+            y_raw = trees.mean(axis=1)
+            bands[:, j, :] = np.maximum(np.percentile(trees, QUANTILES, axis=1).T, 0)
+        else:
+            y_raw = model.predict(X)
+        y = np.rint(np.maximum(y_raw, 0)).astype('int64')
+        yhat[:, j] = y
+        if idx_model is not None:
+            try:
+                idx[:, j] = np.clip(idx_model.predict(X), 0.0, 100.0)
+            except Exception:
+                pass
+        if ver == 'v2':
+            _v2_push(tail, n, y.astype('float64'))
+    return yhat, idx, bands
+
+
+def _grade_idx(v):
+    """모기지수 4단계 등급."""
+    if v is None: return None
+    if v < 25: return '쾌적'
+    if v < 50: return '관심'
+    if v < 75: return '주의'
+    return '불쾌'
+
 
+def _today():
     # 영업일 기준 오늘 (새벽 5시가 일 경계)
     try:
         from moscom.timeutil import business_today
-        today = business_today()
+        return business_today()
     except Exception:
-        today = datetime.now(timezone(timedelta(hours=9))).date()
+        return datetime.now(timezone(timedelta(hours=9))).date()
+
+
+def forecast_raw(devices_stats, weather_by_region=None, days_ahead=3, today=None):
+    """장비별 일자 예측만 (등급·근거 없이). 반환: devices_stats 순서대로
+       [[{date, predicted, predicted_index, grade, p10, p50, p90}, ...], ...]
+    p10/p50/p90: 트리 분위수 예측 구간(마리). 트리 앙상블 모델이 아니면 None.
+    recursive 라 앞쪽 k일은 days_ahead 와 무관하게 같다 — prediction_store 가 길게 저장해 두고 잘라 쓴다.
+    """
+    model, feature_cols, ver, idx_model, meta = _load()
+    days_ahead = max(1, min(int(days_ahead or 3), 14))
+    # 모기지수 메타
+    p95 = (meta or {}).get('p95', 300.0)
+    today = today or _today()
     future_dates = [today + timedelta(days=i) for i in range(0, days_ahead)]
 
-    results = []
-    for dev in devices_stats:
-        nm = dev.get('name', '') or ''
-        uid = dev.get('uuid', '')
-        # 히스토리 복사 — recursive 로 예측값을 뒤에 붙여가며 다음 날 lag 로 사용
-        hist = [{'date': h['date'], 'count': h['count']} for h in (dev.get('history') or [])]
+    yhat_all, idx_all, bands_all = _forecast_batch(devices_stats, future_dates, weather_by_region)
 
+    out = []
+    for i, dev in enumerate(devices_stats):
+        nm = dev.get('name', '') or ''
+        # 최근 7일 (예측값이 뒤에 붙어가며) — 모기지수 fallback 입력
+        recent = [h['count'] for h in (dev.get('history') or [])][-7:]
         preds = []
-        for td in future_dates:
-            if ver == 'v2':
-                row = _build_v2_row(
-                    history=hist, target_date=td,
-                    region_code=dev.get('region_code') or '',
-                    sido=dev.get('sido') or '',
-                    weather=dev.get('weather') or {},
-                )
-            else:
-                station_code = 0
-                station_map = {'가경천변': 0, '송절방죽': 1, '오송호수공원': 2}
-                for key, code in station_map.items():
-                    if key in nm:
-                        station_code = code
-                        break
-                weather = (weather_by_region or {}).get(dev.get('region', ''))
-                row = _build_v1_row(hist, td, weather, station_code)
-
-            # DataFrame 1행 → feature_cols 맞춰 fill
-            X = pd.DataFrame([row])
-            for col in feature_cols:
-                if col not in X.columns:
-                    X[col] = 0
-            X = X[feature_cols].astype('float64')
-            yhat = float(np.maximum(model.predict(X)[0], 0))
-            yhat_int = int(round(yhat))
-
-            # 모기지수 예측: 학습된 모델이 있으면 그걸로, 없으면 마릿수에서 직접 산출
-            idx_val = None
-            if idx_model is not None:
-                try:
-                    idx_val = float(max(0.0, min(100.0, idx_model.predict(X)[0])))
-                except Exception:
-                    idx_val = None
+        for j, td in enumerate(future_dates):
+            yhat_int = int(yhat_all[i, j])
+            idx_val = None if np.isnan(idx_all[i, j]) else float(idx_all[i, j])
             if idx_val is None:
                 # fallback — predict 결과 마릿수 + 최근 7일 history + dev weather 로 직접 계산
                 try:
                     from moscom.mosquito_index import compute_index as _ci
-                    recent7 = [h['count'] for h in hist[-7:]]
                     w = dev.get('weather') or {}
                     mi = _ci(
-                        count=yhat_int, last7_counts=recent7,
+                        count=yhat_int, last7_counts=recent[-7:],
                         temperature=w.get('temperature'), humidity=w.get('humidity'),
                         p95=p95, name=nm, addr=dev.get('region', ''), detail='',
                     )
                     idx_val = mi['index']
                 except Exception:
                     idx_val = None
-
-            # 4단계 등급 (모기지수 기준)
-            def _grade_idx(v):
-                if v is None: return None
-                if v < 25: return '쾌적'
-                if v < 50: return '관심'
-                if v < 75: return '주의'
-                return '불쾌'
-
-            preds.append({
+            pred = {
                 'date': td.isoformat(),
                 'predicted': yhat_int,
                 'predicted_index': round(idx_val, 1) if idx_val is not None else None,
                 'grade': _grade_idx(idx_val),
-            })
-            # 다음 lag 를 위해 hist 에 예측값 push
-            hist.append({'date': td.isoformat(), 'count': yhat_int})
+            }
+            for q, v in zip(QUANTILES, bands_all[i, j]):
+                pred[f'p{q}'] = None if np.isnan(v) else int(round(float(v)))
+            preds.append(pred)
+            recent.append(yhat_int)
+        out.append(preds)
+    return out
 
-        results.append({
-            'uuid': uid,
-            'name': nm,
-            'region': dev.get('region', ''),
-            'predictions': preds,
-            'history': dev.get('history') or [],  # 원본 history (예측값 안 들어간 거)
-        })
+
+def predict_for_devices(devices_stats, weather_by_region=None, days_ahead=3):
+    """장비별 예측 (recursive). devices_stats:
+       [{uuid, name, region, history:[{date,count}], region_code?, sido?, weather?}]
+    모델 호출은 _forecast_batch 가 날짜마다 장비 전체를 한 번에 한다.
+    """
+    raw = forecast_raw(devices_stats, weather_by_region=weather_by_region, days_ahead=days_ahead)
+    return summarize_predictions(devices_stats, raw)
+
+
+def summarize_predictions(devices_stats, raw):
+    """forecast_raw 결과 + 입력 → predict_for_devices 응답 (최대/평균, 등급, 추론 근거, 신뢰도)."""
+    ver = _load()[2]
 
     # 등급 + 근거
     def grade(n):
@@ -228,7 +300,16 @@ def predict_for_devices(devices_stats, weather_by_region=None, days_ahead=3):
         if n <= 200: return '경고'
         return '위험'
 
-    for r in results:
+    results = []
+    for dev, preds in zip(devices_stats, raw):
+        r = {
+            'uuid': dev.get('uuid', ''),
+            'name': dev.get('name', '') or '',
+            'region': dev.get('region', ''),
+            'predictions': preds,
+            'history': dev.get('history') or [],  # 원본 history (예측값 안 들어간 거)
+        }
+        results.append(r)
         ps = [p['predicted'] for p in r['predictions']]
         r['max_predicted'] = max(ps) if ps else 0
         r['avg_predicted'] = round(sum(ps) / len(ps)) if ps else 0
@@ -293,34 +374,96 @@ def predict_for_devices(devices_stats, weather_by_region=None, days_ahead=3):
     return results
 
 
+def backcast_batch(histories, date_range, min_history=3):
+    """과거 예측(backcast) 일괄 — 장비 여러 대 × 날짜 여러 개를 방역 미적용으로 예측했다면 얼마였을지.
+    histories: [{uuid, history:[{date, count}], region_code?, sido?, weather?}] (predict_for_devices 입력과 같은 모양)
+    date_range: 대상일 목록 (date 또는 'YYYY-MM-DD').
+    각 (장비, 대상일) 은 그 장비 history 중 대상일 이전 기록만 lag 로 쓴다 (누출 방지, backcast_for_date 와 같은 규칙).
+    lag 행렬을 장비·날짜 전체에 한 번에 만들고 모델 호출도 1회 (트리 앙상블이면 트리별 1회 → P10/P50/P90).
+
+    반환: (장비 순서, 날짜 순서) 로 정렬된 structured array — 대상일 이전 기록이 min_history 개 이상인 쌍만.
+      uuid(object), date('U10'), predicted(int64), yhat(float64, 반올림 전), p10/p50/p90(float64, 없으면 NaN),
+      n_history(int64, 사용한 이전 기록 수)
+    v2 모델이 아니면 빈 배열."""
+    out_dtype = [('uuid', object), ('date', 'U10'), ('predicted', 'int64'), ('yhat', 'float64')] + \
+                [(f'p{q}', 'float64') for q in QUANTILES] + [('n_history', 'int64')]
+    model, feature_cols, ver, idx_model, meta = _load()
+    days = np.array(sorted({str(d)[:10] for d in date_range}), dtype='datetime64[D]')
+    if model is None or ver != 'v2' or not len(histories) or not len(days):
+        return np.zeros(0, dtype=out_dtype)
+
+    # 장비별 history 를 날짜순으로 이어 붙인 평평한 배열 + 장비 오프셋
+    hist_days, hist_counts, lens = [], [], []
+    for dev in histories:
+        hs = sorted(dev.get('history') or [], key=lambda h: h['date'])
+        hist_days.append(np.array([h['date'][:10] for h in hs], dtype='datetime64[D]'))
+        hist_counts.append(np.array([h['count'] or 0 for h in hs], dtype='float64'))
+        lens.append(len(hs))
+    N, D = len(histories), len(days)
+    off = np.concatenate([[0], np.cumsum(lens)[:-1]]).astype('int64')
+    C = np.concatenate(hist_counts) if sum(lens) else np.zeros(0)
+    CS = np.concatenate([[0.0], np.cumsum(C)])
+    # (장비, 날짜) 키로 한 번에 searchsorted → 대상일 이전 기록 수 n (N, D)
+    span = int(max([days.max().astype('int64')] + [d.max().astype('int64') for d in hist_days if len(d)])) + 2
+    keys = np.concatenate([i * span + d.astype('int64') for i, d in enumerate(hist_days)]) if sum(lens) \
+        else np.zeros(0, dtype='int64')
+    want = np.arange(N)[:, None] * span + days.astype('int64')[None, :]
+    n = np.searchsorted(keys, want, side='left') - off[:, None]
+
+    dev_i, day_j = np.nonzero(n >= max(1, min_history))
+    if not len(dev_i):
+        return np.zeros(0, dtype=out_dtype)
+    n_sel, o_sel = n[dev_i, day_j], off[dev_i]
+
+    static, pos = _v2_static(histories, feature_cols)
+    X = static[dev_i]
+
+    def put(col, v):
+        if col in pos:
+            X[:, pos[col]] = v
+
+    # _build_v2_row 규칙: lag(k) = 끝에서 k번째 (모자라면 첫 값), ma(w) = 마지막 min(w, n)개 평균
+    for k in (1, 2, 3, 7):
+        put(f'lag{k}', C[np.where(n_sel >= k, o_sel + n_sel - k, o_sel)])
+    for w in (3, 7):
+        m = np.minimum(w, n_sel)
+        put(f'ma{w}', (CS[o_sel + n_sel] - CS[o_sel + n_sel - m]) / m)
+    py_days = days.astype(object)
+    put('weekday', np.array([d.weekday() for d in py_days])[day_j])
+    put('is_weekend', np.array([1 if d.weekday() >= 5 else 0 for d in py_days])[day_j])
+    put('month', np.array([d.month for d in py_days])[day_j])
+    put('day', np.array([d.day for d in py_days])[day_j])
+
+    Xdf = pd.DataFrame(X, columns=feature_cols)
+    trees = tree_engine.per_tree(model, Xdf)
+    out = np.zeros(len(dev_i), dtype=out_dtype)
+    if trees is not None:
+        yhat = trees.mean(axis=1)
+        for q, v in zip(QUANTILES, np.percentile(trees, QUANTILES, axis=1)):
+            out[f'p{q}'] = np.maximum(v, 0)
+    else:
+        yhat = model.predict(Xdf)
+        for q in QUANTILES:
+            out[f'p{q}'] = np.nan
+    yhat = np.maximum(yhat, 0)
+    out['uuid'] = np.array([dev.get('uuid', '') for dev in histories], dtype=object)[dev_i]
+    out['date'] = days.astype('U10')[day_j]
+    out['yhat'] = yhat
+    out['predicted'] = np.rint(yhat).astype('int64')
+    out['n_history'] = n_sel
+    return out
+
+
 def backcast_for_date(history, target_date, region_code='', sido='', weather=None):
     """과거 예측(backcast) — target_date 를 방역 미적용으로 예측했다면 얼마였을지.
-    history: 전체 [{date, count}] (오름차순 가정). target_date 이전 데이터만 lag 로 사용.
+    history: 전체 [{date, count}]. target_date 이전 데이터만 lag 로 사용.
     반환: 예측 마릿수(int) 또는 None(모델/데이터 부족).
-    방역 효과 검증에서 '예상' 값으로 사용."""
+    방역 효과 검증에서 '예상' 값으로 사용. 여러 장비·날짜는 backcast_batch 로 한 번에."""
     try:
-        model, feature_cols, ver, idx_model, meta = _load()
-        if model is None or ver != 'v2':
-            return None  # v2 모델일 때만 지원(피처 일관성)
-        if isinstance(target_date, str):
-            td = datetime.strptime(target_date[:10], '%Y-%m-%d').date()
-        else:
-            td = target_date
-        # target_date 직전까지의 history 만 사용 (누출 방지)
-        prior = [h for h in (history or []) if (h.get('date') or '')[:10] < td.isoformat()]
-        prior.sort(key=lambda h: h['date'])
-        if len(prior) < 3:
-            return None  # lag 계산에 필요한 최소 데이터 부족
-        row = _build_v2_row(history=prior, target_date=td,
-                            region_code=region_code or '', sido=sido or '',
-                            weather=weather or {})
-        X = pd.DataFrame([row])
-        for col in feature_cols:
-            if col not in X.columns:
-                X[col] = 0
-        X = X[feature_cols].astype('float64')
-        yhat = float(np.maximum(model.predict(X)[0], 0))
-        return int(round(yhat))
+        td = target_date if isinstance(target_date, str) else target_date.isoformat()
+        out = backcast_batch([{'history': history or [], 'region_code': region_code or '',
+                               'sido': sido or '', 'weather': weather or {}}], [td[:10]])
+        return int(out['predicted'][0]) if len(out) else None
     except Exception:
         logger.exception('backcast_for_date failed')
         return None
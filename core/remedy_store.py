@@ -25,6 +25,8 @@ from datetime import datetime, date, timedelta
 
 STORE_PATH = os.path.join(os.path.dirname(__file__), 'remedy_plans.json')
 _LOCK = threading.RLock()
+# 장비별 계획 인덱스 — 파일 (mtime_ns, size) 가 같으면 재사용. _save 가 os.replace 로 바꾸면 다른 프로세스도 다음 호출에 갱신.
+_INDEX = {'sig': None, 'by_device': {}}
 
 
 # 방역 방법 (사용자 지시 + 문헌 기반)
@@ -120,6 +122,31 @@ def _save(data):
         os.replace(tmp, STORE_PATH)
 
 
+def _signature():
+    try:
+        st = os.stat(STORE_PATH)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def version():
+    """계획 파일 버전 문자열 — 계획이 바뀌면 달라진다 (없으면 '0')."""
+    sig = _signature()
+    return f'{sig[0]}-{sig[1]}' if sig else '0'
+
+
+def _plans_by_device():
+    sig = _signature()
+    with _LOCK:
+        if sig is None or sig != _INDEX['sig']:
+            by_device = {}
+            for p in _load():
+                by_device.setdefault(p.get('device_uuid'), []).append(p)
+            _INDEX['sig'], _INDEX['by_device'] = sig, by_device
+        return _INDEX['by_device']
+
+
 def list_plans(visible_uuids=None):
     """visible_uuids=None: 전체. 집합이면 해당 장비 계획만 반환."""
     plans = _load()
@@ -242,9 +269,7 @@ def adjustment_factor(device_uuid, target_date):
 
     factor = 1.0
     applied = []
-    for p in _load():
-        if p.get('device_uuid') != device_uuid:
-            continue
+    for p in _plans_by_device().get(device_uuid, ()):
         sched = _parse_date(p.get('scheduled_date'))
         if not sched:
             continue
@@ -1,3 +1,127 @@
-from django.test import TestCase
+"""core.predictor — backcast_batch 가 예전 행 단위 경로(_build_v2_row)와 같은 피처·예측을 내는지.
+core.tree_engine.per_tree — 스레드로 나눠 돌아도 트리별 예측·평균이 model.predict 와 같은지."""
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from core import predictor, tree_engine
+
+FEATURE_COLS = [
+    'lag1', 'lag2', 'lag3', 'lag7', 'ma3', 'ma7', 'weekday', 'is_weekend', 'month', 'day',
+    'temperature', 'humidity', 'precipitation', 'wind_speed',
+    'region_code_R1', 'region_code_NONE', 'sido_서울', 'sido_NONE',
+]
+
+
+def _history(first, counts, skip=()):
+    """first 부터 하루씩 (skip 에 든 날은 빼고) [{date, count}]."""
+    out = []
+    for i, c in enumerate(counts):
+        if i not in skip:
+            out.append({'date': (first + timedelta(days=i)).isoformat(), 'count': c})
+    return out
+
+
+HISTORIES = [
+    {'uuid': 'a', 'history': _history(date(2026, 6, 1), [3, 7, 2, 9, 14, 5, 8, 11, 6, 4, 12], skip=(3, 7)),
+     'region_code': 'R1', 'sido': '서울', 'weather': {'temperature': 27.5, 'humidity': 81}},
+    # 입력이 날짜순이 아니어도 정렬해서 쓴다
+    {'uuid': 'b', 'history': list(reversed(_history(date(2026, 6, 4), [20, 18, 25, 30, 22]))),
+     'region_code': '', 'sido': '', 'weather': {}},
+    # 이전 기록이 min_history 보다 적은 장비 — 결과에 안 나온다
+    {'uuid': 'c', 'history': _history(date(2026, 6, 9), [1, 2]), 'region_code': 'R1', 'sido': '', 'weather': {}},
+]
+DATES = ['2026-06-02', '2026-06-05', '2026-06-08', '2026-06-10', '2026-06-12', '2026-06-20']
+
+
+def _expected(histories, dates, min_history=3):
+    """예전 경로 — (장비, 대상일) 마다 대상일 이전 기록으로 _build_v2_row."""
+    keys, rows = [], []
+    for dev in histories:
+        hs = sorted(dev['history'], key=lambda h: h['date'])
+        for d in sorted(set(dates)):
+            prior = [h for h in hs if h['date'] < d]
+            if len(prior) < min_history:
+                continue
+            keys.append((dev['uuid'], d, len(prior)))
+            row = predictor._build_v2_row(prior, date.fromisoformat(d), dev['region_code'],
+                                          dev['sido'], dev['weather'])
+            # 예전 backcast_for_date 와 같이 1행씩 — 없는 컬럼은 0
+            rows.append([float(row.get(c, 0)) for c in FEATURE_COLS])
+    return keys, pd.DataFrame(rows, columns=FEATURE_COLS, dtype='float64')
+
+
+class _Linear:
+    """트리 앙상블이 아닌 모델 — 받은 입력을 남겨 두고 선형 결합을 돌려준다."""
+
+    def __init__(self):
+        self.w = np.linspace(-0.5, 1.5, len(FEATURE_COLS))
+        self.X = None
+
+    def predict(self, X):
+        self.X = np.asarray(X, dtype='float64')
+        return self.X @ self.w
+
+
+def _backcast(model, histories=HISTORIES, dates=DATES):
+    with mock.patch.object(predictor, '_load', return_value=(model, FEATURE_COLS, 'v2', None, {})):
+        return predictor.backcast_batch(histories, dates)
+
+
+class BackcastBatchTests(SimpleTestCase):
+    def test_features_match_build_v2_row(self):
+        model = _Linear()
+        out = _backcast(model)
+        keys, X = _expected(HISTORIES, DATES)
+        self.assertEqual([(u, d, n) for u, d, n in zip(out['uuid'], out['date'], out['n_history'])], keys)
+        np.testing.assert_allclose(model.X, X.to_numpy(), rtol=0, atol=1e-12)
+        yhat = np.maximum(X.to_numpy() @ model.w, 0)
+        np.testing.assert_allclose(out['yhat'], yhat, atol=1e-9)
+        self.assertEqual(out['predicted'].tolist(), np.rint(yhat).astype('int64').tolist())
+        self.assertTrue(np.isnan(out['p50']).all())
+
+    def test_forest_matches_model_predict(self):
+        from sklearn.ensemble import RandomForestRegressor
+
+        rng = np.random.default_rng(0)
+        X_fit = rng.uniform(0, 30, size=(400, len(FEATURE_COLS)))
+        model = RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0)
+        model.fit(X_fit, X_fit[:, 0] * 0.8 + X_fit[:, 4] * 0.3 + rng.normal(0, 1, 400))
+        out = _backcast(model)
+        _, X = _expected(HISTORIES, DATES)
+        yhat = np.maximum(model.predict(X.to_numpy()), 0)
+        np.testing.assert_allclose(out['yhat'], yhat, rtol=1e-9, atol=1e-9)
+        self.assertTrue((out['p10'] <= out['p50']).all() and (out['p50'] <= out['p90']).all())
+
+    def test_backcast_for_date_is_single_pair(self):
+        model = _Linear()
+        dev = HISTORIES[0]
+        with mock.patch.object(predictor, '_load', return_value=(model, FEATURE_COLS, 'v2', None, {})):
+            got = predictor.backcast_for_date(dev['history'], '2026-06-10', dev['region_code'],
+                                              dev['sido'], dev['weather'])
+        _, X = _expected([dict(dev, uuid='')], ['2026-06-10'])
+        self.assertEqual(got, int(np.rint(max(X.to_numpy()[0] @ model.w, 0))))
+
+    def test_not_v2_or_empty(self):
+        with mock.patch.object(predictor, '_load', return_value=(_Linear(), FEATURE_COLS, 'v1', None, {})):
+            self.assertEqual(len(predictor.backcast_batch(HISTORIES, DATES)), 0)
+        self.assertEqual(len(_backcast(_Linear(), dates=['2026-05-01'])), 0)
+
+
+class PerTreeTests(SimpleTestCase):
+    def test_parallel_matches_serial_and_predict(self):
+        from sklearn.ensemble import RandomForestRegressor
+
+        rng = np.random.default_rng(1)
+        X = rng.uniform(0, 10, size=(600, 5))
+        model = RandomForestRegressor(n_estimators=13, max_depth=5, n_jobs=3, random_state=0)
+        model.fit(X, X[:, 0] + rng.normal(0, 1, 600))
+        par = tree_engine.per_tree(model, X)
+        with mock.patch.object(tree_engine, 'PARALLEL_ROWS', 10 ** 9):
+            ser = tree_engine.per_tree(model, X)
+        self.assertEqual(par.shape, (600, 13))
+        np.testing.assert_array_equal(par, ser)
+        np.testing.assert_allclose(par.mean(axis=1), model.predict(X), rtol=1e-12, atol=1e-12)
@@ -0,0 +1,395 @@
+"""트리 앙상블 컴파일 추론 엔진 — 학습된 sklearn 회귀 트리를 평평한 NumPy 배열로 한 번 바꿔 두고 쓴다.
+
+AI 예측(core.predictor) · version_3 배치(predict_v3 best_h1..h3) · TDM ML(tdm.predictor) 은
+joblib 으로 sklearn 앙상블을 통째로 unpickle 하고, 매 호출마다 sklearn 입력 검증 + 트리별 predict 를 거친다.
+대부분 1행~수천 행 입력이라 그 고정 비용이 실제 계산보다 크다.
+
+- compile_estimator(est): DecisionTree/ExtraTree/RandomForest/ExtraTrees 회귀 (Pipeline 이면 마지막 단계) →
+  CompiledForest. 모든 트리의 노드를 이어 붙인 배열 feature · threshold · left · right · value + 트리별 root.
+  잎 노드는 자기 자신을 가리키게(threshold=+inf) 해 두면 max_depth 번 같은 연산으로 (행 × 트리) 를 한꺼번에 내려간다.
+- 비교는 sklearn 과 같이 입력을 float32 로 바꾼 값 <= float64 threshold. 트리 평균도 같은 순서라 결과는 부동소수 오차 안에서 같다.
+  NaN 은 sklearn 처럼 노드별 missing_go_to_left 를 따른다. NaN 입력을 안 받는 모델(sklearn 이 ValueError)이면 똑같이 ValueError.
+- 디스크: <원본>.forest/ 에 .npy + meta.json (+ Pipeline 앞단 pre.joblib, dict 번들의 나머지 extras.joblib).
+  np.load(mmap_mode='r') 로 열어 cold 로드가 unpickle 대신 페이지 매핑, fork 된 worker 끼리도 페이지 캐시를 공유.
+- load(path): MOSCOM_TREE_ENGINE=compiled 이고 원본과 같은(mtime·크기) 컴파일본이 있으면 그걸, 없으면 원본을 읽어
+  컴파일·저장 후 반환. 지원 안 하는 모델이거나 검증(probe 행에서 sklearn 과 비교)이 어긋나면 원본 sklearn 객체 그대로.
+  기본값(sklearn)이면 joblib.load 와 똑같다.
+"""
+import json
+import logging
+import os
+import shutil
+import warnings
+
+logger = logging.getLogger(__name__)
+
+# 'compiled' 면 컴파일 엔진 사용, 그 외('sklearn')는 joblib.load 그대로
+ENGINE = os.environ.get('MOSCOM_TREE_ENGINE', 'sklearn').strip().lower()
+# 한 번에 내려갈 (행 × 트리) 수 — 인덱스 배열 메모리 상한
+CHUNK_CELLS = int(os.environ.get('MOSCOM_TREE_CHUNK_CELLS', '2000000'))
+# per_tree (sklearn 경로) — 이 행 수 이상이면 트리 묶음을 모델 n_jobs 만큼 스레드로 나눠 predict (sklearn predict 처럼)
+PARALLEL_ROWS = int(os.environ.get('MOSCOM_TREE_PARALLEL_ROWS', '200'))
+# 컴파일 직후 sklearn 과 비교할 probe 행 수 / 허용 오차
+PROBE_ROWS = 256
+RTOL = 1e-9
+ATOL = 1e-6
+
+FORMAT = 2
+SUFFIX = '.forest'
+_ARRAYS = ('feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots')
+_SUPPORTED = ('DecisionTreeRegressor', 'ExtraTreeRegressor', 'RandomForestRegressor', 'ExtraTreesRegressor')
+
+
+def enabled():
+    return ENGINE == 'compiled'
+
+
+class CompiledForest:
+    """평평한 노드 배열로 된 회귀 트리 앙상블. predict(X) 는 sklearn 과 같은 모양 — (n,) 또는 (n, n_outputs)."""
+
+    def __init__(self, arrays, meta, pre=None):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.missing_left = arrays['missing_left']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.max_depth = int(meta['max_depth'])
+        self.n_outputs = int(meta['n_outputs'])
+        self.n_features_in_ = int(meta['n_features'])
+        self.feature_names = meta.get('feature_names') or None
+        self.source = meta.get('source') or ''
+        self.allow_nan = bool(meta.get('allow_nan', True))
+        self.pre = pre
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _matrix(self, X):
+        import numpy as np
+
+        if self.pre is not None:
+            X = self.pre.transform(X)
+        elif self.feature_names and hasattr(X, 'columns'):
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f'X has {X.shape[1]} features, model expects {self.n_features_in_}')
+        if not self.allow_nan and np.isnan(X).any():
+            raise ValueError('Input X contains NaN.')
+        return X
+
+    def _leaves(self, X):
+        """float32 행렬 X → 잎 노드 인덱스 (n, 트리 수)."""
+        import numpy as np
+
+        n = X.shape[0]
+        rows = np.arange(n)[:, None]
+        idx = np.repeat(self.roots[None, :], n, axis=0)
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[idx]]
+            # NaN <= threshold 는 False — 결측은 노드별 missing_go_to_left 로 (sklearn 과 같게)
+            go_left = (x <= self.threshold[idx]) | (np.isnan(x) & self.missing_left[idx])
+            idx = np.where(go_left, self.left[idx], self.right[idx])
+        return idx
+
+    def _chunks(self, X):
+        step = max(1, CHUNK_CELLS // max(1, self.n_trees))
+        for s in range(0, X.shape[0], step):
+            yield s, self._leaves(X[s:s + step])
+
+    def predict(self, X):
+        import numpy as np
+
+        X = self._matrix(X)
+        out = np.empty((X.shape[0], self.n_outputs), dtype=np.float64)
+        for s, leaves in self._chunks(X):
+            out[s:s + len(leaves)] = self.value[leaves].mean(axis=1)
+        return out[:, 0] if self.n_outputs == 1 else out
+
+    def predict_trees(self, X):
+        """트리별 예측 (n, 트리 수[, n_outputs]) — 트리 축 평균이 predict(X)."""
+        import numpy as np
+
+        X = self._matrix(X)
+        out = np.empty((X.shape[0], self.n_trees, self.n_outputs), dtype=np.float64)
+        for s, leaves in self._chunks(X):
+            out[s:s + len(leaves)] = self.value[leaves]
+        return out[:, :, 0] if self.n_outputs == 1 else out
+
+
+# ─ 컴파일 ─────────────────────────────────────
+
+def _split(est):
+    """(앞단 변환, 트리 앙상블). Pipeline 이면 마지막 단계를 떼어 낸다. 지원 안 하면 (None, None)."""
+    pre = None
+    if type(est).__name__ == 'Pipeline':
+        from sklearn.pipeline import Pipeline
+        steps = est.steps
+        pre = Pipeline(steps[:-1]) if len(steps) > 1 else None
+        est = steps[-1][1]
+    if type(est).__name__ not in _SUPPORTED:
+        return None, None
+    return pre, est
+
+
+def _flatten(forest):
+    import numpy as np
+
+    trees = getattr(forest, 'estimators_', None) or [forest]
+    n_outputs = int(getattr(forest, 'n_outputs_', 1))
+    parts = {k: [] for k in ('feature', 'threshold', 'left', 'right', 'missing_left', 'value')}
+    roots = []
+    offset = 0
+    max_depth = 0
+    for t in trees:
+        tr = t.tree_
+        nc = tr.node_count
+        ids = np.arange(nc, dtype=np.int64)
+        leaf = tr.children_left == -1
+        parts['feature'].append(np.where(leaf, 0, tr.feature).astype(np.int32))
+        parts['threshold'].append(np.where(leaf, np.inf, tr.threshold).astype(np.float64))
+        parts['left'].append((np.where(leaf, ids, tr.children_left) + offset).astype(np.int64))
+        parts['right'].append((np.where(leaf, ids, tr.children_right) + offset).astype(np.int64))
+        mgl = getattr(tr, 'missing_go_to_left', None)
+        parts['missing_left'].append(np.zeros(nc, dtype=bool) if mgl is None
+                                     else np.where(leaf, False, np.asarray(mgl).astype(bool)))
+        parts['value'].append(tr.value[:, :n_outputs, 0].astype(np.float64))
+        roots.append(offset)
+        offset += nc
+        max_depth = max(max_depth, int(tr.max_depth))
+    arrays = {k: np.ascontiguousarray(np.concatenate(v)) for k, v in parts.items()}
+    arrays['roots'] = np.asarray(roots, dtype=np.int64)
+    names = getattr(forest, 'feature_names_in_', None)
+    meta = {
+        'format': FORMAT,
+        'estimator': type(forest).__name__,
+        'n_trees': len(trees),
+        'n_outputs': n_outputs,
+        'n_features': int(forest.n_features_in_),
+        'max_depth': max_depth,
+        'feature_names': [str(c) for c in names] if names is not None else None,
+    }
+    return arrays, meta
+
+
+def _probe(compiled, seed=0, nan=False):
+    """분기 threshold 근처 값으로 만든 probe 행 (앞단 변환 뒤 공간). nan 이면 칸의 1/4 쯤을 NaN 으로."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    nf = compiled.n_features_in_
+    split = compiled.threshold != np.inf
+    X = rng.normal(0.0, 1.0, size=(PROBE_ROWS, nf))
+    for f in range(nf):
+        th = np.asarray(compiled.threshold[split & (compiled.feature == f)])
+        if th.size:
+            pick = rng.choice(th, size=PROBE_ROWS)
+            # 정확히 threshold / 바로 위아래 — 경계에서 같은 쪽으로 가는지 확인
+            jitter = rng.choice([0.0, -1.0, 1.0], size=PROBE_ROWS) * (np.abs(pick) * 1e-4 + 1e-4)
+            X[:, f] = pick + jitter
+    if nan:
+        X[rng.random(X.shape) < 0.25] = np.nan
+    return X.astype(np.float32)
+
+
+def _verify(forest, compiled):
+    """probe 행에서 sklearn 과 비교 → (일치 여부, NaN 입력 허용 여부).
+    NaN probe 를 sklearn 이 거부하면(ValueError) 컴파일본도 NaN 을 거부하게 allow_nan=False."""
+    import numpy as np
+
+    bare = CompiledForest(
+        {k: getattr(compiled, k) for k in _ARRAYS},
+        {'max_depth': compiled.max_depth, 'n_outputs': compiled.n_outputs, 'n_features': compiled.n_features_in_})
+
+    def same(X):
+        with warnings.catch_warnings():
+            # feature_names_in_ 로 학습된 모델에 ndarray 를 넣을 때의 경고
+            warnings.simplefilter('ignore')
+            want = np.asarray(forest.predict(X), dtype=np.float64)
+        got = bare.predict(X)
+        return bool(np.allclose(got.reshape(want.shape), want, rtol=RTOL, atol=ATOL))
+
+    if not same(_probe(compiled)):
+        return False, True
+    try:
+        return same(_probe(compiled, seed=1, nan=True)), True
+    except ValueError:
+        return True, False
+
+
+def compile_estimator(est, verify=True):
+    """학습된 추정기 → CompiledForest. 지원 안 하거나 검증이 어긋나면 None."""
+    pre, forest = _split(est)
+    if forest is None:
+        return None
+    arrays, meta = _flatten(forest)
+    if pre is not None:
+        # 앞단 변환 뒤에는 열 이름이 없으니 이름 맞추기는 Pipeline 에 맡긴다
+        meta['feature_names'] = None
+    compiled = CompiledForest(arrays, meta, pre=pre)
+    if verify:
+        ok, compiled.allow_nan = _verify(forest, compiled)
+        if not ok:
+            logger.warning('tree engine: compiled %s does not match sklearn; keeping sklearn', meta['estimator'])
+            return None
+    return compiled
+
+
+def per_tree(model, X):
+    """단일 출력 트리 앙상블의 트리별 예측 (n, 트리 수). 평균이 model.predict(X) 와 같다.
+    컴파일본이든 sklearn 객체든 같은 결과 — 구간 예측(분위수)용. 트리 앙상블이 아니면 None.
+    sklearn 객체는 PARALLEL_ROWS 행 이상이면 모델 n_jobs 만큼 스레드로 트리를 나눠 돈다 (model.predict 와 같은 병렬도)."""
+    import numpy as np
+
+    if isinstance(model, CompiledForest):
+        return model.predict_trees(X) if model.n_outputs == 1 else None
+    pre, forest = _split(model)
+    if forest is None or int(getattr(forest, 'n_outputs_', 1)) != 1:
+        return None
+    if pre is not None:
+        X = pre.transform(X)
+    else:
+        names = getattr(forest, 'feature_names_in_', None)
+        if names is not None and hasattr(X, 'columns'):
+            X = X[list(names)]
+    # RandomForest.predict 내부와 같은 입력 (float32, 검증 생략)
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    trees = getattr(forest, 'estimators_', None) or [forest]
+    out = np.empty((X.shape[0], len(trees)), dtype=np.float64)
+
+    def fill(lo, hi):
+        for k in range(lo, hi):
+            out[:, k] = trees[k].predict(X, check_input=False)
+
+    n_jobs = 1
+    if X.shape[0] >= PARALLEL_ROWS and len(trees) > 1:
+        from joblib import effective_n_jobs
+        n_jobs = min(effective_n_jobs(getattr(forest, 'n_jobs', None)), len(trees))
+    if n_jobs <= 1:
+        fill(0, len(trees))
+        return out
+    # 트리 predict 는 GIL 을 놓는다 — sklearn predict 와 같은 스레드 병렬 (모델 n_jobs)
+    from joblib import Parallel, delayed
+    bounds = np.linspace(0, len(trees), n_jobs + 1).astype(int)
+    Parallel(n_jobs=n_jobs, prefer='threads')(
+        delayed(fill)(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo)
+    return out
+
+
+# ─ 저장 / 로드 ────────────────────────────────
+
+def _dir(path):
+    return path + SUFFIX
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return {'source_mtime': st.st_mtime, 'source_size': st.st_size}
+
+
+def save(path, compiled, extras=None):
+    """<path>.forest/ 에 배열·메타 저장 (임시 디렉터리에 다 쓴 뒤 교체)."""
+    import joblib
+    import numpy as np
+
+    target = _dir(path)
+    tmp = f'{target}.tmp-{os.getpid()}'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for k in _ARRAYS:
+        np.save(os.path.join(tmp, f'{k}.npy'), np.ascontiguousarray(getattr(compiled, k)))
+    meta = {
+        'format': FORMAT,
+        'n_trees': compiled.n_trees,
+        'n_outputs': compiled.n_outputs,
+        'n_features': compiled.n_features_in_,
+        'max_depth': compiled.max_depth,
+        'feature_names': compiled.feature_names,
+        'allow_nan': compiled.allow_nan,
+        'bundle': extras is not None,
+        **_source_stamp(path),
+    }
+    if compiled.pre is not None:
+        joblib.dump(compiled.pre, os.path.join(tmp, 'pre.joblib'))
+    if extras is not None:
+        joblib.dump(extras, os.path.join(tmp, 'extras.joblib'))
+    with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return target
+
+
+def _open(path):
+    """최신 컴파일본 → CompiledForest 또는 dict 번들. 없거나 원본보다 오래됐으면 None."""
+    import joblib
+    import numpy as np
+
+    target = _dir(path)
+    meta_path = os.path.join(target, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    stamp = _source_stamp(path)
+    if meta.get('format') != FORMAT or any(meta.get(k) != v for k, v in stamp.items()):
+        return None
+    arrays = {k: np.load(os.path.join(target, f'{k}.npy'), mmap_mode='r') for k in _ARRAYS}
+    pre_path = os.path.join(target, 'pre.joblib')
+    pre = joblib.load(pre_path) if os.path.exists(pre_path) else None
+    meta['source'] = path
+    compiled = CompiledForest(arrays, meta, pre=pre)
+    if meta.get('bundle'):
+        bundle = dict(joblib.load(os.path.join(target, 'extras.joblib')))
+        bundle['model'] = compiled
+        return bundle
+    return compiled
+
+
+def compile_file(path, obj=None):
+    """joblib 파일(추정기 또는 {'model': 추정기, ...} dict)을 컴파일해 저장.
+    반환: 컴파일된 객체 (dict 번들이면 'model' 만 바꾼 dict). 지원 안 하면 None."""
+    import joblib
+
+    if obj is None:
+        obj = joblib.load(path)
+    is_bundle = isinstance(obj, dict) and 'model' in obj
+    compiled = compile_estimator(obj['model'] if is_bundle else obj)
+    if compiled is None:
+        return None
+    compiled.source = path
+    extras = {k: v for k, v in obj.items() if k != 'model'} if is_bundle else None
+    try:
+        save(path, compiled, extras)
+    except OSError as e:
+        # 읽기 전용 배포 등 — 이번 프로세스에서만 컴파일본 사용
+        logger.warning('tree engine: cannot write %s: %s', _dir(path), e)
+    if is_bundle:
+        return {**extras, 'model': compiled}
+    return compiled
+
+
+def load(path):
+    """joblib.load 대체. 컴파일 엔진이 켜져 있으면 컴파일본(필요하면 지금 컴파일), 아니면 원본."""
+    import joblib
+
+    if not enabled():
+        return joblib.load(path)
+    try:
+        got = _open(path)
+        if got is not None:
+            return got
+    except Exception as e:
+        logger.warning('tree engine: compiled %s unreadable (%s); recompiling', _dir(path), e)
+    obj = joblib.load(path)
+    try:
+        compiled = compile_file(path, obj)
+    except Exception as e:
+        logger.warning('tree engine: compile %s failed: %s', path, e)
+        compiled = None
+    return compiled if compiled is not None else obj
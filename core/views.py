@@ -12,6 +12,9 @@ from core import user_store
 from core import remedy_store
 from core import report_store
 from core import kakao_client
+from core import overview_snapshots
+from core import prediction_store
+from core.device_context import get_device_context
 import logging
 import json as _json
 
@@ -364,11 +367,165 @@ def moscom_users_api(request):
     return JsonResponse({'error': 'method not allowed'}, status=405)
 
 
-def _build_overview_data(su, date_str='', hour_str=''):
+OVERVIEW_LIVE_STEP = 300  # 종합현황 민원 점수용 48h raw 창 끝을 5분 단위로 내림 → 같은 창은 캐시 1개
+
+
+def _night_ratios(now_utc):
+    """장비별 최근 48시간 증가량 중 야간(19~24시 KST) 비율. 창 끝을 OVERVIEW_LIVE_STEP 로 내려 캐시 —
+    같은 창 안의 종합현황·스냅샷 읽기는 upstream raw 호출 없이 이 dict 하나만 읽는다."""
+    from datetime import datetime, timedelta
+    from collections import defaultdict
+    from django.core.cache import cache
+
+    ts = int(now_utc.timestamp()) // OVERVIEW_LIVE_STEP * OVERVIEW_LIVE_STEP
+    end = datetime.fromtimestamp(ts, now_utc.tzinfo)
+    end_iso = end.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    key = f'overview:night:{end_iso}'
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+    start_iso = (end - timedelta(days=2)).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    try:
+        raw = moscom_client.get_statistics_by_date(start_dt=start_iso, end_dt=end_iso, aggregation='raw', device_uuid='0')
+    except Exception:
+        return {}  # 실패는 캐시하지 않음 — 다음 읽기에서 다시
+    per_dev_hour = defaultdict(lambda: [None] * 24)
+    for r in raw or []:
+        u = r.get('device_uuid')
+        iso = r.get('created_date') or ''
+        try:
+            utc_h = int(iso[11:13])
+        except Exception:
+            continue
+        kst_h = (utc_h + 9) % 24
+        cnt = r.get('mosquito_count') or 0
+        cur = per_dev_hour[u][kst_h]
+        if cur is None or cnt > cur:
+            per_dev_hour[u][kst_h] = cnt
+    out = {}
+    for u, hr in per_dev_hour.items():
+        prev = 0; deltas = [0] * 24
+        for h in range(24):
+            v = hr[h]
+            if v is None: continue
+            d_ = v - prev; deltas[h] = d_ if d_ > 0 else 0; prev = v
+        total = sum(deltas); night = sum(deltas[19:24])
+        out[u] = (night / total) if total > 0 else 0.0
+    cache.set(key, out, OVERVIEW_LIVE_STEP)
+    return out
+
+
+def _overview_live(data, ctx, now_utc=None):
+    """종합현황 데이터 중 지금 시각·현재 장비 상태로 정해지는 부분을 채운다 (data 를 직접 고침).
+    장비별 배터리·수신 시각·신뢰도·상태, 최근 48시간 raw 의 야간 비율로 내는 민원 점수, 관련 KPI.
+    _build_overview_data 끝에서, 그리고 확정 스냅샷을 읽을 때마다 불러 만든 시점의 장비 상태가 굳지 않게 한다."""
+    from datetime import datetime, timezone
+
+    now_utc = now_utc or datetime.now(timezone.utc)
+    live = {d.get('device_uuid'): (d.get('device') or {}) for d in ctx.devices()}
+    rows = data.get('devices') or []
+    uuids = {r['uuid'] for r in rows}
+
+    # 장비별 위험·민원 축약 계산 — 야간 비율은 5분 단위 창으로 캐시 (스냅샷 읽기마다 raw 48h 를 받지 않게)
+    night = _night_ratios(now_utc)
+    dev_night_ratio = {u: night[u] for u in uuids if u in night}
+
+    residential_keywords = ['공원', '아파트', '주거', '학교', '초등', '중학', '고등', '어린이집', '유치원']
+
+    def is_resi(m):
+        txt = ' '.join([m.get('addr') or '', m.get('name') or ''])
+        return any(k in txt for k in residential_keywords)
+
+    complaint_high = 0     # 민원 위험 61+
+    offline_count = 0
+    check_count = 0
+    trust_scores = []
+    low_batt_count = 0
+    # 장비 이상 판정(요청 기준): 배터리 20% 이하 OR 수신지연 60분 이상
+    equip_bad_count = 0      # 위 기준 충족 장비 수
+    equip_lowbatt_count = 0  # 그 중 배터리 20% 이하
+    equip_delay_count = 0    # 그 중 수신지연 60분 이상
+    for row in rows:
+        u = row['uuid']
+        cm = ctx.meta.get(u) or {}
+        m = {'name': row.get('name'), 'addr': row.get('addr')}
+        dv = live.get(u) or {}
+        today_c = row.get('today') or 0
+        yday_c = row.get('yday') or 0
+        ax2 = max(0, min(100, (today_c - yday_c) / yday_c * 100)) if yday_c > 0 else (50 if today_c > 0 else 0)
+
+        # 민원 점수 — 민원가능지역 페이지와 동일하게 관측소별 실제 bad_min 기준
+        dev_bm = cm.get('dev_bad_min') or 100
+        ax_felt = min(100, (today_c / dev_bm) * 100) if dev_bm > 0 else 0
+        night_ratio = dev_night_ratio.get(u, 0.0)
+        ax_night = min(100, (night_ratio / 0.6) * 100) if night_ratio else 0
+        ax_resi = 80 if is_resi(m) else 20
+        complaint_score = round(ax_felt * 0.35 + ax2 * 0.25 + ax_night * 0.25 + ax_resi * 0.15, 1)
+        if complaint_score <= 30: cp_lv = '낮음'
+        elif complaint_score <= 60: cp_lv = '보통'
+        else: cp_lv = '높음'
+        if cp_lv == '높음': complaint_high += 1  # 테이블 등급과 동일 기준
+
+        # 장비 신뢰도 (equipment-health 축약)
+        battery = dv.get('battery') or 0
+        fan = dv.get('fan') or 0
+        if battery < 15: low_batt_count += 1
+        ax_bat = 100 if battery >= 50 else 80 if battery >= 30 else 60 if battery >= 20 else 35 if battery >= 10 else 10
+        ax_fan = 100 if fan == 1 else 30
+        try:
+            ud = dv.get('updated_date') or ''
+            udt = datetime.fromisoformat(ud.replace('Z', '+00:00'))
+            delay_min = (now_utc - udt).total_seconds() / 60
+        except Exception:
+            delay_min = 99999
+        if delay_min <= 120: ax_sig = 100
+        elif delay_min <= 360: ax_sig = 80
+        elif delay_min <= 720: ax_sig = 55
+        elif delay_min <= 1440: ax_sig = 30
+        else: ax_sig = 5
+        ax_zero = row.get('ax_zero', 100)
+        trust_score = round(ax_bat * 0.25 + ax_fan * 0.20 + ax_sig * 0.35 + ax_zero * 0.20, 1)
+        trust_scores.append(trust_score)
+
+        if ax_sig <= 30: equip_status = '오프라인'; offline_count += 1
+        elif trust_score < 60 or battery < 15 or (fan == 0 and ax_sig >= 55): equip_status = '점검필요'; check_count += 1
+        else: equip_status = '정상'
+
+        # 장비 이상 판정(요청 기준): 배터리 20% 이하만
+        is_lowbatt = battery <= 20
+        is_delayed = delay_min >= 60
+        if is_lowbatt:
+            equip_lowbatt_count += 1
+        if is_delayed:
+            equip_delay_count += 1
+        if is_lowbatt:
+            equip_bad_count += 1
+
+        row.update({
+            'complaint_score': complaint_score, 'complaint_level': cp_lv,
+            'trust_score': trust_score, 'status': equip_status,
+            'battery': battery, 'updated_date': dv.get('updated_date'),
+        })
+
+    data['kpi'].update({
+        'complaint_high': complaint_high,
+        'equip_bad': equip_bad_count,
+        'equip_lowbatt': equip_lowbatt_count,
+        'equip_delay': equip_delay_count,
+        'offline_count': offline_count,
+        'check_count': check_count,
+        'low_batt_count': low_batt_count,
+        'avg_trust': round(sum(trust_scores) / len(trust_scores), 1) if trust_scores else 0,
+    })
+    return data
+
+
+def _build_overview_data(su, date_str='', hour_str='', ctx=None):
     """종합 현황 탭 + 보고서 재사용용 데이터 빌더.
     허용 장비(su 기준)로만 산출.
     date_str: YYYY-MM-DD 형식, 기준일 변경시 사용. 빈 문자열이면 어제(전일) 기본.
     hour_str: HH (0~23), 지정시 그 시점까지 누적. 빈 문자열이면 하루 전체.
+    ctx: 장비 컨텍스트 (없으면 get_device_context(su)).
     """
     from datetime import datetime, timedelta, timezone, date as date_cls
     from collections import defaultdict
@@ -402,55 +559,42 @@ def _build_overview_data(su, date_str='', hour_str=''):
     # 전역 이상 감지 기준: 51마리 이상이면 이상으로 판정
     ANOMALY_THRESHOLD = 51
 
-    devices = moscom_client.list_devices()
-    devices = user_store.filter_devices(su, devices)
+    # 장비 목록·이름/주소·권역·2축 분류·현재 날씨 — 공용 장비 컨텍스트 (동기화 세대×사용자 범위 캐시)
+    if ctx is None:
+        ctx = get_device_context(su)
+    devices = ctx.devices()
     allowed_uuids = {d.get('device_uuid') for d in devices}
+    region_name_by_code = ctx.region_name_by_code
 
-    # 우리 DB(moscom.Device)에서 날씨 데이터 + 권역 lookup
+    # 기준일 기상 이력이 있으면 현재값 대신 사용 (지난 날짜 조회 시에도 그 날 날씨)
     weather_map = {}
-    region_map_per_uuid = {}  # uuid → (code, name)
-    region_name_by_code = {}
-    habitat_map = {}  # uuid → (region_type, form_type) 수동 지정값
+    cell_by_uuid = {u: m['weather_cell'] for u, m in ctx.meta.items() if m.get('weather_cell')}
     try:
-        from moscom.models import Device as MoscomDevice, Region as MoscomRegion
-        region_name_by_code = {r.code: r.name for r in MoscomRegion.objects.all()}
-        for md in MoscomDevice.objects.filter(device_uuid__in=allowed_uuids):
-            weather_map[md.device_uuid] = {
-                'temperature': md.temperature,
-                'humidity': md.humidity,
-                'precipitation': md.precipitation,
-                'wind_speed': md.wind_speed,
-            }
-            region_map_per_uuid[md.device_uuid] = (
-                md.region_code or '',
-                region_name_by_code.get(md.region_code, md.region_code) or '미지정',
-            )
-            habitat_map[md.device_uuid] = (md.region_type or '', md.form_type or '')
+        from moscom.weather import daily_summary
+        wx_day = daily_summary(cell_by_uuid.values(), target_date, target_date)
+        for u, cell in cell_by_uuid.items():
+            wx = wx_day.get((cell, target_date))
+            if wx:
+                weather_map[u] = {k: wx[k] for k in ('temperature', 'humidity', 'precipitation', 'wind_speed')}
     except Exception:
         pass
 
     # 이름/주소 맵
     meta = {}
     for d in devices:
-        dv = d.get('device') or {}
-        nm = _station_name(dv.get('device_name') or '') or d.get('device_uuid')
-        addr = ' '.join(p for p in [dv.get('address_gungu'), dv.get('address_dong')] if p and len(p) < 40 and _valid_kor(p)) or ''
-        w = weather_map.get(d.get('device_uuid'), {})
-        rc, rn = region_map_per_uuid.get(d.get('device_uuid'), ('', '미지정'))
-        rt, ft = habitat_map.get(d.get('device_uuid'), ('', ''))
-        meta[d.get('device_uuid')] = {
-            'name': nm, 'addr': addr,
+        u = d.get('device_uuid')
+        cm = ctx.meta.get(u) or {}
+        w = weather_map.get(u) or cm.get('weather') or {}
+        meta[u] = {
+            'name': cm.get('name') or u, 'addr': cm.get('addr') or '',
             # 51마리 이상 = 이상 (전역 통일)
             'bad_min': ANOMALY_THRESHOLD,
             # 관측소별 실제 임계 (민원 점수 ax1 — 민원가능지역 페이지와 일치시키기 위함)
-            'dev_bad_min': ((dv.get('deviceSetting') or {}).get('bad_min')) or 100,
-            'region_code': rc,
-            'region_name': rn,
-            'region_type': rt,
-            'form_type': ft,
-            'battery': dv.get('battery') or 0,
-            'fan': dv.get('fan') or 0,
-            'updated_date': dv.get('updated_date'),
+            'dev_bad_min': cm.get('dev_bad_min') or 100,
+            'region_code': cm.get('region_code') or '',
+            'region_name': cm.get('region_name') or '미지정',
+            'region_type': cm.get('region_type') or '',
+            'form_type': cm.get('form_type') or '',
             'temperature': w.get('temperature'),
             'humidity': w.get('humidity'),
             'precipitation': w.get('precipitation'),
@@ -536,48 +680,6 @@ def _build_overview_data(su, date_str='', hour_str=''):
     warn_count = 0         # 위험 점수 61+ (경고/심각)
     anomaly_today = 0      # 오늘 bad_min 초과
     alert_count = 0        # 경보 발생 — 이상감지 탭과 동일: 기준일 포집 50마리 이상 (관측소당 1회)
-    complaint_high = 0     # 민원 위험 61+
-    now_utc = datetime.now(timezone.utc)
-    offline_count = 0
-    check_count = 0
-    trust_scores = []
-    low_batt_count = 0
-    # 장비 이상 판정(요청 기준): 배터리 20% 이하 OR 수신지연 60분 이상
-    equip_bad_count = 0      # 위 기준 충족 장비 수
-    equip_lowbatt_count = 0  # 그 중 배터리 20% 이하
-    equip_delay_count = 0    # 그 중 수신지연 60분 이상
-
-    # 장비별 위험·민원 축약 계산
-    # 야간 피크 계산 위해 raw 가져옴 (48h)
-    start_iso = (now_utc - timedelta(days=2)).strftime('%Y-%m-%dT%H:%M:%S.000Z')
-    end_iso = now_utc.strftime('%Y-%m-%dT%H:%M:%S.000Z')
-    try:
-        raw = moscom_client.get_statistics_by_date(start_dt=start_iso, end_dt=end_iso, aggregation='raw', device_uuid='0')
-    except Exception:
-        raw = []
-    raw = [r for r in (raw or []) if r.get('device_uuid') in allowed_uuids]
-    per_dev_hour = defaultdict(lambda: [None] * 24)
-    for r in raw:
-        u = r.get('device_uuid')
-        iso = r.get('created_date') or ''
-        try:
-            utc_h = int(iso[11:13])
-        except Exception:
-            continue
-        kst_h = (utc_h + 9) % 24
-        cnt = r.get('mosquito_count') or 0
-        cur = per_dev_hour[u][kst_h]
-        if cur is None or cnt > cur:
-            per_dev_hour[u][kst_h] = cnt
-    dev_night_ratio = {}
-    for u, hr in per_dev_hour.items():
-        prev = 0; deltas = [0] * 24
-        for h in range(24):
-            v = hr[h]
-            if v is None: continue
-            d_ = v - prev; deltas[h] = d_ if d_ > 0 else 0; prev = v
-        total = sum(deltas); night = sum(deltas[19:24])
-        dev_night_ratio[u] = (night / total) if total > 0 else 0.0
 
     # 오늘 백분위 계산용
     today_counts_sorted = sorted(today_by_dev.values(), reverse=True)
@@ -588,12 +690,6 @@ def _build_overview_data(su, date_str='', hour_str=''):
         above = sum(1 for x in today_counts_sorted if x < v)
         return round((above / (n - 1)) * 100)
 
-    residential_keywords = ['공원', '아파트', '주거', '학교', '초등', '중학', '고등', '어린이집', '유치원']
-
-    def is_resi(m):
-        txt = ' '.join([m.get('addr') or '', m.get('name') or ''])
-        return any(k in txt for k in residential_keywords)
-
     # 장비별 상세 계산
     device_rows = []
     for u in allowed_uuids:
@@ -624,53 +720,9 @@ def _build_overview_data(su, date_str='', hour_str=''):
         if today_c >= m.get('bad_min', 100) and m.get('bad_min', 0) > 0: anomaly_today += 1
         if today_c >= 50: alert_count += 1  # 경보 발생 (이상감지 탭과 동일 기준 50마리, 관측소당 1회)
 
-        # 민원 점수 — 민원가능지역 페이지와 동일하게 관측소별 실제 bad_min 기준
-        dev_bm = m.get('dev_bad_min', 100)
-        ax_felt = min(100, (today_c / dev_bm) * 100) if dev_bm > 0 else 0
-        night_ratio = dev_night_ratio.get(u, 0.0)
-        ax_night = min(100, (night_ratio / 0.6) * 100) if night_ratio else 0
-        ax_resi = 80 if is_resi(m) else 20
-        complaint_score = round(ax_felt * 0.35 + ax2 * 0.25 + ax_night * 0.25 + ax_resi * 0.15, 1)
-        if complaint_score <= 30: cp_lv = '낮음'
-        elif complaint_score <= 60: cp_lv = '보통'
-        else: cp_lv = '높음'
-        if cp_lv == '높음': complaint_high += 1  # 테이블 등급과 동일 기준
-
-        # 장비 신뢰도 (equipment-health 축약)
-        battery = m.get('battery', 0)
-        fan = m.get('fan', 0)
-        if battery < 15: low_batt_count += 1
-        ax_bat = 100 if battery >= 50 else 80 if battery >= 30 else 60 if battery >= 20 else 35 if battery >= 10 else 10
-        ax_fan = 100 if fan == 1 else 30
-        try:
-            ud = m.get('updated_date') or ''
-            udt = datetime.fromisoformat(ud.replace('Z', '+00:00'))
-            delay_min = (now_utc - udt).total_seconds() / 60
-        except Exception:
-            delay_min = 99999
-        if delay_min <= 120: ax_sig = 100
-        elif delay_min <= 360: ax_sig = 80
-        elif delay_min <= 720: ax_sig = 55
-        elif delay_min <= 1440: ax_sig = 30
-        else: ax_sig = 5
+        # 최근 3일 0건 축 (장비 신뢰도) — 포집값에서만 나오므로 여기서, 나머지 신뢰도·민원은 _overview_live
         zero_total_3 = sum(week_vals[-3:]) if week_vals else 0
         ax_zero = 40 if (len(week_vals) >= 3 and zero_total_3 == 0) else (65 if zero_total_3 == 0 else 100)
-        trust_score = round(ax_bat * 0.25 + ax_fan * 0.20 + ax_sig * 0.35 + ax_zero * 0.20, 1)
-        trust_scores.append(trust_score)
-
-        if ax_sig <= 30: equip_status = '오프라인'; offline_count += 1
-        elif trust_score < 60 or battery < 15 or (fan == 0 and ax_sig >= 55): equip_status = '점검필요'; check_count += 1
-        else: equip_status = '정상'
-
-        # 장비 이상 판정(요청 기준): 배터리 20% 이하만
-        is_lowbatt = battery <= 20
-        is_delayed = delay_min >= 60
-        if is_lowbatt:
-            equip_lowbatt_count += 1
-        if is_delayed:
-            equip_delay_count += 1
-        if is_lowbatt:
-            equip_bad_count += 1
 
         # 추세 방향: 기준일(today_c) vs 전일(yday_c) 비교
         diff = today_c - yday_c
@@ -685,16 +737,13 @@ def _build_overview_data(su, date_str='', hour_str=''):
             'uuid': u, 'name': m.get('name'), 'addr': m.get('addr'),
             'today': today_c, 'yday': yday_c, 'week_avg': round(week_avg, 1),
             'risk_score': risk_score, 'risk_level': risk_lv,
-            'complaint_score': complaint_score, 'complaint_level': cp_lv,
-            'trust_score': trust_score, 'status': equip_status,
-            'battery': battery, 'trend': trend_dir,
+            'ax_zero': ax_zero, 'trend': trend_dir,
             'bad_min': m.get('bad_min', 100),
             # 날씨 (Open-Meteo)
             'temperature': m.get('temperature'),
             'humidity': m.get('humidity'),
             'precipitation': m.get('precipitation'),
             'wind_speed': m.get('wind_speed'),
-            'updated_date': m.get('updated_date'),
             # 권역
             'region_code': m.get('region_code') or '',
             'region_name': m.get('region_name') or '미지정',
@@ -706,8 +755,6 @@ def _build_overview_data(su, date_str='', hour_str=''):
     # 포집량 내림차순 정렬
     device_rows.sort(key=lambda r: r['today'], reverse=True)
 
-    avg_trust = round(sum(trust_scores) / len(trust_scores), 1) if trust_scores else 0
-
     # ── 전국 비교 지표 (필터 전 전체 stats 기준, today_d 하루) ──
     # admin: 전국 평균 + 전국 최고 관측소명/마리수
     # 비admin: 전국 평균 + 전국 최고 마리수(관측소명 숨김) + 해당 지역(권역) 전체 평균
@@ -726,14 +773,15 @@ def _build_overview_data(su, date_str='', hour_str=''):
             top_cnt_nat = nat_today[top_uuid_nat]
             is_admin = bool(su.get('is_admin')) if su else False
             # 전국 device명 매핑 (admin 최고 관측소명 표시용)
-            top_name_nat = top_uuid_nat
-            try:
-                from moscom.models import Device as MD
-                md = MD.objects.filter(device_uuid=top_uuid_nat).first()
-                if md:
-                    top_name_nat = _station_name(md.device_name) or top_uuid_nat
-            except Exception:
-                pass
+            top_name_nat = (ctx.meta.get(top_uuid_nat) or {}).get('name') or top_uuid_nat
+            if top_uuid_nat not in ctx.meta:
+                try:
+                    from moscom.models import Device as MD
+                    md = MD.objects.filter(device_uuid=top_uuid_nat).first()
+                    if md:
+                        top_name_nat = _station_name(md.device_name) or top_uuid_nat
+                except Exception:
+                    pass
             national = {
                 'count': len(nat_vals),
                 'avg': nat_avg,
@@ -778,7 +826,7 @@ def _build_overview_data(su, date_str='', hour_str=''):
     except Exception as e:
         logger.warning(f'national compare failed: {e}')
 
-    return {
+    data = {
         'today': today_d,
         'yday': yday_d,
         'kpi': {
@@ -789,25 +837,20 @@ def _build_overview_data(su, date_str='', hour_str=''):
             'warn_count': warn_count,
             'anomaly_today': anomaly_today,
             'alert_count': alert_count,
-            'complaint_high': complaint_high,
-            'equip_bad': equip_bad_count,
-            'equip_lowbatt': equip_lowbatt_count,
-            'equip_delay': equip_delay_count,
-            'offline_count': offline_count,
-            'check_count': check_count,
-            'low_batt_count': low_batt_count,
-            'avg_trust': avg_trust,
             'total_devices': len(allowed_uuids),
         },
         'national': national,
         'devices': device_rows,
     }
+    _overview_live(data, ctx)
+    return data
 
 
 @require_GET
 def moscom_overview(request):
     """종합 현황 탭용 집계 API. 허용 장비 기준.
     ?date=YYYY-MM-DD&hour=HH 옵션 — 지정시 그 시점 기준 (없으면 어제 = 기본값).
+    확정된 지난 영업일은 OverviewSnapshot 1행 조회 (core.overview_snapshots).
     """
     auth_err = _require_mosquito_auth(request)
     if auth_err:
@@ -816,7 +859,8 @@ def moscom_overview(request):
     try:
         date_str = (request.GET.get('date') or '').strip()
         hour_str = (request.GET.get('hour') or '').strip()
-        data = _build_overview_data(su, date_str=date_str, hour_str=hour_str)
+        data = overview_snapshots.get_overview(su, date_str=date_str, hour_str=hour_str,
+                                               ctx=get_device_context(su, request))
         return JsonResponse(data)
     except Exception as e:
         logger.exception('overview failed')
@@ -1108,7 +1152,7 @@ def _build_report_body(period, base_date, su, request):
 
     # 종합 현황 KPI + 전국 지표 (최신일 기준) — 보고서 AI 요약 근거. 본문 "핵심 수치"와 중복되지 않도록 입력 데이터로만 활용.
     try:
-        ov = _build_overview_data(su)
+        ov = _build_overview_data(su, ctx=get_device_context(su, request))
         k = ov.get('kpi') or {}
         nat = ov.get('national') or {}
         # 전국 지표 라인 구성 (admin 여부에 따라)
@@ -1455,22 +1499,25 @@ def _build_report_body(period, base_date, su, request):
                     'worker': p.get('worker') or '', 'volume_l': p.get('volume_l'),
                 }
         base_d = sorted_dates[-1] if sorted_dates else None
-        # 관측소별 전체 history (backcast용)
+        # 예상 = AI 과거예측(backcast, 방역 미적용) — 관측소 전체를 기준일 하루로 한 번에
+        backcast_by_uuid = {}
+        if base_d is not None:
+            try:
+                bc = predictor.backcast_batch(
+                    [{'uuid': u, 'history': [{'date': dt, 'count': daily[u].get(dt, 0)} for dt in sorted_dates]}
+                     for u in name_map],
+                    [base_d])
+                backcast_by_uuid = {r['uuid']: float(r['predicted']) for r in bc}
+            except Exception:
+                logger.exception('remedy_verify backcast failed')
         for u, m in name_map.items():
             plan = last_plan_by_dev.get(u)
             seq = [daily[u].get(dt, 0) for dt in sorted_dates[-8:]]
             if len(seq) < 4 or base_d is None:
                 continue
             actual = daily[u].get(base_d, 0)                    # 실측 (기준일)
-            # 예상 = AI 과거예측(backcast, 방역 미적용). 실패 시 직전 평균으로 폴백.
-            full_hist = [{'date': dt, 'count': daily[u].get(dt, 0)} for dt in sorted_dates]
-            expected = None
-            try:
-                bc = predictor.backcast_for_date(full_hist, base_d)
-                if bc is not None:
-                    expected = float(bc)
-            except Exception:
-                expected = None
+            # 예상 = AI 과거예측(backcast). 없으면 직전 평균으로 폴백.
+            expected = backcast_by_uuid.get(u)
             expected_src = 'AI 예측'
             if expected is None:
                 prior = seq[:-1]
@@ -2346,8 +2393,8 @@ def moscom_equipment_health(request):
     from collections import defaultdict
     try:
         now = datetime.now(timezone.utc)
-        devices = moscom_client.list_devices()
-        devices = user_store.filter_devices(_current_session_user(request), devices)
+        ctx = get_device_context(_current_session_user(request), request)
+        devices = ctx.devices()
 
         # 최근 3일 일별 통계
         stats = moscom_client.get_statistics(device_uuid='', period_type='2', offset=0)
@@ -2386,7 +2433,7 @@ def moscom_equipment_health(request):
         for d in devices:
             u = d.get('device_uuid')
             dv = d.get('device') or {}
-            name = _station_name(dv.get('device_name') or '') or u
+            name = (ctx.meta.get(u) or {}).get('name') or _station_name(dv.get('device_name') or '') or u
             battery = dv.get('battery') or 0
             fan = dv.get('fan') or 0
             charge = dv.get('charge') or 0
@@ -2867,10 +2914,12 @@ def moscom_devices(request):
 
         # 관리자 세션일 때 '전체' 플래그로 원본 반환 (관리자 탭 사용자 추가에서 전 장비 리스트 필요)
         if request.GET.get('all') == '1' and bool(request.session.get('mosquito_is_admin')):
-            return JsonResponse({'count': len(data), 'devices': data, 'admin_all': True}, safe=False)
+            return JsonResponse({'count': len(data), 'devices': data, 'admin_all': True,
+                                 'cache': moscom_client.cache_meta()}, safe=False)
         su = _current_session_user(request)
         filtered = user_store.filter_devices(su, data)
-        return JsonResponse({'count': len(filtered), 'devices': filtered}, safe=False)
+        return JsonResponse({'count': len(filtered), 'devices': filtered,
+                             'cache': moscom_client.cache_meta()}, safe=False)
     except Exception as e:
         logger.exception('MOSCOM /device/listAll failed')
         return JsonResponse({'error': str(e)}, status=502)
@@ -2924,7 +2973,8 @@ def moscom_statistics(request):
             device_uuid=device_uuid, period_type=period, offset=offset,
         )
         data = _filter_records_by_uuid(request, data or [])
-        return JsonResponse({'count': len(data), 'stats': data}, safe=False)
+        return JsonResponse({'count': len(data), 'stats': data,
+                             'cache': moscom_client.cache_meta()}, safe=False)
     except Exception as e:
         logger.exception('MOSCOM /device/statistics failed')
         return JsonResponse({'error': str(e)}, status=502)
@@ -2971,6 +3021,7 @@ def moscom_daily(request):
             'count': len(data) if isinstance(data, list) else 0,
             'start': start_str, 'end': end_str,
             'data': data,
+            'cache': moscom_client.cache_meta(),
         }, safe=False)
     except Exception as e:
         logger.exception('MOSCOM /device/statisticsByDate (day) failed')
@@ -3004,16 +3055,9 @@ def moscom_anomaly_history(request):
         days = max(1, min(days, 90))
 
         su = _current_session_user(request)
-        devices = moscom_client.list_devices()
-        devices = user_store.filter_devices(su, devices)
-        meta = {}
-        for d in devices:
-            u = d.get('device_uuid')
-            dv = d.get('device') or {}
-            name = _station_name(dv.get('device_name') or '') or u
-            addr = ' '.join(p for p in [dv.get('address_gungu'), dv.get('address_dong')] if p and len(p) < 40 and _valid_kor(p)).strip()
-            bad_min = 50  # 경보 기준 50마리 고정 (이상감지 탭과 통일)
-            meta[u] = {'name': name, 'addr': addr, 'bad_min': bad_min}
+        ctx = get_device_context(su, request)
+        # 경보 기준 50마리 고정 (이상감지 탭과 통일)
+        meta = {u: {'name': m['name'], 'addr': m['addr'], 'bad_min': 50} for u, m in ctx.meta.items()}
 
         # 최근 N일 일별 통계
         now = datetime.now(timezone.utc)
@@ -3083,38 +3127,18 @@ def moscom_complaint_risk(request):
             except ValueError:
                 return JsonResponse({'error': 'date 형식은 YYYY-MM-DD'}, status=400)
 
-        # 1) 장비 메타
-        devices = moscom_client.list_devices()
-        devices = user_store.filter_devices(_current_session_user(request), devices)
-        # 수동 지정 2축 분류 lookup (uuid → (region_type, form_type))
-        habitat_map = {}
-        try:
-            from moscom.models import Device as MoscomDevice
-            for md in MoscomDevice.objects.all():
-                habitat_map[md.device_uuid] = (md.region_type or '', md.form_type or '')
-        except Exception:
-            pass
-        meta = {}
-        for d in devices:
-            u = d.get('device_uuid')
-            dv = d.get('device') or {}
-            name = _station_name(dv.get('device_name') or '') or u
-            sido = (dv.get('address_sido') or '').strip()
-            gungu = (dv.get('address_gungu') or '').strip()
-            dong = (dv.get('address_dong') or '').strip()
-            detail = (dv.get('address_detail') or '').strip()
-            bad_min = ((dv.get('deviceSetting') or {}).get('bad_min')) or 100
-            rt, ft = habitat_map.get(u, ('', ''))
-            meta[u] = {
-                'name': name,
-                'sido': sido if _valid_kor(sido) else '',
-                'gungu': gungu if _valid_kor(gungu) else '',
-                'dong': dong if _valid_kor(dong) else '',
-                'detail': detail if _valid_kor(detail) else '',
-                'bad_min': bad_min,
-                'region_type': rt,
-                'form_type': ft,
+        # 1) 장비 메타 (수동 지정 2축 분류 포함) — 공용 장비 컨텍스트
+        ctx = get_device_context(_current_session_user(request), request)
+        meta = {
+            u: {
+                'name': m['name'],
+                'sido': m['sido'], 'gungu': m['gungu'], 'dong': m['dong'], 'detail': m['detail'],
+                'bad_min': m['dev_bad_min'],
+                'region_type': m['region_type'],
+                'form_type': m['form_type'],
             }
+            for u, m in ctx.meta.items()
+        }
 
         # 2) 7일 통계 (장비별 일별 포집량)
         if target_date:
@@ -3348,170 +3372,36 @@ def moscom_predict(request):
     auth_err = _require_mosquito_auth(request)
     if auth_err:
         return auth_err
-    from datetime import datetime, timedelta, timezone
     try:
-        # 최근 10일 일별 통계 (lag7까지 쓰니 넉넉하게)
-        # 영업일 기준 오늘 (새벽 5시 경계)
-        try:
-            from moscom.timeutil import business_today
-            today_kst = business_today()
-        except Exception:
-            today_kst = datetime.now(timezone(timedelta(hours=9))).date()
-        start_d = today_kst - timedelta(days=10)
-        start_iso = datetime(start_d.year, start_d.month, start_d.day, 0, 0, 0, tzinfo=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
-        end_iso = (datetime(today_kst.year, today_kst.month, today_kst.day, 0, 0, 0, tzinfo=timezone.utc) + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S.000Z')
-
-        daily = moscom_client.get_statistics_by_date(start_dt=start_iso, end_dt=end_iso, aggregation='day', device_uuid='0')
-        devices = moscom_client.list_devices()
-        # 세션 사용자 허용 장비로 제한
-        devices = user_store.filter_devices(_current_session_user(request), devices)
-
-        # 장비 메타 + moscom DB (region_code, 날씨)
-        moscom_device_map = {}
-        region_name_by_code = {}
-        try:
-            from moscom.models import Device as MoscomDevice, Region as MoscomRegion
-            region_name_by_code = {r.code: r.name for r in MoscomRegion.objects.all()}
-            for md in MoscomDevice.objects.all():
-                moscom_device_map[md.device_uuid] = md
-        except Exception:
-            pass
-
-        meta = {}
-        for d in devices:
-            u = d.get('device_uuid')
-            dv = d.get('device') or {}
-            name = _station_name(dv.get('device_name') or '') or u
-            md = moscom_device_map.get(u)
-            rcode = (md.region_code if md else '') or ''
-            # region 그룹 키: 권역명 (KH→김해 본시 등) 우선, 없으면 시도+군구
-            if rcode and region_name_by_code.get(rcode):
-                region = region_name_by_code[rcode]
-            else:
-                parts = [dv.get('address_sido'), dv.get('address_gungu')]
-                region = ' '.join(p for p in parts if p and len(p) < 40 and any(ord(c) < 0x3400 or 0xAC00 <= ord(c) <= 0xD7A3 for c in p)) or '기타'
-            meta[u] = {
-                'name': name, 'region': region,
-                'region_code': rcode,
-                'sido': (md.address_sido if md else (dv.get('address_sido') or '')),
-                'weather': {
-                    'temperature': md.temperature if md else None,
-                    'humidity': md.humidity if md else None,
-                    'precipitation': md.precipitation if md else None,
-                    'wind_speed': md.wind_speed if md else None,
-                } if md else {},
+        # 세션 사용자 허용 장비 + 메타 (region 그룹 키: 권역명 우선, 없으면 시도+군구) — 공용 장비 컨텍스트
+        su = _current_session_user(request)
+        ctx = get_device_context(su, request)
+        meta = {
+            u: {
+                'name': m['name'], 'region': m['region_group'],
+                'region_code': m['region_code'],
+                'sido': m['md_sido'] if m['weather'] else m['sido'],
+                'weather': m['weather'],
             }
-
-        # 장비별 history 생성
-        # 오늘(기준일)은 아직 측정이 안 끝났으니 실측에 포함하지 않음 (예측 컬럼과 중복 방지)
-        today_iso = today_kst.isoformat()
-        hist_by_uuid = {u: [] for u in meta}
-        for r in (daily or []):
-            u = r.get('device_uuid')
-            if u not in hist_by_uuid:
-                continue
-            date = (r.get('created_date') or '')[:10]
-            if not date:
-                continue
-            # 오늘 이후 데이터는 실측에서 제외
-            if date >= today_iso:
-                continue
-            hist_by_uuid[u].append({'date': date, 'count': r.get('mosquito_count') or 0})
-
-        # 히스토리는 오름차순(과거 → 최신)으로 정렬: 차트와 lag 계산에 필요
-        for u in hist_by_uuid:
-            hist_by_uuid[u].sort(key=lambda h: h['date'])
-
-        # 예측 대상 입력
-        inputs = []
-        for u, m in meta.items():
-            inputs.append({
-                'uuid': u,
-                'name': m['name'],
-                'region': m['region'],
-                'history': hist_by_uuid[u],
-                'region_code': m.get('region_code') or '',
-                'sido': m.get('sido') or '',
-                'weather': m.get('weather') or {},
-            })
+            for u, m in ctx.meta.items()
+        }
 
         try:
             days_ahead = int(request.GET.get('days', '3'))
         except (TypeError, ValueError):
             days_ahead = 3
-        preds = predictor.predict_for_devices(inputs, days_ahead=days_ahead)
+        # 일일 예측 저장소 (영업일×모델 버전×장비 캐시, 동기화·재학습 직후 채워짐) + 방역 효과는 읽을 때 반영
+        preds = prediction_store.get_predictions(ctx, days_ahead=days_ahead)
+        remedy_summary_by_uuid = prediction_store.apply_remedies(preds)
 
-        # 방역 계획 효과 반영 (post-processing) — predicted_index/grade 보존
-        def _grade_count(n):
-            if n <= 10: return '안전'
-            if n <= 50: return '관심'
-            if n <= 100: return '주의'
-            if n <= 200: return '경고'
-            return '위험'
-        def _grade_idx(v):
-            if v is None: return None
-            if v < 25: return '쾌적'
-            if v < 50: return '관심'
-            if v < 75: return '주의'
-            return '불쾌'
-        remedy_summary_by_uuid = {}
-        for p in preds:
-            uid = p['uuid']
-            new_preds = []
-            applied_by_date = {}
-            for pp in p['predictions']:
-                factor, applied = remedy_store.adjustment_factor(uid, pp.get('date'))
-                orig = pp.get('predicted') or 0
-                adj = int(round(orig * factor))
-                # 모기지수도 방역 계수만큼 비례 감소 (마릿수가 줄면 지수도 줄어듦)
-                orig_idx = pp.get('predicted_index')
-                if orig_idx is not None:
-                    adj_idx = round(max(0.0, min(100.0, orig_idx * factor)), 1)
-                else:
-                    adj_idx = None
-                new_preds.append({
-                    'date': pp['date'],
-                    'predicted': adj,
-                    'predicted_raw': orig,
-                    'predicted_index': adj_idx,
-                    'predicted_index_raw': round(orig_idx, 1) if orig_idx is not None else None,
-                    'grade': _grade_idx(adj_idx),
-                    'remedy_factor': round(factor, 3),
-                })
-                if applied:
-                    applied_by_date[pp['date']] = applied
-            p['predictions'] = new_preds
-            ps = [x['predicted'] for x in new_preds]
-            idxs = [x['predicted_index'] for x in new_preds if x['predicted_index'] is not None]
-            p['max_predicted'] = max(ps) if ps else 0
-            p['avg_predicted'] = round(sum(ps) / len(ps)) if ps else 0
-            if idxs:
-                avg_idx = sum(idxs) / len(idxs)
-                p['max_index'] = round(max(idxs), 1)
-                p['avg_index'] = round(avg_idx, 1)
-                p['grade'] = _grade_idx(avg_idx)
-            else:
-                p['max_index'] = None
-                p['avg_index'] = None
-                p['grade'] = _grade_count(p['max_predicted'])
-            if applied_by_date:
-                p['remedy_applied'] = applied_by_date
-                remedy_summary_by_uuid[uid] = applied_by_date
-                # 추론 근거에 방역 반영 요약 덧붙임
-                _names = []
-                for _alist in applied_by_date.values():
-                    for _a in (_alist or []):
-                        _nm = (_a.get('method_name') or _a.get('name')) if isinstance(_a, dict) else str(_a)
-                        if _nm and _nm not in _names:
-                            _names.append(_nm)
-                if _names:
-                    _msg = f"방역 {len(applied_by_date)}일 반영(예: {_names[0]})"
-                    p['reasoning'] = (p.get('reasoning') or '') + ' · ' + _msg if p.get('reasoning') else _msg
-
-        # 예측 스냅샷 자동 저장 (하루 1회 — unique 제약으로 중복은 무시됨)
+        # 예측 스냅샷 자동 저장 (하루 1회 — unique 제약으로 중복은 무시됨, 같은 범위는 그날 한 번만 시도)
         try:
+            from django.core.cache import cache
             from core import prediction_log
-            prediction_log.save_snapshot(preds, meta_by_uuid=meta)
+            from core.device_context import scope_key
+            snap_key = f'moscom:pred:snap:{prediction_log._today_kst().isoformat()}:{scope_key(su)}'
+            if request.GET.get('snapshot') == '1' or cache.add(snap_key, 1, 26 * 60 * 60):
+                prediction_log.save_snapshot(preds, meta_by_uuid=meta)
         except Exception:
             logger.exception('prediction snapshot skipped')
 
@@ -3570,20 +3460,10 @@ def moscom_forecast_brief(request):
             today_d = datetime.now(timezone(timedelta(hours=9))).date()
             yday_d = today_d - timedelta(days=1)
 
-        devices = moscom_client.list_devices()
-        devices = user_store.filter_devices(su, devices)
-        allowed_uuids = {d.get('device_uuid') for d in devices}
-
-        # moscom DB lookup (region + weather)
-        moscom_device_map = {}
-        region_name_by_code = {}
-        try:
-            from moscom.models import Device as MoscomDevice, Region as MoscomRegion, Collection
-            region_name_by_code = {r.code: r.name for r in MoscomRegion.objects.all()}
-            for md in MoscomDevice.objects.all():
-                moscom_device_map[md.device_uuid] = md
-        except Exception:
-            Collection = None  # noqa
+        # 허용 장비 + 권역·현재 날씨 — 공용 장비 컨텍스트
+        ctx = get_device_context(su, request)
+        allowed_uuids = ctx.allowed
+        dmeta = ctx.meta
 
         # 장비별 history 7일
         stats = moscom_client.get_statistics(device_uuid='', period_type='2', offset=0)
@@ -3595,28 +3475,9 @@ def moscom_forecast_brief(request):
             if u and date and date < today_d.isoformat():
                 daily[u][date] += (r.get('mosquito_count') or 0)
 
-        # 예측 호출 (3일)
+        # 예측 (3일) — 일일 예측 저장소 (AI 예측 탭과 같은 값, 방역 미반영)
         try:
-            from core import predictor
-            inputs = []
-            for u in allowed_uuids:
-                hist = [{'date': d, 'count': c} for d, c in sorted(daily[u].items())]
-                md = moscom_device_map.get(u)
-                name = _station_name(md.device_name if md else '') or u
-                inputs.append({
-                    'uuid': u, 'name': name,
-                    'region': ' '.join(p for p in [(md.address_sido if md else ''), (md.address_gungu if md else '')] if p),
-                    'region_code': (md.region_code if md else '') or '',
-                    'sido': (md.address_sido if md else '') or '',
-                    'history': hist,
-                    'weather': {
-                        'temperature': md.temperature if md else None,
-                        'humidity': md.humidity if md else None,
-                        'precipitation': md.precipitation if md else None,
-                        'wind_speed': md.wind_speed if md else None,
-                    } if md else {},
-                })
-            preds = predictor.predict_for_devices(inputs, days_ahead=3)
+            preds = prediction_store.get_predictions(ctx, days_ahead=3)
         except Exception as e:
             logger.warning(f'forecast_brief predict failed: {e}')
             preds = []
@@ -3624,9 +3485,7 @@ def moscom_forecast_brief(request):
         # ── 1. 권역별 위험 신호등 ──
         region_groups = defaultdict(list)  # region_name -> [{uuid, name, avg_index, max_predicted}]
         for p in preds:
-            md = moscom_device_map.get(p.get('uuid'))
-            rc = (md.region_code if md else '') or ''
-            rname = region_name_by_code.get(rc, rc) or '미지정'
+            rname = (dmeta.get(p.get('uuid')) or {}).get('region_name') or '미지정'
             region_groups[rname].append({
                 'uuid': p.get('uuid'),
                 'name': p.get('name'),
@@ -3662,9 +3521,7 @@ def moscom_forecast_brief(request):
         stations = []
         _grade_color = {'쾌적': 'green', '관심': 'yellow', '주의': 'orange', '불쾌': 'red'}
         for p in preds:
-            md = moscom_device_map.get(p.get('uuid'))
-            rc = (md.region_code if md else '') or ''
-            rname = region_name_by_code.get(rc, rc) or '미지정'
+            rname = (dmeta.get(p.get('uuid')) or {}).get('region_name') or '미지정'
             ai = p.get('avg_index')
             grade = p.get('grade') or (
                 '쾌적' if (ai or 0) < 25 else '관심' if ai < 50 else '주의' if ai < 75 else '불쾌'
@@ -3683,10 +3540,11 @@ def moscom_forecast_brief(request):
         stations.sort(key=lambda x: -(x.get('avg_index') or 0))
 
         # ── 2. 기상 평균 (전체 장비 기준) ──
-        temps = [m.temperature for m in moscom_device_map.values() if m.device_uuid in allowed_uuids and m.temperature is not None]
-        humids = [m.humidity for m in moscom_device_map.values() if m.device_uuid in allowed_uuids and m.humidity is not None]
-        precs = [m.precipitation for m in moscom_device_map.values() if m.device_uuid in allowed_uuids and m.precipitation is not None]
-        winds = [m.wind_speed for m in moscom_device_map.values() if m.device_uuid in allowed_uuids and m.wind_speed is not None]
+        wxs = [m['weather'] for m in dmeta.values() if m.get('weather')]
+        temps = [w['temperature'] for w in wxs if w.get('temperature') is not None]
+        humids = [w['humidity'] for w in wxs if w.get('humidity') is not None]
+        precs = [w['precipitation'] for w in wxs if w.get('precipitation') is not None]
+        winds = [w['wind_speed'] for w in wxs if w.get('wind_speed') is not None]
         weather = {
             'avg_temperature': round(sum(temps)/len(temps), 1) if temps else None,
             'avg_humidity': round(sum(humids)/len(humids), 1) if humids else None,
@@ -3901,11 +3759,8 @@ def moscom_forecast_simulate(request):
     except ValueError:
         return JsonResponse({'error': 'apply_date 형식 YYYY-MM-DD'}, status=400)
 
-    su = _current_session_user(request)
-    devices = moscom_client.list_devices()
-    devices = user_store.filter_devices(su, devices)
-    target = next((d for d in devices if d.get('device_uuid') == device_uuid), None)
-    if not target:
+    ctx = get_device_context(_current_session_user(request), request)
+    if device_uuid not in ctx.allowed:
         return JsonResponse({'error': '권한 없는 장비'}, status=403)
 
     # 방역 방법(들) — 각각 효과창(onset~duration) 보유
@@ -3914,40 +3769,8 @@ def moscom_forecast_simulate(request):
     if not methods:
         return JsonResponse({'error': '잘못된 방역 방법'}, status=400)
 
-    # 7일 통계
-    stats = moscom_client.get_statistics(device_uuid='', period_type='2', offset=0)
-    stats = [r for r in (stats or []) if r.get('device_uuid') == device_uuid]
-    daily = {}
-    for r in stats:
-        d = (r.get('created_date') or '')[:10]
-        if d:
-            daily[d] = (r.get('mosquito_count') or 0)
-    hist = [{'date': d, 'count': c} for d, c in sorted(daily.items())]
-
-    # 예측 (10일치 — 방역 효과 반영 가시화 위해 길게)
-    dv = target.get('device') or {}
-    from core import predictor
-    try:
-        from moscom.models import Device as MoscomDevice
-        md = MoscomDevice.objects.filter(device_uuid=device_uuid).first()
-    except Exception:
-        md = None
-
-    inp = [{
-        'uuid': device_uuid,
-        'name': _station_name(dv.get('device_name') or '') or device_uuid,
-        'region': ' '.join(p for p in [dv.get('address_sido'), dv.get('address_gungu')] if p),
-        'region_code': (md.region_code if md else '') or '',
-        'sido': (md.address_sido if md else '') or '',
-        'history': hist,
-        'weather': {
-            'temperature': md.temperature if md else None,
-            'humidity': md.humidity if md else None,
-            'precipitation': md.precipitation if md else None,
-            'wind_speed': md.wind_speed if md else None,
-        } if md else {},
-    }]
-    preds = predictor.predict_for_devices(inp, days_ahead=10)
+    # 예측 (10일치 — 방역 효과 반영 가시화 위해 길게) — 일일 예측 저장소
+    preds = prediction_store.get_predictions(ctx, days_ahead=10, uuids=[device_uuid])
     if not preds:
         return JsonResponse({'error': '예측 실패'}, status=500)
     base = preds[0]
@@ -3987,7 +3810,7 @@ def moscom_forecast_simulate(request):
         simulated.append({**p, 'predicted_simulated': adj, 'effect_applied': applied_any})
 
     return JsonResponse({
-        'device': {'uuid': device_uuid, 'name': inp[0]['name']},
+        'device': {'uuid': device_uuid, 'name': base['name']},
         'methods': [
             {'name': mw['name'], 'key': mw['key'], 'reduction_pct': mw['reduction_pct'],
              'effect_start': mw['effect_start'].isoformat(), 'effect_end': mw['effect_end'].isoformat()}
@@ -4028,6 +3851,7 @@ def moscom_hourly(request):
             'count': len(data) if isinstance(data, list) else 0,
             'start': start, 'end': end,
             'data': data,
+            'cache': moscom_client.cache_meta(),
         }, safe=False)
     except Exception as e:
         logger.exception('MOSCOM /device/statisticsByDate failed')
@@ -4078,6 +3902,7 @@ def moscom_prediction_log_api(request):
         'horizon_days': r.horizon_days,
         'predicted': r.predicted, 'predicted_raw': r.predicted_raw,
         'predicted_index': r.predicted_index, 'grade': r.grade, 'remedy_factor': r.remedy_factor,
+        'predicted_p10': r.predicted_p10, 'predicted_p50': r.predicted_p50, 'predicted_p90': r.predicted_p90,
         'lag1': r.lag1, 'lag7': r.lag7, 'ma3': r.ma3, 'ma7': r.ma7,
         'temperature': r.temperature, 'humidity': r.humidity,
         'precipitation': r.precipitation, 'wind_speed': r.wind_speed,
@@ -4131,6 +3956,46 @@ def moscom_prediction_series_api(request):
     return JsonResponse({'devices': names})
 
 
+@csrf_exempt
+def moscom_cache_stats_api(request):
+    """캐시 효과 확인 (admin).
+    GET  → MOSCOM 캐시 hit/stale/miss 합계 + 커넥션 풀 재사용 + (Redis면) 서버 keyspace 통계
+    POST → MOSCOM 캐시 카운터 초기화
+    """
+    err = _require_admin(request)
+    if err:
+        return err
+    from django.conf import settings as dj_settings
+    from django.core.cache import cache
+    if request.method == 'POST':
+        moscom_client.reset_cache_stats()
+        return JsonResponse({'ok': True})
+    backend = dj_settings.CACHES['default']['BACKEND']
+    out = {
+        'backend': backend.rsplit('.', 1)[-1],
+        'key_prefix': dj_settings.CACHES['default'].get('KEY_PREFIX', ''),
+        'version': dj_settings.CACHES['default'].get('VERSION', 1),
+        'moscom': moscom_client.cache_stats(),
+        'pool': moscom_client.pool_stats(),
+    }
+    if backend.endswith('RedisCache'):
+        try:
+            client = cache._cache.get_client(write=False)
+            info = client.info()
+            hits, misses = info.get('keyspace_hits', 0), info.get('keyspace_misses', 0)
+            out['redis'] = {
+                'keyspace_hits': hits,
+                'keyspace_misses': misses,
+                'hit_rate': round(hits / (hits + misses), 3) if (hits + misses) else None,
+                'used_memory_human': info.get('used_memory_human'),
+                'keys': client.dbsize(),
+                'evicted_keys': info.get('evicted_keys', 0),
+            }
+        except Exception as e:
+            out['redis'] = {'error': str(e)}
+    return JsonResponse(out)
+
+
 @csrf_exempt
 @require_POST
 def moscom_prediction_snapshot_api(request):
@@ -4143,7 +4008,7 @@ def moscom_prediction_snapshot_api(request):
         from django.test import RequestFactory
         # 내부적으로 예측 API 를 호출해 동일 결과를 받아 저장
         rf = RequestFactory()
-        inner = rf.get('/mosquito-test/api/predict/?days=3')
+        inner = rf.get('/mosquito-test/api/predict/?days=3&snapshot=1')
         inner.session = request.session
         resp = moscom_predict(inner)
         if resp.status_code != 200:
@@ -0,0 +1,228 @@
+"""Collection 월별 Parquet 보관 (retention).
+
+Collection 은 모든 장비의 raw 측정이 끝없이 쌓이는 테이블이라 created_date 범위 스캔이 계속 느려진다.
+PostgreSQL 선언적 파티셔닝은 unique 제약(moscom_id)에 파티션 키를 넣어야 해서 기존 테이블에 못 쓰고,
+대신 최근 HOT_MONTHS 개월만 DB 에 두고 지난 달(UTC 월)은 zstd Parquet 파일로 옮긴다.
+
+- archive_month(month): 그 달 행 → ARCHIVE_DIR/YYYY-MM.parquet (이미 있으면 합쳐서 다시 씀) + DB 에서 삭제
+- collection_rows(start, end): DB + 보관 파일을 합친 조회 (같은 moscom_id 는 DB 행 우선)
+- iter_collection_values(fields): 전체 이력 순회 (보관 → DB 순)
+- collection_range(): DB + 보관 전체의 (최초, 마지막) 측정 시각
+- last_count_before(uuid, t): t 직전 누적값 — HourlyDelta 재계산 baseline 이 보관 쪽에 있을 때
+
+사용: python manage.py moscom_archive            # HOT_MONTHS 이전의 닫힌 달 전부
+      python manage.py moscom_archive --month 2026-03 --no-purge
+"""
+import logging
+import os
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Max, Min
+
+from .models import Collection, CollectionArchive
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.environ.get('MOSCOM_ARCHIVE_DIR') or os.path.join(settings.BASE_DIR, 'moscom_archive', 'collection')
+# DB 에 남겨 둘 최근 개월 수 (이번 달 포함 안 함)
+HOT_MONTHS = int(os.environ.get('MOSCOM_COLLECTION_HOT_MONTHS', '3'))
+DELETE_BATCH = 5000
+FIELDS = ['moscom_id', 'device_uuid', 'mosquito_count', 'reset', 'battery', 'charge', 'fan',
+          'created_date', 'edited']
+
+
+def _next_month(month):
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def month_of(dt):
+    dt = dt.astimezone(dt_timezone.utc)
+    return date(dt.year, dt.month, 1)
+
+
+def _bounds(month):
+    """월 → [start, end) UTC datetime."""
+    nxt = _next_month(month)
+    return (datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc),
+            datetime(nxt.year, nxt.month, 1, tzinfo=dt_timezone.utc))
+
+
+def _path_for(month):
+    return os.path.join(ARCHIVE_DIR, f'{month:%Y-%m}.parquet')
+
+
+def closed_months(keep_months=HOT_MONTHS, now=None):
+    """DB 에 행이 남아 있고 보관 대상(최근 keep_months 개월 + 이번 달 이전)인 월 목록."""
+    now = now or datetime.now(dt_timezone.utc)
+    cutoff = month_of(now)
+    for _ in range(keep_months):
+        cutoff = date(cutoff.year - (cutoff.month == 1), (cutoff.month - 2) % 12 + 1, 1)
+    first = Collection.objects.aggregate(mn=Min('created_date'))['mn']
+    if first is None:
+        return []
+    months = []
+    m = month_of(first)
+    while m < cutoff:
+        months.append(m)
+        m = _next_month(m)
+    return months
+
+
+def archive_month(month, purge=True):
+    """month(1일) 의 Collection 행을 Parquet 로 쓰고, purge=True 면 DB 에서 지운다.
+    이미 보관된 달이면 기존 파일과 합쳐(moscom_id 중복은 DB 값 우선) 다시 쓴다 — 백필로 되살아난 행 처리.
+    """
+    import pandas as pd
+
+    start, end = _bounds(month)
+    qs = Collection.objects.filter(created_date__gte=start, created_date__lt=end)
+    df = pd.DataFrame(list(qs.values_list('id', *FIELDS).iterator(chunk_size=10000)), columns=['id'] + FIELDS)
+    # 지울 행은 지금 읽은 행만 — 파일을 쓰는 사이 들어온 행(늦은 수집·백필)은 다음 보관 때 옮긴다
+    read_ids = df.pop('id').tolist()
+    n_db = len(df)
+    path = _path_for(month)
+    existing = CollectionArchive.objects.filter(month=month).first()
+    if existing and os.path.exists(existing.path):
+        old = pd.read_parquet(existing.path)
+        df = pd.concat([old, df], ignore_index=True).drop_duplicates('moscom_id', keep='last')
+        path = existing.path
+    if df.empty:
+        return {'month': f'{month:%Y-%m}', 'rows': 0, 'db_rows': 0, 'purged': 0}
+
+    df['created_date'] = pd.to_datetime(df['created_date'], utc=True)
+    df = df.sort_values(['device_uuid', 'created_date', 'moscom_id']).reset_index(drop=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp'
+    df.to_parquet(tmp, compression='zstd', index=False)
+    os.replace(tmp, path)
+
+    archive, _ = CollectionArchive.objects.update_or_create(month=month, defaults={
+        'path': path, 'rows': len(df), 'size_bytes': os.path.getsize(path),
+        'min_created': df['created_date'].min().to_pydatetime(),
+        'max_created': df['created_date'].max().to_pydatetime(),
+    })
+    n_purged = 0
+    if purge:
+        for i in range(0, len(read_ids), DELETE_BATCH):
+            n_purged += Collection.objects.filter(id__in=read_ids[i:i + DELETE_BATCH]).delete()[0]
+        archive.purged = True
+        archive.save(update_fields=['purged'])
+    result = {'month': f'{month:%Y-%m}', 'rows': len(df), 'db_rows': n_db, 'purged': n_purged,
+              'size_bytes': archive.size_bytes}
+    logger.info(f'archive_month: {result}')
+    return result
+
+
+def _archives_overlapping(start=None, end=None):
+    qs = CollectionArchive.objects.all()
+    if start is not None:
+        qs = qs.filter(max_created__gte=start)
+    if end is not None:
+        qs = qs.filter(min_created__lte=end)
+    return [a for a in qs.order_by('month') if os.path.exists(a.path)]
+
+
+def _read(archive, columns, start=None, end=None, device_uuid=None, limit=None):
+    """보관 파일 1개 → DataFrame ([start, end] 포함 범위, 장비 필터). limit 이면 최신 limit 행만."""
+    import pandas as pd
+
+    filters = [('device_uuid', '==', device_uuid)] if device_uuid else []
+    if start is not None:
+        filters.append(('created_date', '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append(('created_date', '<=', pd.Timestamp(end)))
+    cols = list(dict.fromkeys(list(columns) + ['moscom_id', 'created_date']))
+    df = pd.read_parquet(archive.path, columns=cols, filters=filters or None)
+    if limit:
+        df = df.nlargest(limit, 'created_date')
+    return df
+
+
+def _row_dicts(df, columns):
+    out = []
+    for rec in df[list(columns)].to_dict('records'):
+        if 'created_date' in rec:
+            rec['created_date'] = rec['created_date'].to_pydatetime()
+        out.append(rec)
+    return out
+
+
+def collection_rows(start, end, device_uuid=None, limit=None, fields=FIELDS):
+    """[start, end] 포집 행 (최신순) — DB 와 보관 파일을 합친 결과.
+    보관 행은 'id' 가 None · 'archived' 가 True (DB 에 없으니 수정·삭제 불가).
+    limit 이면 DB·보관 파일 각각 최신 limit 행만 읽는다 (보관 파일은 최근 달부터, 더 볼 필요 없으면 멈춤)."""
+    qs = Collection.objects.filter(created_date__gte=start, created_date__lte=end)
+    if device_uuid:
+        qs = qs.filter(device_uuid=device_uuid)
+    qs = qs.order_by('-created_date')
+    db_fields = ['id'] + [f for f in fields if f != 'id']
+    rows = list((qs[:limit] if limit else qs).values(*db_fields))
+    for r in rows:
+        r['archived'] = False
+    archives = _archives_overlapping(start, end)
+    if not archives:
+        return rows
+    arch_fields = list(dict.fromkeys([f for f in db_fields if f != 'id'] + ['moscom_id']))
+    arch_rows = []
+    for a in reversed(archives):
+        # 이미 최신 limit 개를 모았고 이 달이 그보다 전이면 더 오래된 달은 볼 필요 없음
+        if limit and len(arch_rows) >= limit and a.max_created < arch_rows[limit - 1]['created_date']:
+            break
+        df = _read(a, arch_fields, start, end, device_uuid, limit=limit)
+        arch_rows.extend(_row_dicts(df, arch_fields))
+        arch_rows.sort(key=lambda r: r['created_date'], reverse=True)
+        if limit:
+            del arch_rows[limit:]
+    # 같은 moscom_id 가 DB 로 되살아난 행(백필)은 DB 행 우선 — 후보 보관 행의 id 만 조회
+    cand = [r['moscom_id'] for r in arch_rows]
+    in_db = set()
+    for i in range(0, len(cand), DELETE_BATCH):
+        in_db.update(Collection.objects.filter(moscom_id__in=cand[i:i + DELETE_BATCH])
+                     .values_list('moscom_id', flat=True))
+    for rec in arch_rows:
+        if rec['moscom_id'] not in in_db:
+            rec['id'] = None
+            rec['archived'] = True
+            rows.append(rec)
+    rows.sort(key=lambda r: r['created_date'], reverse=True)
+    return rows[:limit] if limit else rows
+
+
+def iter_collection_values(fields, chunk_size=5000):
+    """전체 포집 이력을 dict 로 순회 — 보관 파일(월 순) 다음 DB. 같은 moscom_id 는 DB 행만."""
+    archives = _archives_overlapping()
+    for a in archives:
+        start, end = _bounds(a.month)
+        in_db = set(Collection.objects.filter(created_date__gte=start, created_date__lt=end)
+                    .values_list('moscom_id', flat=True))
+        df = _read(a, fields)
+        if in_db:
+            df = df[~df['moscom_id'].isin(in_db)]
+        yield from _row_dicts(df, fields)
+    yield from Collection.objects.values(*fields).iterator(chunk_size=chunk_size)
+
+
+def collection_range():
+    """DB + 보관 전체의 (최초, 마지막) created_date. 데이터가 없으면 (None, None)."""
+    db = Collection.objects.aggregate(mn=Min('created_date'), mx=Max('created_date'))
+    ar = CollectionArchive.objects.aggregate(mn=Min('min_created'), mx=Max('max_created'))
+    mins = [v for v in (db['mn'], ar['mn']) if v is not None]
+    maxs = [v for v in (db['mx'], ar['mx']) if v is not None]
+    return (min(mins) if mins else None, max(maxs) if maxs else None)
+
+
+def hot_start():
+    """DB 만으로 완전한 구간의 시작 — 삭제(purged)된 마지막 보관 월의 다음 달 1일. 보관 없으면 None."""
+    last = CollectionArchive.objects.filter(purged=True).aggregate(mx=Max('month'))['mx']
+    return _bounds(last)[1] if last else None
+
+
+def last_count_before(device_uuid, before):
+    """보관 파일에서 device_uuid 의 before 직전 누적값. 없으면 None."""
+    for a in reversed(_archives_overlapping(end=before)):
+        df = _read(a, ['mosquito_count'], end=before, device_uuid=device_uuid)
+        df = df[df['created_date'] < before]
+        if not df.empty:
+            return int(df.sort_values(['created_date', 'moscom_id']).iloc[-1]['mosquito_count'])
+    return None
@@ -0,0 +1,175 @@
+"""MOSCOM raw 포집 병렬·재시작 가능 백필.
+
+sync.backfill_collections 는 7일 구간을 하나씩 순서대로 돌고 끝에서만 cursor 를 저장해서,
+중간에 죽으면 처음부터 다시 해야 하고 1년치는 몇 시간이 걸린다. 여기서는:
+- 구간을 ThreadPoolExecutor(workers) 로 동시에 받아 ingest
+- 구간마다 BackfillChunk 행으로 체크포인트 — 다시 돌리면 done 구간은 건너뜀
+- 구간 길이는 끝난 구간의 행 밀도(행/초)를 보고 TARGET_ROWS 근처가 되도록 조정
+- HourlyDelta 는 구간이 순서 없이 끝나므로 마지막에 영향받은 장비만 한 번 재계산
+
+사용: python manage.py moscom_sync --backfill 365 --workers 4
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import timedelta
+
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from . import deltas
+from .models import BackfillChunk, Collection
+from .sync import _get_state, _ingest_raw_stream
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_WORKERS = int(os.environ.get('MOSCOM_BACKFILL_WORKERS', '4'))
+# 구간 1개 응답이 대략 이 행 수가 되도록 구간 길이를 맞춘다
+BACKFILL_TARGET_ROWS = int(os.environ.get('MOSCOM_BACKFILL_TARGET_ROWS', '20000'))
+CHUNK_MIN = timedelta(hours=1)
+CHUNK_MAX = timedelta(days=31)
+CHUNK_RETRIES = 2
+
+
+def _clamp(span):
+    return max(CHUNK_MIN, min(CHUNK_MAX, span))
+
+
+def pending_ranges(start, end):
+    """[start, end) 중 done 체크포인트로 덮이지 않은 구간 목록 [(s, e)]."""
+    done = (BackfillChunk.objects.filter(status='done', end__gt=start, start__lt=end)
+            .order_by('start').values_list('start', 'end'))
+    gaps = []
+    cur = start
+    for s, e in done:
+        if s > cur:
+            gaps.append((cur, s))
+        cur = max(cur, e)
+    if cur < end:
+        gaps.append((cur, end))
+    return gaps
+
+
+def _run_chunk(start, end, overwrite_edited):
+    """구간 하나 fetch → ingest → 체크포인트 기록. 워커 스레드에서 실행."""
+    close_old_connections()
+    chunk, _ = BackfillChunk.objects.get_or_create(start=start, end=end)
+    t0 = time.monotonic()
+    r = {}
+    n_rows = 0
+    try:
+        for attempt in range(1, CHUNK_RETRIES + 2):
+            chunk.attempts += 1
+            try:
+                r = _ingest_raw_stream(start, end, overwrite_edited=overwrite_edited, update_deltas=False)
+                n_rows = r['rows']
+                break
+            except Exception as e:
+                if attempt > CHUNK_RETRIES:
+                    raise
+                logger.warning(f'backfill chunk {start} ~ {end} 재시도 {attempt}: {e}')
+                time.sleep(attempt)
+        chunk.status = 'done'
+        chunk.error = ''
+    except Exception as e:
+        logger.exception(f'backfill chunk {start} ~ {end} 실패')
+        chunk.status = 'failed'
+        chunk.error = str(e)[:2000]
+    finally:
+        chunk.rows = n_rows
+        chunk.created = r.get('created', 0)
+        chunk.updated = r.get('updated', 0)
+        chunk.seconds = round(time.monotonic() - t0, 3)
+        chunk.save()
+        connection.close()  # 스레드 종료 후 커넥션이 남지 않도록
+    return {
+        'start': start, 'end': end, 'status': chunk.status, 'rows': n_rows,
+        'created': chunk.created, 'updated': chunk.updated, 'skipped': r.get('skipped', 0),
+        'seconds': chunk.seconds, 'error': chunk.error,
+    }
+
+
+def backfill_parallel(days=30, workers=None, chunk_days=7, resume=True,
+                      overwrite_edited=False, progress=None):
+    """과거 N일 병렬 백필.
+    resume=True: 이전 실행에서 done 으로 남은 구간은 건너뜀. False 면 범위 내 체크포인트 삭제 후 전체.
+    progress(chunk_result, totals): 구간 하나 끝날 때마다 호출 (management command 진행 출력용).
+    """
+    now = timezone.now()
+    start = now - timedelta(days=days)
+    workers = max(1, workers or BACKFILL_WORKERS)
+    if not resume:
+        BackfillChunk.objects.filter(end__gt=start, start__lt=now).delete()
+
+    queue = pending_ranges(start, now)
+    todo_sec = sum((e - s).total_seconds() for s, e in queue) or 1.0
+    totals = {
+        'created': 0, 'updated': 0, 'skipped': 0, 'rows': 0, 'chunks': 0, 'failed': 0,
+        'resumed_pct': round(100 * (1 - todo_sec / max((now - start).total_seconds(), 1)), 1),
+        'pct': 0.0, 'workers': workers,
+    }
+    first_start = queue[0][0] if queue else None
+    step = _clamp(timedelta(days=chunk_days))
+    density = None  # 행/초 (지수 평균)
+    done_sec = 0.0
+    ingest_sec = 0.0
+    t0 = time.monotonic()
+
+    def _take():
+        if not queue:
+            return None
+        s, e = queue[0]
+        size = step if density is None else _clamp(timedelta(seconds=BACKFILL_TARGET_ROWS / max(density, 1e-6)))
+        ce = min(s + size, e)
+        if ce >= e:
+            queue.pop(0)
+        else:
+            queue[0] = (ce, e)
+        return s, ce
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='moscom-backfill') as pool:
+        running = {}
+        while True:
+            while len(running) < workers:
+                nxt = _take()
+                if nxt is None:
+                    break
+                running[pool.submit(_run_chunk, nxt[0], nxt[1], overwrite_edited)] = nxt
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for f in finished:
+                s, e = running.pop(f)
+                r = f.result()
+                span = (e - s).total_seconds()
+                done_sec += span
+                totals['chunks'] += 1
+                if r['status'] != 'done':
+                    totals['failed'] += 1
+                else:
+                    for k in ('created', 'updated', 'skipped', 'rows'):
+                        totals[k] += r[k]
+                    ingest_sec += r['seconds']
+                    d = r['rows'] / max(span, 1)
+                    density = d if density is None else 0.5 * density + 0.5 * d
+                totals['pct'] = round(100 * min(done_sec / todo_sec, 1.0), 1)
+                if progress is not None:
+                    progress(r, totals)
+
+    if first_start is not None:
+        uuids = (Collection.objects.filter(created_date__gte=first_start)
+                 .values_list('device_uuid', flat=True).distinct())
+        totals['delta_hours'] = deltas.update_hourly_deltas({u: first_start for u in uuids})['hours']
+
+    if totals['failed'] == 0:
+        state = _get_state()
+        if state.collections_synced_until is None or state.collections_synced_until < now:
+            state.collections_synced_until = now
+            state.save(update_fields=['collections_synced_until'])
+
+    totals['seconds'] = round(time.monotonic() - t0, 1)
+    totals['rows_per_sec'] = round(totals['rows'] / ingest_sec, 1) if ingest_sec > 0 else 0
+    totals['overwrite_edited'] = overwrite_edited
+    logger.info(f'backfill_parallel: {totals}')
+    return totals
@@ -0,0 +1,171 @@
+"""누적 카운터 → 구간 증가량(delta) 엔진.
+
+Collection.mosquito_count 는 장비가 리셋될 때까지 쌓이는 누적값이다.
+그래서 Sum() 하면 몇 배로 부풀려진다. 여기서는 장비별로 시간순 정렬한 raw 행을
+numpy 로 한 번에 차분해서 행 사이 증가량을 구하고, 시간(UTC hour) 단위로 모아 HourlyDelta 에 저장한다.
+
+차분 규칙 (장비별, created_date 오름차순):
+- 같은 시각 중복 행 → moscom_id 가 큰(나중) 행 하나만 사용
+- reset=True 행 또는 직전보다 값이 작아진 행 → 카운터 재시작으로 보고 delta = 그 행의 값
+- 그 외 → delta = 현재값 - 직전값
+
+사용:
+- update_hourly_deltas({uuid: since_dt}) : _ingest_raw_batch 직후 영향받은 구간만 재계산
+- rebuild_hourly_deltas()                 : 전체 재계산 (manage.py moscom_sync --rebuild-deltas)
+"""
+import logging
+import zlib
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.db import connection, transaction
+
+from . import archive
+from .models import Collection, HourlyDelta
+
+logger = logging.getLogger(__name__)
+
+HOUR_NS = np.int64(3600 * 10**9)
+
+
+def compute_deltas(times_ns, counts, resets, moscom_ids=None, baseline=None):
+    """누적값 배열 → (times_ns, deltas, restarts) — 시간순 정렬·중복 시각 제거 후.
+    times_ns: int64 epoch ns, counts: int, resets: bool, baseline: 첫 행 직전 누적값(없으면 None).
+    restarts: 카운터 재시작으로 판단한 행 (reset 플래그 또는 값 감소).
+    """
+    times_ns = np.asarray(times_ns, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    resets = np.asarray(resets, dtype=bool)
+    if times_ns.size == 0:
+        return times_ns, counts, resets
+    ids = np.asarray(moscom_ids if moscom_ids is not None else np.arange(times_ns.size), dtype=np.int64)
+
+    # 시각, moscom_id 순 정렬 후 같은 시각은 마지막 행만 남김 (out-of-order / 중복 행 방어)
+    order = np.lexsort((ids, times_ns))
+    times_ns, counts, resets = times_ns[order], counts[order], resets[order]
+    keep = np.ones(times_ns.size, dtype=bool)
+    keep[:-1] = times_ns[1:] != times_ns[:-1]
+    times_ns, counts, resets = times_ns[keep], counts[keep], resets[keep]
+
+    prev = np.empty_like(counts)
+    prev[1:] = counts[:-1]
+    prev[0] = baseline if baseline is not None else 0
+    restart = resets | (counts < prev)
+    deltas = np.where(restart, counts, counts - prev)
+    if baseline is None:
+        # 기준값을 모르는 첫 행은 구간 증가량을 알 수 없음 — 리셋 행이 아니면 0 으로 둔다
+        restart[0] = resets[0]
+        deltas[0] = counts[0] if resets[0] else 0
+    return times_ns, deltas, restart
+
+
+def _hourly_rows(device_uuid, rows, baseline, since_hour_ns):
+    """rows: [(created_date, mosquito_count, reset, moscom_id)] → HourlyDelta 객체 목록."""
+    if not rows:
+        return []
+    times = np.array([int(r[0].timestamp() * 1e9) for r in rows], dtype=np.int64)
+    counts = np.array([r[1] or 0 for r in rows], dtype=np.int64)
+    resets = np.array([bool(r[2]) for r in rows], dtype=bool)
+    ids = np.array([r[3] for r in rows], dtype=np.int64)
+    t, d, restarts = compute_deltas(times, counts, resets, ids, baseline=baseline)
+
+    hours = (t // HOUR_NS) * HOUR_NS
+    mask = hours >= since_hour_ns
+    hours, d, restarts = hours[mask], d[mask], restarts[mask]
+    if hours.size == 0:
+        return []
+    uniq, inv = np.unique(hours, return_inverse=True)
+    sums = np.bincount(inv, weights=d, minlength=uniq.size)
+    events = np.bincount(inv, minlength=uniq.size)
+    n_resets = np.bincount(inv, weights=restarts.astype(np.int64), minlength=uniq.size)
+
+    return [
+        HourlyDelta(
+            device_uuid=device_uuid,
+            hour=datetime.fromtimestamp(int(h) // 10**9, tz=dt_timezone.utc),
+            delta=int(s), events=int(e), resets=int(r),
+        )
+        for h, s, e, r in zip(uniq, sums, events, n_resets)
+    ]
+
+
+def _floor_hour(dt):
+    return dt.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+# pg_advisory_xact_lock(namespace, key) 의 namespace — 장비별 HourlyDelta 재계산
+_LOCK_NS = 0x4844  # 'HD'
+
+
+def _lock_device(device_uuid):
+    """같은 장비 재계산끼리 직렬화 (동기화 + 관리자 수정·삭제가 겹칠 때). 트랜잭션 끝에 자동 해제."""
+    if connection.vendor != 'postgresql':
+        return
+    key = zlib.crc32(device_uuid.encode()) - 2 ** 31  # int4 범위
+    with connection.cursor() as cur:
+        cur.execute('SELECT pg_advisory_xact_lock(%s, %s)', [_LOCK_NS, key])
+
+
+def update_device_deltas(device_uuid, since=None):
+    """장비 하나의 since 시각(이 속한 시간대)부터 HourlyDelta 재계산. 반환: 저장 행 수.
+    장비별 advisory lock 안에서 읽고 쓴다 — 뒤에 온 재계산은 앞의 것이 커밋한 뒤의 Collection 을 본다.
+    저장은 (device_uuid, hour) upsert + 더 이상 안 나오는 시간만 삭제."""
+    with transaction.atomic():
+        _lock_device(device_uuid)
+        qs = Collection.objects.filter(device_uuid=device_uuid)
+        baseline = None
+        if since is not None:
+            since_hour = _floor_hour(since)
+            prev = (qs.filter(created_date__lt=since_hour)
+                    .order_by('-created_date', '-moscom_id')
+                    .values_list('mosquito_count', flat=True).first())
+            if prev is None:
+                # 직전 행이 Parquet 보관으로 옮겨진 경우
+                prev = archive.last_count_before(device_uuid, since_hour)
+            baseline = prev
+            qs = qs.filter(created_date__gte=since_hour)
+            since_hour_ns = int(since_hour.timestamp() * 1e9)
+        else:
+            since_hour = None
+            since_hour_ns = np.iinfo(np.int64).min
+        rows = list(qs.order_by('created_date', 'moscom_id')
+                    .values_list('created_date', 'mosquito_count', 'reset', 'moscom_id')
+                    .iterator(chunk_size=5000))
+        objs = _hourly_rows(device_uuid, rows, baseline, since_hour_ns)
+        stale = HourlyDelta.objects.filter(device_uuid=device_uuid)
+        if since_hour is not None:
+            stale = stale.filter(hour__gte=since_hour)
+        stale.exclude(hour__in=[o.hour for o in objs]).delete()
+        if objs:
+            HourlyDelta.objects.bulk_create(
+                objs, batch_size=1000, update_conflicts=True,
+                unique_fields=['device_uuid', 'hour'], update_fields=['delta', 'events', 'resets'],
+            )
+    return len(objs)
+
+
+def update_hourly_deltas(since_by_uuid):
+    """{device_uuid: 가장 이른 변경 시각} → 장비별 증분 재계산. 반환: {'devices', 'hours'}."""
+    n_hours = 0
+    for uuid, since in (since_by_uuid or {}).items():
+        if not uuid:
+            continue
+        try:
+            n_hours += update_device_deltas(uuid, since)
+        except Exception:
+            logger.exception('hourly delta update failed: %s', uuid)
+    return {'devices': len(since_by_uuid or {}), 'hours': n_hours}
+
+
+def rebuild_hourly_deltas(device_uuids=None):
+    """전체(또는 지정 장비) HourlyDelta 재계산.
+    Collection 일부가 Parquet 로 보관(DB 삭제)됐으면 DB 에 남은 구간부터만 — 보관 월의 HourlyDelta 는 유지.
+    """
+    if device_uuids is None:
+        device_uuids = list(Collection.objects.values_list('device_uuid', flat=True).distinct())
+    since = archive.hot_start()
+    n_hours = 0
+    for uuid in device_uuids:
+        n_hours += update_device_deltas(uuid, since=since)
+    logger.info('rebuild_hourly_deltas: devices=%d hours=%d', len(device_uuids), n_hours)
+    return {'devices': len(device_uuids), 'hours': n_hours}
@@ -0,0 +1,315 @@
+"""AI 예측 학습용 일별 피처 테이블 (장비 × 날짜, 월별 Parquet).
+
+moscom_train 이 매일 전 기간 일별값을 다시 받아 lag/MA 행을 Python 루프로 다시 만들던 것을,
+확정된 날(SyncState.daily_final_until)의 행만 동기화 직후 한 번 만들어 쌓아 둔다.
+학습은 load_table() 한 번으로 전체를 DataFrame 한 덩어리로 읽는다.
+
+- append_finalized(): 동기화 후 Celery 태스크(moscom.append_features) — built_until 다음날부터
+  확정일까지의 행만 DailyCount 에서 만들어 FEATURE_DIR/YYYY-MM.parquet 에 덧붙인다 (처음이면 전 기간).
+- invalidate_from(day): 확정 구간 재동기화 시 — built_until 을 day 전날로 되돌린다.
+  lag 가 뒤쪽 날짜에 번지므로 day 이후 행은 다음 append 때 전부 다시 만든다.
+- load_table(): built_until 까지의 전체 행 (장비, 날짜 순).
+
+append_finalized · rebuild · invalidate_from 은 cache.add 락(LOCK_KEY) 하나로 직렬화한다 — 동기화 후 태스크와
+moscom_train(moscom.training.load_dataset) 이 겹쳐도 meta 와 월 파일이 어긋나지 않게. 임시 파일 이름엔 pid 를 붙인다.
+락 값은 호출마다 고유 토큰 — 보유 중엔 백그라운드 스레드가 TTL 을 늘리고, 풀 때·늘릴 때 모두 값이 아직 내 토큰일 때만
+(Redis 면 Lua 로 원자적으로) 한다. 오래 걸린 재생성이 다른 쪽이 새로 잡은 락을 지우는 일이 없게.
+
+행 규칙은 예전 moscom_train 과 같다 — 장비의 일별 기록 순서로 lag1/2/3/7 (직전 기록 k개 전),
+ma3/ma7 (직전 3/7개 평균), lag3 을 못 채우는 앞 3개 기록은 행 없음, lag7 이 없으면 ma7 로.
+기상은 그날 관측만 담고(없으면 NaN), 장비 현재값·기본값 대체와 권역/시도 one-hot 은 학습 때 붙인다.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+FEATURE_DIR = os.environ.get('MOSCOM_FEATURE_DIR') or os.path.join(settings.BASE_DIR, 'moscom_archive', 'features')
+META_FILE = 'meta.json'
+# 행 규칙이 바뀌면 올린다 — 저장본 버전이 다르면 전 기간 다시 만든다
+FEATURE_VERSION = 1
+# 증분 추가 시 lag 용으로 읽을 직전 기간 (이 안에 기록이 7개 안 되는 장비만 전 기간 조회)
+LOOKBACK_DAYS = 30
+# 피처 테이블 쓰기 락 — 보유 상한(초) / 다른 쪽이 쓰는 중일 때 기다릴 시간(초)
+LOCK_KEY = 'moscom:features:lock'
+LOCK_TTL = 30 * 60
+LOCK_WAIT = 10 * 60
+# 락 값이 token 일 때만 지우기 / TTL 늘리기
+_LUA_RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+_LUA_EXTEND = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('expire', KEYS[1], ARGV[2]) end return 0"
+
+LAG_COLS = ['lag1', 'lag2', 'lag3', 'lag7', 'ma3', 'ma7']
+CAL_COLS = ['weekday', 'is_weekend', 'month', 'day']
+WEATHER_COLS = ['temperature', 'humidity', 'precipitation', 'wind_speed']
+COLUMNS = ['device_uuid', 'date', 'target'] + LAG_COLS + CAL_COLS + WEATHER_COLS
+
+
+def _path_for(month):
+    return os.path.join(FEATURE_DIR, f'{month:%Y-%m}.parquet')
+
+
+def read_meta():
+    try:
+        with open(os.path.join(FEATURE_DIR, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if meta.get('version') != FEATURE_VERSION:
+        return {}
+    return meta
+
+
+def _tmp(path):
+    return f'{path}.{os.getpid()}.tmp'
+
+
+def _lock_redis():
+    """(redis 클라이언트, 실제 키) — default 캐시가 RedisCache 가 아니면 None (LocMem 등)."""
+    client = getattr(cache, '_cache', None)
+    if not hasattr(client, 'get_client'):
+        return None
+    key = cache.make_and_validate_key(LOCK_KEY)
+    return client.get_client(key, write=True), key
+
+
+def _if_owner(token, raw, op):
+    """락 값이 아직 token 이면 op('release' | 'extend'). raw: 잡은 직후 읽어 둔 저장 값 (직렬화된 bytes)."""
+    rc = _lock_redis()
+    if rc is not None and raw is not None:
+        client, key = rc
+        if op == 'release':
+            return bool(client.eval(_LUA_RELEASE, 1, key, raw))
+        return bool(client.eval(_LUA_EXTEND, 1, key, raw, LOCK_TTL))
+    if cache.get(LOCK_KEY) != token:
+        return False
+    return cache.delete(LOCK_KEY) if op == 'release' else cache.touch(LOCK_KEY, LOCK_TTL)
+
+
+@contextmanager
+def _locked():
+    """피처 테이블 쓰기 락. 다른 프로세스가 쓰는 중이면 LOCK_WAIT 까지 기다린 뒤 TimeoutError.
+    보유 중엔 LOCK_TTL/3 마다 TTL 을 늘린다 (전 기간 재생성이 LOCK_TTL 을 넘겨도 락이 풀리지 않게)."""
+    token = f'{os.getpid()}:{uuid.uuid4().hex}'
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(LOCK_KEY, token, LOCK_TTL):
+        if time.monotonic() > deadline:
+            raise TimeoutError('feature table is locked by another writer')
+        time.sleep(1.0)
+    rc = _lock_redis()
+    raw = rc[0].get(rc[1]) if rc is not None else None
+    stop = threading.Event()
+
+    def _heartbeat():
+        while not stop.wait(LOCK_TTL / 3):
+            if not _if_owner(token, raw, 'extend'):
+                logger.error('feature table lock lost — another writer may interleave')
+                return
+
+    beat = threading.Thread(target=_heartbeat, name='feature-table-lock', daemon=True)
+    beat.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        beat.join()
+        if not _if_owner(token, raw, 'release'):
+            logger.warning('feature table lock was no longer ours at release')
+
+
+def _write_meta(meta):
+    os.makedirs(FEATURE_DIR, exist_ok=True)
+    path = os.path.join(FEATURE_DIR, META_FILE)
+    tmp = _tmp(path)
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({**meta, 'version': FEATURE_VERSION}, f)
+    os.replace(tmp, path)
+
+
+def built_until():
+    v = read_meta().get('built_until')
+    return date.fromisoformat(v) if v else None
+
+
+def _final_until():
+    from .models import SyncState
+    return SyncState.objects.filter(id=1).values_list('daily_final_until', flat=True).first()
+
+
+# ─ 행 만들기 ─────────────────────────────────
+
+def _row(prior, target_d, target_c):
+    """직전 기록 카운트 prior (오름차순, 최대 7개) + 그날 값 → 피처 dict. lag3 못 채우면 None."""
+    if len(prior) < 3:
+        return None
+    p7 = prior[-7:]
+    ma7 = sum(p7) / len(p7)
+    wd = target_d.weekday()
+    return {
+        'target': target_c,
+        'lag1': prior[-1], 'lag2': prior[-2], 'lag3': prior[-3],
+        'lag7': prior[-7] if len(prior) >= 7 else ma7,   # lag7 없으면 ma7 로 imputation
+        'ma3': sum(prior[-3:]) / 3, 'ma7': ma7,
+        'weekday': wd, 'is_weekend': 1 if wd >= 5 else 0,
+        'month': target_d.month, 'day': target_d.day,
+    }
+
+
+def _series(first, last):
+    """DailyCount [first, last] 의 장비 → [(date, count)] (오름차순). 직전 기록 보충 포함."""
+    from .models import DailyCount
+
+    lo = first - timedelta(days=LOOKBACK_DAYS)
+    series = defaultdict(list)
+    qs = (DailyCount.objects.filter(date__gte=lo, date__lte=last)
+          .order_by('device_uuid', 'date').values_list('device_uuid', 'date', 'mosquito_count'))
+    for u, d, c in qs.iterator(chunk_size=10000):
+        series[u].append((d, c))
+    # lookback 안에 직전 기록이 7개 안 되는 장비 — 그 이전 기록을 더 읽는다 (신규·공백 장비)
+    short = [u for u, s in series.items() if sum(1 for d, _ in s if d < first) < 7]
+    if short:
+        more = defaultdict(list)
+        qs = (DailyCount.objects.filter(device_uuid__in=short, date__lt=lo)
+              .order_by('device_uuid', 'date').values_list('device_uuid', 'date', 'mosquito_count'))
+        for u, d, c in qs.iterator(chunk_size=10000):
+            more[u].append((d, c))
+        for u, s in more.items():
+            series[u] = s + series[u]
+    return series
+
+
+def build_rows(first, last):
+    """[first, last] 날짜의 피처 행 DataFrame (COLUMNS)."""
+    import pandas as pd
+    from .models import Device
+    from .weather import daily_summary
+
+    series = _series(first, last)
+    cell_by_uuid = dict(Device.objects.filter(device_uuid__in=list(series))
+                        .values_list('device_uuid', 'weather_cell'))
+    wx = daily_summary(list(cell_by_uuid.values()), first, last)
+    rows = []
+    for u, s in series.items():
+        counts = [c for _, c in s]
+        cell = cell_by_uuid.get(u) or ''
+        for i, (d, c) in enumerate(s):
+            if d < first:
+                continue
+            rec = _row(counts[max(0, i - 7):i], d, c)
+            if rec is None:
+                continue
+            w = wx.get((cell, d)) or {}
+            rec.update({'device_uuid': u, 'date': d, **{k: w.get(k) for k in WEATHER_COLS}})
+            rows.append(rec)
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    df[WEATHER_COLS] = df[WEATHER_COLS].astype('float64')
+    return df
+
+
+# ─ 저장 / 조회 ───────────────────────────────
+
+def _months(first, last):
+    m = date(first.year, first.month, 1)
+    while m <= last:
+        yield m
+        m = date(m.year + (m.month == 12), m.month % 12 + 1, 1)
+
+
+def _write_months(df, first):
+    """first 이후 행을 df 로 바꿔 월 파일마다 다시 쓴다 (first 이전 행은 유지)."""
+    import pandas as pd
+
+    os.makedirs(FEATURE_DIR, exist_ok=True)
+    if df.empty:
+        months = [date(first.year, first.month, 1)]
+    else:
+        months = list(_months(first, max(df['date'].max(), first)))
+    # first 이후의 기존 월 파일(재생성 구간) 도 비워야 한다
+    for name in os.listdir(FEATURE_DIR):
+        if name.endswith('.parquet'):
+            m = date.fromisoformat(name[:7] + '-01')
+            if m > date(first.year, first.month, 1) and m not in months:
+                months.append(m)
+    for m in sorted(months):
+        path = _path_for(m)
+        parts = []
+        if os.path.exists(path):
+            old = pd.read_parquet(path)
+            parts.append(old[old['date'] < first])
+        parts.append(df[(df['date'] >= m) & (df['date'] < date(m.year + (m.month == 12), m.month % 12 + 1, 1))])
+        out = pd.concat(parts, ignore_index=True).sort_values(['device_uuid', 'date'], kind='stable')
+        if out.empty:
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+        tmp = _tmp(path)
+        out.to_parquet(tmp, compression='zstd', index=False)
+        os.replace(tmp, path)
+
+
+def append_finalized(until=None):
+    """built_until 다음날부터 확정일(until)까지 행 추가. 반환: {'rows', 'from', 'until'}.
+    다른 쪽이 쓰는 중이면 끝날 때까지 기다렸다가 남은 날만 채운다."""
+    with _locked():
+        return _append(until)
+
+
+def _append(until=None):
+    from django.db.models import Min
+    from .models import DailyCount
+
+    until = until or _final_until()
+    if until is None:
+        return {'rows': 0, 'from': None, 'until': None}
+    done = built_until()
+    if done is not None:
+        first = done + timedelta(days=1)
+    else:
+        first = DailyCount.objects.aggregate(mn=Min('date'))['mn']
+    if first is None or first > until:
+        return {'rows': 0, 'from': None, 'until': done.isoformat() if done else None}
+    df = build_rows(first, until)
+    df['date'] = df['date'].astype('object')
+    _write_months(df, first)
+    _write_meta({'built_until': until.isoformat()})
+    result = {'rows': len(df), 'from': first.isoformat(), 'until': until.isoformat()}
+    logger.info(f'feature table append: {result}')
+    return result
+
+
+def rebuild():
+    """전 기간 다시 만들기."""
+    with _locked():
+        _write_meta({'built_until': None})
+        return _append()
+
+
+def invalidate_from(day):
+    """day(포함) 이후 행을 무효로 — 다음 append_finalized 가 그날부터 다시 만든다."""
+    with _locked():
+        done = built_until()
+        if done is not None and day <= done:
+            _write_meta({'built_until': (day - timedelta(days=1)).isoformat()})
+            logger.info(f'feature table invalidated from {day}')
+
+
+def load_table():
+    """built_until 까지 전체 피처 행 DataFrame (장비, 날짜 순). 없으면 빈 DataFrame."""
+    import pandas as pd
+
+    done = built_until()
+    files = sorted(n for n in os.listdir(FEATURE_DIR) if n.endswith('.parquet')) if os.path.isdir(FEATURE_DIR) else []
+    if done is None or not files:
+        return pd.DataFrame(columns=COLUMNS)
+    df = pd.concat([pd.read_parquet(os.path.join(FEATURE_DIR, n)) for n in files], ignore_index=True)
+    df = df[df['date'] <= done]
+    return df.sort_values(['device_uuid', 'date'], kind='stable').reset_index(drop=True)
@@ -8,6 +8,7 @@
   python manage.py backfill_predictions --days 30  # 최근 30일만
   python manage.py backfill_predictions --clear    # 기존 backfill 삭제 후 재생성
 """
+import math
 from datetime import datetime, timedelta, timezone
 from collections import defaultdict
 
@@ -71,7 +72,7 @@ class Command(BaseCommand):
             all_dates = all_dates[-opts['days']:]
         self.stdout.write(f'대상 기간: {all_dates[0]} ~ {all_dates[-1]} ({len(all_dates)}일), 장비 {len(devices)}대')
 
-        # 3) 날짜별로 backcast 실행
+        # 3) 날짜별로 backcast 실행 (날짜마다 모델 호출 1회)
         created = skipped = 0
         date_objs = [datetime.strptime(s, '%Y-%m-%d').date() for s in all_dates]
         date_set = set(all_dates)
@@ -83,38 +84,49 @@ class Command(BaseCommand):
             if not targets:
                 continue
 
-            batch = []
+            # snap 이하의 실측만 (누출 방지) — 장비 전체 × 대상일을 backcast_batch 한 번으로
+            hists = {}
             for u, meta in devices.items():
                 dmap = daily.get(u) or {}
-                # snap 이하의 실측만 (누출 방지)
                 hist = [{'date': ds, 'count': dmap[ds]} for ds in all_dates
                         if ds <= snap.isoformat() and ds in dmap]
-                if len(hist) < 4:
-                    continue
-                for td in targets:
-                    pred = predictor.backcast_for_date(
-                        hist, td, region_code=meta['region_code'], sido=meta['sido'], weather={})
-                    if pred is None:
-                        continue
-                    actual = dmap.get(td.isoformat())
-                    counts = [h['count'] for h in hist]
-                    err = (actual - pred) if actual is not None else None
-                    batch.append(PredictionLog(
-                        device_uuid=u, device_name=meta['name'], region_name=meta['region_name'],
-                        snapshot_date=snap, target_date=td, horizon_days=(td - snap).days,
-                        predicted=pred, predicted_raw=pred, predicted_index=None, grade='',
-                        remedy_factor=1.0,
-                        lag1=counts[-1] if counts else 0,
-                        lag7=counts[-7] if len(counts) >= 7 else (counts[0] if counts else 0),
-                        ma3=round(sum(counts[-3:]) / min(3, len(counts)), 1),
-                        ma7=round(sum(counts[-7:]) / min(7, len(counts)), 1),
-                        actual=actual,
-                        error=err,
-                        abs_error_pct=(round(abs(err) / max(1, actual) * 100, 1)
-                                       if (actual is not None and err is not None) else None),
-                        matched_at=(datetime.now(timezone.utc) if actual is not None else None),
-                        model_version='backfill',
-                    ))
+                if len(hist) >= 4:
+                    hists[u] = hist
+            if not hists:
+                continue
+            bc = predictor.backcast_batch(
+                [{'uuid': u, 'history': h, 'region_code': devices[u]['region_code'],
+                  'sido': devices[u]['sido'], 'weather': {}} for u, h in hists.items()],
+                targets)
+
+            batch = []
+            for r in bc:
+                u = r['uuid']
+                meta = devices[u]
+                dmap = daily.get(u) or {}
+                td = datetime.strptime(r['date'], '%Y-%m-%d').date()
+                pred = int(r['predicted'])
+                actual = dmap.get(r['date'])
+                counts = [h['count'] for h in hists[u]]
+                err = (actual - pred) if actual is not None else None
+                bands = {f'predicted_p{q}': (None if math.isnan(r[f'p{q}']) else int(round(float(r[f'p{q}']))))
+                         for q in predictor.QUANTILES}
+                batch.append(PredictionLog(
+                    device_uuid=u, device_name=meta['name'], region_name=meta['region_name'],
+                    snapshot_date=snap, target_date=td, horizon_days=(td - snap).days,
+                    predicted=pred, predicted_raw=pred, predicted_index=None, grade='',
+                    remedy_factor=1.0, **bands,
+                    lag1=counts[-1] if counts else 0,
+                    lag7=counts[-7] if len(counts) >= 7 else (counts[0] if counts else 0),
+                    ma3=round(sum(counts[-3:]) / min(3, len(counts)), 1),
+                    ma7=round(sum(counts[-7:]) / min(7, len(counts)), 1),
+                    actual=actual,
+                    error=err,
+                    abs_error_pct=(round(abs(err) / max(1, actual) * 100, 1)
+                                   if (actual is not None and err is not None) else None),
+                    matched_at=(datetime.now(timezone.utc) if actual is not None else None),
+                    model_version='backfill',
+                ))
             if batch:
                 objs = PredictionLog.objects.bulk_create(batch, ignore_conflicts=True)
                 created += len(batch)
@@ -0,0 +1,44 @@
+"""Collection 닫힌 달 → Parquet 보관 management command.
+
+사용법:
+  python manage.py moscom_archive                     # 최근 3개월(MOSCOM_COLLECTION_HOT_MONTHS) 이전 달 전부
+  python manage.py moscom_archive --keep-months 6
+  python manage.py moscom_archive --month 2026-03     # 한 달만 (이미 보관된 달이면 합쳐서 다시 씀)
+  python manage.py moscom_archive --no-purge          # 파일만 쓰고 DB 행은 그대로
+  python manage.py moscom_archive --dry-run           # 대상 월만 출력
+"""
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from moscom.archive import HOT_MONTHS, archive_month, closed_months
+
+
+class Command(BaseCommand):
+    help = 'Collection 지난 달을 Parquet 파일로 보관하고 DB 에서 삭제'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-months', type=int, default=HOT_MONTHS, help=f'DB 에 남길 최근 개월 수 (기본 {HOT_MONTHS})')
+        parser.add_argument('--month', type=str, default='', help='특정 월만 보관 (YYYY-MM)')
+        parser.add_argument('--no-purge', action='store_true', help='Parquet 만 쓰고 DB 행은 지우지 않음')
+        parser.add_argument('--dry-run', action='store_true', help='대상 월만 출력')
+
+    def handle(self, *args, **opts):
+        if opts['month']:
+            try:
+                y, m = (int(x) for x in opts['month'].split('-'))
+                months = [date(y, m, 1)]
+            except ValueError:
+                raise CommandError('--month 는 YYYY-MM 형식')
+        else:
+            months = closed_months(keep_months=opts['keep_months'])
+        if not months:
+            self.stdout.write('보관할 달 없음')
+            return
+        self.stdout.write(f'대상: {", ".join(f"{m:%Y-%m}" for m in months)}')
+        if opts['dry_run']:
+            return
+        for m in months:
+            r = archive_month(m, purge=not opts['no_purge'])
+            self.stdout.write(self.style.SUCCESS(f'{m:%Y-%m}: {json.dumps(r, ensure_ascii=False)}'))
@@ -0,0 +1,178 @@
+"""predict_for_devices 배치 엔진 벤치마크 — 예전 장비×날짜 1행 predict 루프와 비교.
+
+가상 장비(현재 모델의 region/sido one-hot 에서 무작위, 30일 history, 기상값)로
+_forecast_batch (날짜당 predict 1회) 와 예전 방식(장비·날짜마다 1행 DataFrame → predict)을 재고,
+예측값이 같은지도 확인한다. 예전 방식은 --legacy-sample 대 까지만 실제로 돌리고 장비 수에 비례로 환산.
+--engine 이면 같은 입력으로 sklearn predict 와 core.tree_engine 컴파일본 predict 도 비교한다
+(cold 로드 · 1행 호출 · 장비 전체 1회 호출 시간, 최대 오차).
+
+사용법:
+  python manage.py moscom_bench_predict                          # 50, 500, 5000 대 × 3일
+  python manage.py moscom_bench_predict --sizes 50,500 --days 7
+  python manage.py moscom_bench_predict --engine
+
+측정 예 (1 CPU, sklearn 1.6.1 · numpy 2.4.6 · pandas 2.2.2, 가상 장비 + moscom_train RandomForest 설정
+200 trees · depth 12 · 피처 35 로 학습한 가상 v2 모델, --sizes 50,500,5000 --days 3 --legacy-sample 200 --engine):
+
+    장비   배치(s)   예전(s)    배속   일치
+      50    0.142     6.583   46.4x   50/50
+     500    0.253    79.068  312.1x   200/200 (200대 실측 환산)
+    5000    1.428   760.725  532.7x   200/200 (200대 실측 환산)
+
+    트리 엔진 cold 로드: joblib 0.156s · 컴파일본 0.002s
+      행  sklearn(ms)  compiled(ms)   배속   최대오차
+       1      14.66          0.27    54.2x  4.26e-14
+      50      18.82          6.41     2.9x  8.53e-14
+     500      37.85         35.80     1.1x  1.42e-13
+    5000     158.61        345.70     0.5x  1.71e-13
+
+컴파일 엔진은 cold 로드·작은 호출에서 이득이고, 호출당 500행 안팎부터는 sklearn(스레드 predict)과 같거나 느리다
+— 그래서 MOSCOM_TREE_ENGINE 기본값은 sklearn.
+"""
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+
+def _fleet(n, feature_cols, seed=0):
+    rnd = random.Random(seed)
+    regions = [c[len('region_code_'):] for c in feature_cols if c.startswith('region_code_')] or ['']
+    sidos = [c[len('sido_'):] for c in feature_cols if c.startswith('sido_')] or ['']
+    start = date.today() - timedelta(days=30)
+    out = []
+    for i in range(n):
+        base = rnd.uniform(0, 120)
+        out.append({
+            'uuid': f'bench-{i}', 'name': f'bench {i}', 'region': '',
+            'history': [{'date': (start + timedelta(days=k)).isoformat(),
+                         'count': max(0, int(rnd.gauss(base, base * 0.4 + 1)))}
+                        for k in range(rnd.choice([0, 2, 5, 30, 30, 30]))],
+            'region_code': rnd.choice(regions), 'sido': rnd.choice(sidos),
+            'weather': {'temperature': rnd.uniform(15, 32), 'humidity': rnd.uniform(40, 95),
+                        'precipitation': rnd.choice([0.0, 0.0, 2.5, 12.0]), 'wind_speed': rnd.uniform(0, 6)},
+        })
+    return out
+
+
+def _legacy(devs, future_dates):
+    """예전 predict_for_devices 루프 그대로 (v2) — 장비·날짜마다 1행 DataFrame."""
+    import numpy as np
+    import pandas as pd
+    from core.predictor import _build_v2_row, _load
+
+    model, feature_cols, ver, idx_model, meta = _load()
+    out = []
+    for dev in devs:
+        hist = [{'date': h['date'], 'count': h['count']} for h in dev['history']]
+        ys = []
+        for td in future_dates:
+            row = _build_v2_row(hist, td, dev.get('region_code') or '', dev.get('sido') or '',
+                                dev.get('weather') or {})
+            X = pd.DataFrame([row])
+            for col in feature_cols:
+                if col not in X.columns:
+                    X[col] = 0
+            X = X[feature_cols].astype('float64')
+            y = int(round(float(np.maximum(model.predict(X)[0], 0))))
+            if idx_model is not None:
+                idx_model.predict(X)
+            ys.append(y)
+            hist.append({'date': td.isoformat(), 'count': y})
+        out.append(ys)
+    return out
+
+
+def _best(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None or dt < best else best
+    return best
+
+
+def _step_matrix(devs, feature_cols, td):
+    """배치 엔진 첫날 입력 행렬 (v2)."""
+    import pandas as pd
+    from core.predictor import _v2_static, _v2_step_matrix, _v2_tail
+
+    static, pos = _v2_static(devs, feature_cols)
+    tail, n = _v2_tail([[h['count'] for h in dev['history']] for dev in devs])
+    return pd.DataFrame(_v2_step_matrix(static, pos, tail, n, td), columns=feature_cols)
+
+
+class Command(BaseCommand):
+    help = 'AI 예측 배치 엔진 vs 예전 1행 루프 속도 비교'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=str, default='50,500,5000', help='장비 수 목록 (쉼표)')
+        parser.add_argument('--days', type=int, default=3, help='예측 일수 (기본 3)')
+        parser.add_argument('--legacy-sample', type=int, default=200, help='예전 방식 실측 최대 장비 수')
+        parser.add_argument('--engine', action='store_true', help='sklearn vs 컴파일 트리 엔진 비교')
+
+    def handle(self, *args, **opts):
+        from core.predictor import _forecast_batch, _load
+
+        model, feature_cols, ver, _, _ = _load()
+        if ver != 'v2':
+            self.stdout.write(self.style.WARNING(f'모델 {ver} — 예전 방식 비교는 v2 만 지원'))
+        future_dates = [date.today() + timedelta(days=i) for i in range(max(1, opts['days']))]
+        self.stdout.write(f'모델 {ver} · 피처 {len(feature_cols)} · {len(future_dates)}일')
+        self.stdout.write(f'{"장비":>6} {"배치(s)":>9} {"예전(s)":>9} {"배속":>7}  일치')
+        for n in [int(x) for x in opts['sizes'].split(',') if x.strip()]:
+            devs = _fleet(n, feature_cols)
+            _forecast_batch(devs[:5], future_dates)   # 워밍업
+
+            t0 = time.perf_counter()
+            yhat, _, _ = _forecast_batch(devs, future_dates)
+            t_batch = time.perf_counter() - t0
+
+            t_legacy, match, note = None, '-', ''
+            if ver == 'v2':
+                k = min(n, opts['legacy_sample'])
+                t0 = time.perf_counter()
+                legacy = _legacy(devs[:k], future_dates)
+                t_legacy = (time.perf_counter() - t0) * n / k
+                note = '' if k == n else f' (≈ {k}대 실측 환산)'
+                same = sum(1 for i in range(k) if list(yhat[i]) == legacy[i])
+                match = f'{same}/{k}'
+            speed = f'{t_legacy / t_batch:6.1f}x' if t_legacy and t_batch > 0 else '      -'
+            legacy_s = f'{t_legacy:9.3f}' if t_legacy is not None else '        -'
+            self.stdout.write(f'{n:>6} {t_batch:9.3f} {legacy_s} {speed}  {match}{note}')
+
+        if opts['engine'] and ver == 'v2':
+            self._engine(feature_cols, future_dates[0], [int(x) for x in opts['sizes'].split(',') if x.strip()])
+
+    def _engine(self, feature_cols, td, sizes):
+        import os
+        import shutil
+        import joblib
+        import numpy as np
+        from core import model_registry, tree_engine
+
+        base_dir, _ = model_registry._paths(model_registry.current_version())
+        path = os.path.join(base_dir, model_registry.MODEL_FILE)
+        t0 = time.perf_counter()
+        model = joblib.load(path)
+        t_joblib = time.perf_counter() - t0
+        compiled = tree_engine.compile_estimator(model)
+        if compiled is None:
+            self.stdout.write(self.style.WARNING(f'{type(model).__name__}: 컴파일 엔진 미지원 또는 검증 불일치'))
+            return
+        shutil.rmtree(path + tree_engine.SUFFIX, ignore_errors=True)
+        tree_engine.save(path, compiled)
+        t0 = time.perf_counter()
+        compiled = tree_engine._open(path)
+        t_mmap = time.perf_counter() - t0
+        self.stdout.write(f'\n트리 엔진 ({compiled.n_trees} trees, depth {compiled.max_depth}) '
+                          f'cold 로드: joblib {t_joblib:.3f}s · 컴파일본 {t_mmap:.3f}s')
+        self.stdout.write(f'{"행":>6} {"sklearn(ms)":>12} {"compiled(ms)":>13} {"배속":>7}  최대오차')
+        for n in [1] + sizes:
+            X = _step_matrix(_fleet(n, feature_cols), feature_cols, td)
+            t_sk = _best(lambda: model.predict(X))
+            t_cp = _best(lambda: compiled.predict(X))
+            err = float(np.max(np.abs(compiled.predict(X) - model.predict(X))))
+            self.stdout.write(f'{n:>6} {t_sk * 1000:12.2f} {t_cp * 1000:13.2f} {t_sk / t_cp:6.1f}x  {err:.2e}')
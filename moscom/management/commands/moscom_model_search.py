@@ -0,0 +1,119 @@
+"""주간 모델 비교 — 후보 모델 계열을 병렬로, 정해진 시간 안에서 학습해 비교.
+
+사용:
+  python manage.py moscom_model_search
+  python manage.py moscom_model_search --jobs 4 --budget 1800   # 동시 후보 수 / 전체 시간 예산(초)
+  python manage.py moscom_model_search --holdout-days 14         # 마지막 N일을 검증 구간으로
+  python manage.py moscom_model_search --apply                   # 계열이 바뀌면 그 계열로 전체 재학습·공지 후 계열 변경
+
+매일 05:10 은 이어 학습(moscom_train --mode warm)만 하고, 계열 비교(전체 재학습)는 여기서 주 1회 한다.
+- 데이터: moscom_train 과 같은 피처 테이블 (moscom.training.load_dataset). 검증은 마지막 N일 (시간 순 분리).
+- 후보: moscom.training.available_families() — LightGBM · XGBoost 는 설치돼 있을 때만.
+- 병렬: 후보마다 스레드 하나 (--jobs 개 동시, 후보 안쪽은 n_jobs=1). 트리 학습은 GIL 을 놓으므로 코어를 나눠 쓴다.
+  Celery prefork worker 는 daemon 프로세스라 자식 프로세스를 못 띄워 스레드로 한다.
+- 시간 예산: 트리 앙상블·HistGradientBoosting 은 조금씩 늘려 가다 마감에 멈추고(partial),
+  마감 뒤에 차례가 온 후보는 건너뛴다(skipped). 예산을 넘는 건 이미 시작한 한 덩어리 학습뿐.
+- 결과: 후보마다 moscom.TrainingRun(mode='search') — 학습 시간 · 검증 MAE · persistence 대비 skill.
+  다 끝난(ok) 후보 중 최선이 현재 계열보다 MOSCOM_SEARCH_MARGIN 이상 나으면 moscom/ml/FAMILY 를 바꾼다.
+  --apply 면 새 계열 전체 재학습이 공지된 뒤에야 FAMILY 를 바꾼다 — 재학습이 실패하거나 중간에 끊기면 계열·모델 모두 그대로.
+- Celery(moscom.tasks.model_search_weekly)는 예산을 태스크 시간 제한에서 피처·재학습 여유를 뺀 만큼으로 준다.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+BUDGET_SECONDS = int(os.environ.get('MOSCOM_SEARCH_BUDGET', '1800'))
+JOBS = int(os.environ.get('MOSCOM_SEARCH_JOBS', '0')) or max(1, (os.cpu_count() or 2) // 2)
+# 현재 계열보다 검증 MAE 가 이 비율 이상 낮아야 바꾼다 (주마다 오락가락하지 않게)
+MARGIN = float(os.environ.get('MOSCOM_SEARCH_MARGIN', '0.02'))
+
+
+class Command(BaseCommand):
+    help = '후보 모델 계열 병렬 비교 (시간 예산) → 매일 이어 학습할 계열 선택'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=JOBS, help='동시에 학습할 후보 수')
+        parser.add_argument('--budget', type=int, default=BUDGET_SECONDS, help='전체 시간 예산 (초)')
+        parser.add_argument('--holdout-days', type=int, default=14, help='검증 구간 (마지막 N일)')
+        parser.add_argument('--min-days', type=int, default=5, help='장비당 최소 데이터 일수 (기본 5)')
+        parser.add_argument('--apply', action='store_true', help='계열이 바뀌면 바로 전체 재학습 (moscom_train --mode full)')
+
+    def handle(self, *args, **opts):
+        from moscom import training
+
+        self.stdout.write(self.style.NOTICE('1) 학습 데이터 (moscom.training.load_dataset)'))
+        ds = training.load_dataset(min_days=opts['min_days'])
+        if len(ds.y_count) < 50:
+            self.stdout.write(self.style.ERROR(f'데이터가 너무 적습니다 ({len(ds.y_count)} 행). 비교 중단.'))
+            return
+        cut = ds.built_until - timedelta(days=opts['holdout_days'])
+        tr = ds.dates <= cut
+        te = ~tr
+        if not te.any() or tr.sum() < 50:
+            self.stdout.write(self.style.ERROR(f'검증 구간({cut} 이후) 또는 학습 구간이 비었습니다. 비교 중단.'))
+            return
+        X_tr, y_tr = ds.X[tr], ds.y_count[tr]
+        X_te, y_te, lag1_te = ds.X[te], ds.y_count[te], ds.lag1[te]
+        self.stdout.write(f'   학습 {len(y_tr)}행 (~{cut}) / 검증 {len(y_te)}행 (~{ds.built_until})')
+
+        families = training.available_families()
+        current = training.current_family()
+        deadline = time.monotonic() + opts['budget']
+        self.stdout.write(self.style.NOTICE(
+            f'2) 후보 {len(families)}개 — 동시 {opts["jobs"]}, 예산 {opts["budget"]}s: {", ".join(families)}'))
+
+        def run(family):
+            if time.monotonic() > deadline:
+                return {'family': family, 'status': 'skipped', 'fit_seconds': 0.0}
+            t0 = time.monotonic()
+            try:
+                model, complete = training.fit_budgeted(training.make_model(family, n_jobs=1), X_tr, y_tr, deadline)
+            except Exception as e:
+                return {'family': family, 'status': 'error', 'error': str(e), 'fit_seconds': time.monotonic() - t0}
+            fit_sec = time.monotonic() - t0
+            if model is None:
+                return {'family': family, 'status': 'skipped', 'fit_seconds': fit_sec}
+            return {'family': family, 'status': 'ok' if complete else 'partial', 'fit_seconds': fit_sec,
+                    **training.evaluate(model, X_te, y_te, lag1_te)}
+
+        with ThreadPoolExecutor(max_workers=max(1, opts['jobs'])) as pool:
+            results = list(pool.map(run, families))
+
+        self.stdout.write(self.style.NOTICE('3) 결과 (검증 MAE · persistence 대비 skill)'))
+        for r in results:
+            mae = f'{r["mae"]:.3f}' if r.get('mae') is not None else '-'
+            skill = f'{r["skill"]:.3f}' if r.get('skill') is not None else '-'
+            mark = ' *' if r['family'] == current else ''
+            self.stdout.write(f'   {r["family"]:22s} {r["status"]:8s} {r["fit_seconds"]:7.1f}s  MAE {mae:>8s}  skill {skill:>7s}{mark}')
+            training.record(
+                'search', r['family'], status=r['status'], n_samples=len(y_tr), n_new=len(y_te),
+                fit_seconds=r['fit_seconds'], featurize_seconds=ds.featurize_seconds,
+                test_mae=r.get('mae'), persistence_mae=r.get('persistence_mae'), skill=r.get('skill'),
+                detail={'holdout_from': (cut + timedelta(days=1)).isoformat(), 'budget': opts['budget'],
+                        'jobs': opts['jobs'], 'current': current, 'error': r.get('error')},
+            )
+
+        # 끝까지 학습한 후보만 계열 후보로 (부분 학습은 매일 재학습 크기와 달라 비교가 공정하지 않음)
+        done = {r['family']: r['mae'] for r in results if r['status'] == 'ok' and r.get('mae') is not None}
+        if not done:
+            self.stdout.write(self.style.WARNING('끝까지 학습한 후보 없음 — 계열 유지'))
+            return
+        best = min(done, key=done.get)
+        base = done.get(current)
+        if best == current or (base is not None and done[best] > base * (1 - MARGIN)):
+            self.stdout.write(self.style.SUCCESS(f'계열 유지: {current}'))
+            return
+        if opts['apply']:
+            # 새 계열 모델이 공지된 다음에 FAMILY 를 바꾼다 (그 전에 끊기면 어제 계열·모델 그대로)
+            from core import model_registry
+            before = model_registry.current_version()
+            call_command('moscom_train', mode='full', family=best, stdout=self.stdout)
+            if model_registry.current_version() == before:
+                self.stdout.write(self.style.WARNING(f'{best} 전체 재학습이 공지되지 않음 — 계열 유지: {current}'))
+                return
+        training.set_family(best)
+        self.stdout.write(self.style.SUCCESS(f'계열 변경: {current} → {best}'))
@@ -2,13 +2,20 @@
 
 사용법:
   python manage.py moscom_sync                 # 장비 + 포집 incremental
-  python manage.py moscom_sync --backfill 30   # 30일 백필 (포집)
+  python manage.py moscom_sync --backfill 30   # 30일 백필 (포집, 병렬 — 중단 후 다시 실행하면 이어서)
+  python manage.py moscom_sync --backfill 365 --workers 8 --no-resume
   python manage.py moscom_sync --devices-only  # 장비만
+  python manage.py moscom_sync --daily-only    # 일별 집계(DailyCount)만
+  python manage.py moscom_sync --rebuild-deltas  # 시간별 증가량(HourlyDelta) 전체 재계산
+  python manage.py moscom_sync --weather-backfill 365  # 날씨 이력(WeatherObservation) 과거 1년 채우기
 """
 import json
 from django.core.management.base import BaseCommand
 
-from moscom.sync import sync_devices, sync_collections, backfill_collections, run_sync
+from moscom.backfill import backfill_parallel
+from moscom.deltas import rebuild_hourly_deltas
+from moscom.sync import sync_devices, sync_collections, sync_daily_counts, run_sync
+from moscom.weather import backfill_weather
 
 
 class Command(BaseCommand):
@@ -16,13 +23,22 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--backfill', type=int, default=0, help='포집 백필 일수 (기본 0)')
+        parser.add_argument('--workers', type=int, default=None, help='백필 동시 구간 수 (기본 MOSCOM_BACKFILL_WORKERS=4)')
+        parser.add_argument('--chunk-days', type=float, default=7, help='백필 첫 구간 길이(일) — 이후 응답 크기에 맞춰 조정')
+        parser.add_argument('--no-resume', action='store_true', help='체크포인트 무시하고 범위 전체 다시 백필')
         parser.add_argument('--devices-only', action='store_true', help='장비만 동기화')
         parser.add_argument('--collections-only', action='store_true', help='포집만 동기화')
+        parser.add_argument('--daily-only', action='store_true', help='일별 집계(DailyCount)만 동기화')
+        parser.add_argument('--rebuild-deltas', action='store_true', help='Collection 전체에서 HourlyDelta 재계산')
+        parser.add_argument('--weather-backfill', type=int, default=0, help='날씨 이력 백필 일수 (Open-Meteo archive)')
 
     def handle(self, *args, **opts):
         if opts['backfill'] > 0:
             self.stdout.write(f'Backfilling {opts["backfill"]} days of collections...')
-            r = backfill_collections(days=opts['backfill'])
+            r = backfill_parallel(
+                days=opts['backfill'], workers=opts['workers'], chunk_days=opts['chunk_days'],
+                resume=not opts['no_resume'], progress=self._progress,
+            )
             self.stdout.write(self.style.SUCCESS(f'backfill: {json.dumps(r, ensure_ascii=False)}'))
             return
         if opts['devices_only']:
@@ -33,6 +49,27 @@ class Command(BaseCommand):
             r = sync_collections()
             self.stdout.write(self.style.SUCCESS(f'collections: {json.dumps(r, ensure_ascii=False)}'))
             return
+        if opts['rebuild_deltas']:
+            r = rebuild_hourly_deltas()
+            self.stdout.write(self.style.SUCCESS(f'deltas: {json.dumps(r, ensure_ascii=False)}'))
+            return
+        if opts['weather_backfill'] > 0:
+            r = backfill_weather(days=opts['weather_backfill'])
+            self.stdout.write(self.style.SUCCESS(f'weather: {json.dumps(r, ensure_ascii=False)}'))
+            return
+        if opts['daily_only']:
+            r = sync_daily_counts()
+            self.stdout.write(self.style.SUCCESS(f'daily_counts: {json.dumps(r, ensure_ascii=False)}'))
+            return
         # default: 둘 다
         r = run_sync()
         self.stdout.write(self.style.SUCCESS(f'sync: {json.dumps(r, ensure_ascii=False)}'))
+
+    def _progress(self, chunk, totals):
+        line = (f'[{totals["pct"]:5.1f}%] {chunk["start"]:%Y-%m-%d %H:%M} ~ {chunk["end"]:%Y-%m-%d %H:%M} '
+                f'{chunk["status"]} rows={chunk["rows"]} created={chunk["created"]} '
+                f'updated={chunk["updated"]} {chunk["seconds"]}s')
+        if chunk['status'] == 'done':
+            self.stdout.write(line)
+        else:
+            self.stdout.write(self.style.ERROR(f'{line} — {chunk["error"]}'))
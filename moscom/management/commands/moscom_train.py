@@ -2,213 +2,170 @@
 
 사용:
   python manage.py moscom_train
+  python manage.py moscom_train --mode warm   # 어제 모델 이어 학습 (드리프트가 크면 전체 재학습) — 매일 05:10
   python manage.py moscom_train --min-days 5  # 장비당 최소 일수
   python manage.py moscom_train --no-weather  # 기상 피처 빼고 학습
-
-산출물:
-  moscom/ml/best_model_RandomForest.joblib
-  moscom/ml/feature_cols.joblib
-  moscom/ml/training_report.json
+  python manage.py moscom_train --rebuild-features  # 피처 테이블(moscom.features) 전 기간 다시 만들고 학습
+  python manage.py moscom_train --family ExtraTrees  # moscom/ml/FAMILY 대신 이 계열로 (moscom_model_search --apply)
+
+학습 데이터는 moscom.features 일별 피처 테이블 — 동기화 직후 확정일 행만 덧붙여 두므로
+여기서는 밀린 날만 채우고 한 번에 읽는다 (moscom.training.load_dataset).
+모델 계열은 moscom/ml/FAMILY (주간 moscom_model_search 가 고름, 기본 RandomForest).
+
+--mode warm: 현재 버전 모델을 이어서 학습 (moscom.training.warm_update).
+  최근 검증 행에서 어제 모델 MAE / 기준 MAE 가 MOSCOM_RETRAIN_DRIFT 를 넘거나,
+  피처 구성·모델 계열이 바뀌었거나, 이어 학습을 못 하는 계열이면 전체 재학습으로 넘어간다.
+실행마다 moscom.TrainingRun 에 학습 시간·스킬(persistence 대비)·드리프트를 남긴다.
+
+산출물 (버전 디렉터리 — core.model_registry 가 CURRENT 로 공지, 각 프로세스가 무중단 교체):
+  moscom/ml/versions/<YYYYmmdd-HHMMSS>/best_model_RandomForest.joblib  (계열과 무관하게 같은 이름)
+  moscom/ml/versions/<YYYYmmdd-HHMMSS>/feature_cols.joblib
+  moscom/ml/versions/<YYYYmmdd-HHMMSS>/training_report.json
 """
 import os
 import json
 import logging
-from datetime import datetime, timedelta, timezone as dt_timezone
-from collections import defaultdict
+import time
+from datetime import date
 
 import numpy as np
-import pandas as pd
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from django.db.models import Sum
-from django.db.models.functions import TruncDate
 
 logger = logging.getLogger(__name__)
 
 
-ML_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'ml')
-
-
 class Command(BaseCommand):
     help = 'Collection 데이터로 모기 예측 모델 학습'
 
     def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['full', 'warm'], default='full',
+                            help='full: 처음부터 학습 / warm: 어제 모델 이어 학습 (드리프트 시 full)')
         parser.add_argument('--min-days', type=int, default=5, help='장비당 최소 데이터 일수 (기본 5)')
         parser.add_argument('--no-weather', action='store_true', help='기상 피처 제외')
-        parser.add_argument('--test-size', type=float, default=0.2, help='holdout 비율')
+        parser.add_argument('--test-size', type=float, default=0.2, help='holdout 비율 ((장비, 날짜) 해시로 고정)')
+        parser.add_argument('--rebuild-features', action='store_true', help='피처 테이블 전 기간 다시 만들기')
+        parser.add_argument('--family', default=None, help='학습할 모델 계열 (기본: moscom/ml/FAMILY)')
+
+    def _warm_plan(self, ds, family, window):
+        """이어 학습 여부 판단 → (prev 또는 None, 사유, 드리프트 구간 평가 dict).
+        window: 최근 DRIFT_WINDOW_DAYS 일 검증 행 — 어제 모델도 학습에 쓴 적 없는 행."""
+        from moscom import training
+
+        prev = training.previous()
+        if prev is None:
+            return None, '이전 버전 없음', None
+        if prev['feature_cols'] != ds.feature_cols:
+            return None, '피처 구성 변경', None
+        if training.family_of(prev['model']) != family:
+            return None, f'모델 계열 변경 ({training.family_of(prev["model"])} → {family})', None
+        if prev['report'].get('holdout') != 'hash':
+            # 예전 무작위 split 으로 학습한 트리는 지금 검증 행을 이미 봤다
+            return None, '검증 분할 방식 변경', None
+        ev = training.evaluate(prev['model'], ds.X[window], ds.y_count[window], ds.lag1[window])
+        ref = prev['report'].get('ref_mae')
+        if ev['n'] >= training.DRIFT_MIN_ROWS and ref:
+            ev['drift'] = ev['mae'] / max(ref, 1e-6)
+            if ev['drift'] > training.DRIFT_THRESHOLD:
+                return None, f'드리프트 {ev["drift"]:.2f} > {training.DRIFT_THRESHOLD}', ev
+        return prev, '', ev
 
     def handle(self, *args, **opts):
-        os.makedirs(ML_DIR, exist_ok=True)
-        from moscom.models import Device, Collection
+        from django.core.management.base import CommandError
+        from moscom import training
 
+        if opts['family'] and opts['family'] not in training.available_families():
+            raise CommandError(f'쓸 수 없는 계열: {opts["family"]} (가능: {", ".join(training.available_families())})')
         min_days = opts['min_days']
         use_weather = not opts['no_weather']
         test_size = opts['test_size']
 
         # ⚠️ Collection.mosquito_count 는 누적값 → 직접 Sum 금지.
-        # 학습 타깃(일 마릿수)은 moscom 일별 API(get_daily_map) 값을 쓴다.
-        self.stdout.write(self.style.NOTICE('1) moscom 일별 API → 장비×일 집계'))
-        from core import moscom_client
-        from django.db.models import Min, Max as _Max
-        rng = Collection.objects.aggregate(mn=Min('created_date'), mx=_Max('created_date'))
-        if not rng['mn']:
-            self.stdout.write(self.style.ERROR('데이터 없음')); return
-        import datetime as _dt
-        KST = _dt.timezone(_dt.timedelta(hours=9))
-        d0 = rng['mn'].astimezone(KST).date()
-        d1 = rng['mx'].astimezone(KST).date()
-        dmap = moscom_client.get_daily_map(d0, d1)
-
-        # 장비별 시계열로 정리
-        dev_series = defaultdict(list)  # uuid -> [(date, total), ...]
-        for u, per in dmap.items():
-            for d_iso, cnt in sorted(per.items()):
-                dev_series[u].append((_dt.date.fromisoformat(d_iso), cnt))
-        self.stdout.write(f'   관측소: {len(dev_series)}, 일수 합계: {sum(len(v) for v in dev_series.values())}')
-
-        # 장비 메타
-        devices = {d.device_uuid: d for d in Device.objects.all()}
-
-        self.stdout.write(self.style.NOTICE('2) 피처 추출 (lag/MA/요일/권역/기상)'))
-        records = []
-        skipped_few = 0
-        for uuid, series in dev_series.items():
-            series.sort(key=lambda x: x[0])
-            if len(series) < min_days:
-                skipped_few += 1
-                continue
-            counts_by_date = {d: c for d, c in series}
-            sorted_dates = [d for d, _ in series]
-
-            dev_meta = devices.get(uuid)
-            region_code = (dev_meta.region_code if dev_meta else '') or ''
-            sido = (dev_meta.address_sido if dev_meta else '') or ''
-            gungu = (dev_meta.address_gungu if dev_meta else '') or ''
-            # 기상은 현재값 캐싱된 것만 있어 단일 — 모든 행에 동일 (target_date 정확한 매칭은 불가)
-            temp = dev_meta.temperature if dev_meta else None
-            humid = dev_meta.humidity if dev_meta else None
-            precip = dev_meta.precipitation if dev_meta else None
-            wind = dev_meta.wind_speed if dev_meta else None
-
-            # 각 날짜에 대해 history 기반 lag 계산
-            for i, (target_d, target_c) in enumerate(series):
-                if i < 3:
-                    # lag3 못 채우면 skip
-                    continue
-                # lag1, lag2, lag3, lag7
-                def get_lag(k):
-                    if i - k < 0:
-                        return None
-                    return series[i - k][1]
-                lag1 = get_lag(1); lag2 = get_lag(2); lag3 = get_lag(3); lag7 = get_lag(7)
-                if lag1 is None or lag2 is None or lag3 is None:
-                    continue
-
-                # MA3 (앞 3일 평균), MA7 (앞 7일 평균)
-                prev_3 = [series[i-k][1] for k in (1, 2, 3)]
-                ma3 = sum(prev_3) / 3
-                prev_7 = [series[i-k][1] for k in range(1, min(8, i+1))]
-                ma7 = sum(prev_7) / len(prev_7) if prev_7 else 0
-
-                weekday = target_d.weekday()  # 0=Mon
-                rec = {
-                    'lag1': lag1, 'lag2': lag2, 'lag3': lag3,
-                    'lag7': lag7 if lag7 is not None else ma7,  # lag7 없으면 ma7로 imputation
-                    'ma3': ma3, 'ma7': ma7,
-                    'weekday': weekday, 'is_weekend': 1 if weekday >= 5 else 0,
-                    'month': target_d.month, 'day': target_d.day,
-                    'region_code': region_code or 'NONE',
-                    'sido': sido or 'NONE',
-                    'target': target_c,
-                }
-                if use_weather:
-                    rec['temperature'] = temp if temp is not None else 22.0
-                    rec['humidity'] = humid if humid is not None else 60.0
-                    rec['precipitation'] = precip if precip is not None else 0.0
-                    rec['wind_speed'] = wind if wind is not None else 2.0
-                records.append(rec)
-
-        self.stdout.write(f'   학습 행: {len(records)}, 건너뛴 장비(데이터부족): {skipped_few}')
-        if len(records) < 50:
-            self.stdout.write(self.style.ERROR(f'데이터가 너무 적습니다 ({len(records)} 행). 학습 중단.'))
+        # 학습 타깃(일 마릿수)은 DailyCount(moscom 일별 API 값)로 만든 피처 테이블 — 확정일까지 증분으로 쌓여 있다.
+        self.stdout.write(self.style.NOTICE('1) 일별 피처 테이블 (moscom.features) + 권역/시도·기상 대체값·모기지수 라벨'))
+        ds = training.load_dataset(min_days=min_days, use_weather=use_weather, rebuild=opts['rebuild_features'])
+        appended = ds.appended
+        self.stdout.write(f'   추가 {appended["rows"]}행 ({appended["from"]} ~ {appended["until"]}), 확정 {ds.built_until}')
+        self.stdout.write(f'   관측소: {ds.n_devices}, 건너뛴 장비(데이터부족): {ds.skipped_few}')
+        self.stdout.write(f'   학습 행: {len(ds.y_count)} ({ds.featurize_seconds:.1f}s)')
+        if len(ds.y_count) < 50:
+            self.stdout.write(self.style.ERROR(f'데이터가 너무 적습니다 ({len(ds.y_count)} 행). 학습 중단.'))
             return
-
-        df = pd.DataFrame(records)
-
-        # 모기지수 라벨 — 우리만의 다축 합성공식 (moscom/mosquito_index.py)
-        from moscom.mosquito_index import (
-            axis_count, axis_trend, axis_weather, axis_habitat,
-            WEIGHTS as MI_WEIGHTS, compute_index,
-        )
-        p95 = float(np.percentile(df['target'].values, 95))
-        if p95 <= 0:
-            p95 = 100.0
+        p95 = ds.p95
         self.stdout.write(f'   P95(95분위 마릿수): {p95:.1f}  ← 마릿수정규화 기준')
+        X, y_count, y_index, feature_cols = ds.X, ds.y_count, ds.y_index, ds.feature_cols
 
-        # 학습 행마다 그 시점의 4축 점수 + 종합 지수 부여
-        target_index = []
-        for r in records:
-            # 7일 평균은 ma7 (이미 학습 피처에 들어있음)
-            last7_avg = r.get('ma7', 0)
-            # axis_trend 는 list 를 받으니 ma7 로 대체된 단일값을 7번 복제
-            last7_proxy = [last7_avg] * 7
-            mi = compute_index(
-                count=r['target'],
-                last7_counts=last7_proxy,
-                temperature=r.get('temperature'),
-                humidity=r.get('humidity'),
-                p95=p95,
-                name=r.get('region_code', '') or '',  # 권역 키로 habitat 추정 (정확하진 않음)
-                addr='', detail='',
-            )
-            target_index.append(mi['index'])
-
-        df['target_index'] = target_index
-
-        # 카테고리 인코딩
-        df_enc = pd.get_dummies(df, columns=['region_code', 'sido'], drop_first=False)
-        # 마릿수 모델 타깃
-        y_count = df_enc.pop('target').values
-        # 모기지수 모델 타깃 (별도 변수)
-        y_index = df_enc.pop('target_index').values
-        X = df_enc.values.astype('float64')
-        feature_cols = list(df_enc.columns)
-
-        self.stdout.write(self.style.NOTICE(f'3) 학습 (피처 {len(feature_cols)}개)'))
-        from sklearn.ensemble import RandomForestRegressor
-        from sklearn.model_selection import train_test_split
         from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
         # 마릿수 모델 + 모기지수 모델 — 동일 X, 다른 y. split도 동일하게.
-        idx_tr, idx_te = train_test_split(np.arange(len(y_count)), test_size=test_size, random_state=42)
+        # (장비, 날짜) 해시 split — 밤마다 같은 행이 검증 쪽에 남아 이어 학습해도 test 가 in-sample 이 되지 않는다
+        test = training.holdout_mask(ds, test_size)
+        window = training.drift_window(ds, test)
+        idx_tr, idx_te = np.flatnonzero(~test), np.flatnonzero(test)
         X_tr, X_te = X[idx_tr], X[idx_te]
         y_tr, y_te = y_count[idx_tr], y_count[idx_te]
         y_idx_tr, y_idx_te = y_index[idx_tr], y_index[idx_te]
 
-        model = RandomForestRegressor(
-            n_estimators=200, max_depth=12, min_samples_leaf=2,
-            n_jobs=-1, random_state=42,
-        )
-        model.fit(X_tr, y_tr)
+        family = opts['family'] or training.current_family()
+        mode = opts['mode']
+        prev, reason, drift_eval = (None, '', None)
+        if mode == 'warm':
+            prev, reason, drift_eval = self._warm_plan(ds, family, window)
+            if drift_eval and drift_eval['n']:
+                self.stdout.write(f'   최근 {training.DRIFT_WINDOW_DAYS}일 검증 {drift_eval["n"]}행 — '
+                                  f'어제 모델 MAE {drift_eval["mae"]:.2f}, persistence {drift_eval["persistence_mae"]:.2f}, '
+                                  f'drift {drift_eval.get("drift") or 0:.2f}')
+        since = prev['report'].get('feature_built_until') if prev else None
+        n_new = int((ds.dates > date.fromisoformat(since)).sum()) if since else 0
+
+        self.stdout.write(self.style.NOTICE(f'2) 학습 ({family}, {mode}, 피처 {len(feature_cols)}개)'))
+        t0 = time.monotonic()
+        model = model_idx = None
+        if prev is not None:
+            model = training.warm_update(prev['model'], X_tr, y_tr)
+            model_idx = training.warm_update(prev['idx_model'], X_tr, y_idx_tr) if model is not None else None
+            if model is None or model_idx is None:
+                reason = '이어 학습 불가 (계열 미지원 또는 누적 라운드 상한)'
+        if model is None or model_idx is None:
+            if mode == 'warm':
+                self.stdout.write(self.style.WARNING(f'   전체 재학습으로 전환: {reason}'))
+            mode = 'full'
+            model = training.make_model(family).fit(X_tr, y_tr)
+            model_idx = training.make_model(family).fit(X_tr, y_idx_tr)
+        fit_sec = time.monotonic() - t0
+        self.stdout.write(f'   학습 {fit_sec:.1f}s')
+
         pred_tr = model.predict(X_tr)
         pred_te = model.predict(X_te)
-
-        # 모기지수 모델
-        model_idx = RandomForestRegressor(
-            n_estimators=200, max_depth=12, min_samples_leaf=2,
-            n_jobs=-1, random_state=42,
-        )
-        model_idx.fit(X_tr, y_idx_tr)
         pred_idx_tr = model_idx.predict(X_tr)
         pred_idx_te = model_idx.predict(X_te)
+        test_eval = training.evaluate(model, X_te, y_te, ds.lag1[idx_te])
+        # 드리프트 기준 MAE — 전체 재학습 때 같은 구간(최근 검증 행) MAE 를 이어 학습 동안 그대로 넘긴다
+        ref_mae = training.evaluate(model, X[window], y_count[window], ds.lag1[window])['mae'] \
+            if mode == 'full' else prev['report'].get('ref_mae')
 
         report = {
-            'n_samples': len(records),
+            'n_samples': len(y_count),
+            'feature_built_until': ds.built_until.isoformat(),
+            'featurize_seconds': round(ds.featurize_seconds, 3),
+            'mode': mode,
+            'mode_reason': reason,
+            'family': family,
+            'warm_from': prev['version'] if mode == 'warm' else None,
+            'fit_seconds': round(fit_sec, 3),
+            'holdout': 'hash',
+            'drift_window_days': training.DRIFT_WINDOW_DAYS,
+            'ref_mae': ref_mae,
+            'drift': (drift_eval or {}).get('drift'),
+            'drift_window': drift_eval,
+            'n_new': n_new,
+            'count_test_persistence_mae': test_eval['persistence_mae'],
+            'count_test_skill': test_eval['skill'],
             'n_features': len(feature_cols),
             'n_train': len(X_tr),
             'n_test': len(X_te),
             'p95_count': p95,
-            'mi_weights': list(MI_WEIGHTS),
+            'mi_weights': ds.mi_weights,
             # 마릿수 모델
             'count_train_mae': float(mean_absolute_error(y_tr, pred_tr)),
             'count_train_rmse': float(np.sqrt(mean_squared_error(y_tr, pred_tr))),
@@ -244,7 +201,7 @@ class Command(BaseCommand):
         except Exception:
             pass
 
-        self.stdout.write(self.style.NOTICE('4) 평가 지표 — 마릿수 모델'))
+        self.stdout.write(self.style.NOTICE('3) 평가 지표 — 마릿수 모델'))
         for k in ('count_train_mae', 'count_train_rmse', 'count_train_r2',
                   'count_test_mae', 'count_test_rmse', 'count_test_r2'):
             self.stdout.write(f'   {k:>20s}: {report[k]:.3f}')
@@ -253,26 +210,49 @@ class Command(BaseCommand):
         for k in ('index_train_mae', 'index_train_r2', 'index_test_mae', 'index_test_r2'):
             self.stdout.write(f'   {k:>20s}: {report[k]:.3f}')
         self.stdout.write(f'   index_mean: {report["index_mean"]:.2f}, max: {report["index_max"]:.2f}')
+        if test_eval['skill'] is not None:
+            self.stdout.write(f'   skill (persistence 대비): {test_eval["skill"]:.3f}  '
+                              f'(persistence MAE {test_eval["persistence_mae"]:.2f})')
         self.stdout.write('   top features (마릿수 모델 기준):')
         for f in (report.get('top_features') or [])[:10]:
             self.stdout.write(f'      {f["name"]:30s}  {f["importance"]:.3f}')
 
-        # 저장
+        # 저장 — 새 버전 디렉터리에 다 쓴 뒤 publish (읽는 쪽은 반쯤 쓰인 파일을 볼 일이 없음)
         import joblib
-        model_path = os.path.join(ML_DIR, 'best_model_RandomForest.joblib')
-        model_idx_path = os.path.join(ML_DIR, 'best_model_MosquitoIndex.joblib')
-        feat_path = os.path.join(ML_DIR, 'feature_cols.joblib')
-        meta_path = os.path.join(ML_DIR, 'training_meta.joblib')
-        report_path = os.path.join(ML_DIR, 'training_report.json')
+        from core import model_registry
+        version, out_dir = model_registry.new_version_dir()
+        model_path = os.path.join(out_dir, model_registry.MODEL_FILE)
+        model_idx_path = os.path.join(out_dir, model_registry.INDEX_FILE)
+        feat_path = os.path.join(out_dir, model_registry.FEATURES_FILE)
+        meta_path = os.path.join(out_dir, model_registry.META_FILE)
+        report_path = os.path.join(out_dir, 'training_report.json')
+        report['version'] = version
         joblib.dump(model, model_path)
         joblib.dump(model_idx, model_idx_path)
         joblib.dump(feature_cols, feat_path)
-        joblib.dump({'p95': p95, 'mi_weights': list(MI_WEIGHTS)}, meta_path)
+        joblib.dump({'p95': p95, 'mi_weights': ds.mi_weights}, meta_path)
         with open(report_path, 'w', encoding='utf-8') as f:
             json.dump(report, f, ensure_ascii=False, indent=2)
-
-        self.stdout.write(self.style.SUCCESS(f'저장 완료: {model_path}'))
+        # 컴파일 엔진을 쓰면 공지 전에 미리 컴파일 — 다른 프로세스가 교체할 때 다시 컴파일하지 않게
+        from core import tree_engine
+        if tree_engine.enabled():
+            for p in (model_path, model_idx_path):
+                if tree_engine.compile_file(p) is None:
+                    self.stdout.write(self.style.WARNING(f'   컴파일 건너뜀 (sklearn 유지): {p}'))
+        model_registry.publish(version)
+
+        self.stdout.write(self.style.SUCCESS(f'저장 완료 (버전 {version}): {model_path}'))
         self.stdout.write(self.style.SUCCESS(f'         : {model_idx_path}'))
         self.stdout.write(self.style.SUCCESS(f'         : {feat_path}'))
         self.stdout.write(self.style.SUCCESS(f'         : {meta_path}  (p95={p95:.1f})'))
         self.stdout.write(self.style.SUCCESS(f'         : {report_path}'))
+
+        training.record(
+            mode, family, version=version, n_samples=len(y_count),
+            n_new=n_new,
+            fit_seconds=fit_sec, featurize_seconds=ds.featurize_seconds,
+            test_mae=report['count_test_mae'], persistence_mae=test_eval['persistence_mae'],
+            skill=test_eval['skill'], drift=report['drift'],
+            detail={'reason': reason, 'warm_from': report['warm_from'], 'drift_window': drift_eval,
+                    'index_test_mae': report['index_test_mae'], 'n_features': len(feature_cols)},
+        )
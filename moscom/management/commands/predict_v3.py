@@ -4,7 +4,7 @@
   1) moscom 일별값(get_daily_map) + 장비상태(Collection)로 관측소×업무일 panel 생성
      (숫자이름 관측소 제외, 웹사이트/moscom.co.kr 과 동일한 일별값)
   2) 날씨 결합 + version_3 피처(119개) 생성
-  3) best_h1/h2/h3 모델(delta_log)로 h=1~3 예측 복원
+  3) best_h1/h2/h3 모델(delta_log)로 h=1~3 예측 복원 (+ 트리 분위수 P10/P50/P90 구간)
   4) 각 (관측소, 산출일, 대상일)을 PredictionLog 에 저장 (스냅샷 이력)
 
 사용:
@@ -30,6 +30,7 @@ V3_SRC = V3_DIR / "src"
 V3_MODELS = V3_DIR / "models"
 LAG_WINDOW = 7
 HORIZONS = [1, 2, 3]
+QUANTILES = (10, 50, 90)
 
 # 발육영점온도 등 version_3 피처 함수 import (src를 경로에 추가)
 sys.path.insert(0, str(V3_SRC))
@@ -66,8 +67,8 @@ class Command(BaseCommand):
         parser.add_argument('--days', type=int, default=0, help='최근 N일만(backfill)')
 
     def handle(self, *args, **opts):
-        import joblib
         from core import moscom_client
+        from core import tree_engine
         from moscom.models import Collection, Device, Region, PredictionLog
         from django.db.models import Min, Max
 
@@ -77,7 +78,7 @@ class Command(BaseCommand):
             p = V3_MODELS / f"best_h{h}.joblib"
             if not p.exists():
                 self.stderr.write(f'모델 없음: {p}'); return
-            models[h] = joblib.load(p)
+            models[h] = tree_engine.load(str(p))
         self.stdout.write(f'모델 로드: h1={models[1]["name"]}, h2={models[2]["name"]}, h3={models[3]["name"]}')
 
         v3 = _load_v3_feature_funcs()
@@ -105,9 +106,18 @@ class Command(BaseCommand):
             # 학습에 쓰인 피처만, 없으면 0
             X = d.reindex(columns=feats, fill_value=0.0)
             base = np.log1p(d['y'].values.astype(float))
-            pred = np.clip(np.expm1(base + mdl.predict(X)), 0, None)
-            d = d.assign(_pred=np.round(pred).astype(int), _h=h)
-            rows_out.append(d[['sid', 'station', 'region', 'bizdate', '_h', '_pred', 'y']])
+            # 트리 앙상블이면 트리별 delta 한 번으로 점 예측(평균) + 구간(분위수 — expm1 은 단조라 그대로 옮겨짐)
+            trees = tree_engine.per_tree(mdl, X)
+            if trees is not None:
+                delta = trees.mean(axis=1)
+                band = np.clip(np.expm1(base[:, None] + np.percentile(trees, QUANTILES, axis=1).T), 0, None)
+            else:
+                delta = mdl.predict(X)
+                band = np.full((len(d), len(QUANTILES)), np.nan)
+            pred = np.clip(np.expm1(base + delta), 0, None)
+            d = d.assign(_pred=np.round(pred).astype(int), _h=h,
+                         **{f'_p{q}': np.round(band[:, k]) for k, q in enumerate(QUANTILES)})
+            rows_out.append(d[['sid', 'station', 'region', 'bizdate', '_h', '_pred', 'y', '_p10', '_p50', '_p90']])
         allp = pd.concat(rows_out, ignore_index=True)
 
         # 4) PredictionLog 저장
@@ -118,12 +128,12 @@ class Command(BaseCommand):
 
     # ── panel: moscom 일별값 + 장비상태 ──
     def _build_panel(self, moscom_client, Collection, Device, Region):
-        from django.db.models import Min, Max
-        rng = Collection.objects.aggregate(mn=Min('created_date'), mx=Max('created_date'))
-        if not rng['mn']:
+        from moscom.archive import collection_range
+        mn, mx = collection_range()
+        if not mn:
             return None
-        d0 = rng['mn'].astimezone(KST).date()
-        d1 = rng['mx'].astimezone(KST).date()
+        d0 = mn.astimezone(KST).date()
+        d1 = mx.astimezone(KST).date()
         regions = {r.code: r.name for r in Region.objects.all()}
         dev = {d.device_uuid: {
             'name': (d.device_name or d.device_uuid),
@@ -178,9 +188,9 @@ class Command(BaseCommand):
     def _device_state(self, Collection, dev):
         """야간 수집창 기준 장비상태 일별 집계."""
         name_by_uuid = {u: m['name'] for u, m in dev.items()}
-        qs = Collection.objects.values('device_uuid', 'created_date', 'battery', 'fan', 'reset')
+        from moscom.archive import iter_collection_values
         rows = []
-        for r in qs.iterator(chunk_size=5000):
+        for r in iter_collection_values(['device_uuid', 'created_date', 'battery', 'fan', 'reset']):
             nm = name_by_uuid.get(r['device_uuid'])
             if not nm or str(nm).isdigit():
                 continue
@@ -202,28 +212,48 @@ class Command(BaseCommand):
         return g
 
     def _build_weather(self, panel):
-        # 서버엔 실시간 날씨 API가 없으니, Device 캐시 날씨를 권역별 평균으로 상수 사용.
-        # (version_3 는 open-meteo 를 썼으나 배치 단순화. 날씨 피처는 상수로 채워짐)
+        # 권역(시도+군구)별 일 기상 — 권역 장비들의 셀 이력(WeatherObservation)을 날짜별 평균.
+        # 이력이 없는 날짜는 Device 캐시 현재값의 권역 평균으로 채운다 (이전 상수 방식).
         from moscom.models import Device
-        wcols = ['temperature_2m_mean', 'temperature_2m_max', 'temperature_2m_min',
-                 'precipitation_sum', 'night_temp', 'night_temp_min',
-                 'night_humid', 'night_precip', 'night_wind']
+        from moscom.weather import daily_summary
         reg_w = {}
+        reg_cells = {}
         for d in Device.objects.all():
             reg = (d.address_sido or '') + ((' ' + d.address_gungu) if d.address_gungu else '') or '미지정'
             reg_w.setdefault(reg, []).append((d.temperature, d.humidity, d.precipitation, d.wind_speed))
+            if d.weather_cell:
+                reg_cells.setdefault(reg, set()).add(d.weather_cell)
         dates = pd.date_range(panel['bizdate'].min(), panel['bizdate'].max(), freq='D')
+        hist = daily_summary({c for cs in reg_cells.values() for c in cs},
+                             dates[0].date(), dates[-1].date())
+
+        def _avg(vals, key):
+            xs = [v[key] for v in vals if v.get(key) is not None]
+            return float(np.mean(xs)) if xs else None
+
         recs = []
         for reg, vals in reg_w.items():
             t = np.nanmean([v[0] for v in vals if v[0] is not None]) if any(v[0] is not None for v in vals) else 22.0
             hu = np.nanmean([v[1] for v in vals if v[1] is not None]) if any(v[1] is not None for v in vals) else 60.0
             pr = np.nanmean([v[2] for v in vals if v[2] is not None]) if any(v[2] is not None for v in vals) else 0.0
             wi = np.nanmean([v[3] for v in vals if v[3] is not None]) if any(v[3] is not None for v in vals) else 2.0
+            cells = reg_cells.get(reg) or ()
             for dt in dates:
-                recs.append({'region': reg, 'date': dt,
-                             'temperature_2m_mean': t, 'temperature_2m_max': t + 4, 'temperature_2m_min': t - 4,
-                             'precipitation_sum': pr, 'night_temp': t - 2, 'night_temp_min': t - 5,
-                             'night_humid': hu, 'night_precip': pr, 'night_wind': wi})
+                rec = {'region': reg, 'date': dt,
+                       'temperature_2m_mean': t, 'temperature_2m_max': t + 4, 'temperature_2m_min': t - 4,
+                       'precipitation_sum': pr, 'night_temp': t - 2, 'night_temp_min': t - 5,
+                       'night_humid': hu, 'night_precip': pr, 'night_wind': wi}
+                day = [hist[(c, dt.date())] for c in cells if (c, dt.date()) in hist]
+                if day:
+                    for col, key in (('temperature_2m_mean', 'temperature'), ('temperature_2m_max', 'temperature_max'),
+                                     ('temperature_2m_min', 'temperature_min'), ('precipitation_sum', 'precipitation'),
+                                     ('night_temp', 'night_temperature'), ('night_temp_min', 'night_temperature_min'),
+                                     ('night_humid', 'night_humidity'), ('night_precip', 'night_precipitation'),
+                                     ('night_wind', 'night_wind_speed')):
+                        v = _avg(day, key)
+                        if v is not None:
+                            rec[col] = v
+                recs.append(rec)
         return pd.DataFrame(recs)
 
     def _build_features(self, v3, panel, weather):
@@ -266,7 +296,7 @@ class Command(BaseCommand):
                 device_uuid=r['sid'], snapshot_date=snap, target_date=td,
                 defaults=dict(device_name=r['station'], region_name=reg_by_sid.get(r['sid'], ''),
                               horizon_days=int(r['_h']), predicted=int(r['_pred']),
-                              predicted_raw=int(r['_pred']), model_version='v3'))
+                              predicted_raw=int(r['_pred']), model_version='v3', **_bands(r)))
             created += int(c)
         self.stdout.write(self.style.SUCCESS(f'오늘({snap}) 예측 저장: {created}행'))
         # 실측 대조
@@ -304,7 +334,7 @@ class Command(BaseCommand):
                 device_uuid=str(r['sid']), device_name=str(r['station']),
                 region_name=str(reg_by_sid.get(r['sid'], '') or ''),
                 snapshot_date=snap, target_date=td, horizon_days=h,
-                predicted=pred, predicted_raw=pred,
+                predicted=pred, predicted_raw=pred, **_bands(r),
                 actual=actual, error=err,
                 abs_error_pct=(round(abs(err) / max(1, actual) * 100, 1)
                                if (actual is not None and err is not None) else None),
@@ -318,6 +348,11 @@ class Command(BaseCommand):
             raise
 
 
+def _bands(r):
+    """예측 행 → PredictionLog 구간 필드 (없으면 None)."""
+    return {f'predicted_p{q}': (None if pd.isna(r[f'_p{q}']) else int(r[f'_p{q}'])) for q in QUANTILES}
+
+
 def _business_yesterday():
     try:
         from moscom.timeutil import business_yesterday
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moscom', '0006_predictionlog_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device_uuid', models.CharField(max_length=64, verbose_name='장비 UUID')),
+                ('date', models.DateField(verbose_name='날짜')),
+                ('mosquito_count', models.IntegerField(default=0, verbose_name='포집량')),
+                ('finalized', models.BooleanField(default=False, verbose_name='확정')),
+                ('synced_at', models.DateTimeField(auto_now=True, verbose_name='동기화 시각')),
+            ],
+            options={
+                'verbose_name': 'MOSCOM 일별 포집량',
+                'verbose_name_plural': 'MOSCOM 일별 포집량',
+                'ordering': ['-date', 'device_uuid'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailycount',
+            constraint=models.UniqueConstraint(fields=('device_uuid', 'date'), name='uniq_daily_count'),
+        ),
+        migrations.AddIndex(
+            model_name='dailycount',
+            index=models.Index(fields=['date', 'device_uuid'], name='moscom_dail_date_5ec854_idx'),
+        ),
+        migrations.AddField(
+            model_name='syncstate',
+            name='daily_final_until',
+            field=models.DateField(blank=True, null=True, verbose_name='일별 확정 마지막 날짜'),
+        ),
+    ]
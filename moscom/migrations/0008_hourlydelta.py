@@ -0,0 +1,34 @@
+# Generated by Django 4.2.11 on 2026-10-17 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moscom', '0007_dailycount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device_uuid', models.CharField(max_length=64, verbose_name='장비 UUID')),
+                ('hour', models.DateTimeField(verbose_name='시각(정시)')),
+                ('delta', models.IntegerField(default=0, verbose_name='증가량')),
+                ('events', models.IntegerField(default=0, verbose_name='이벤트 수')),
+                ('resets', models.IntegerField(default=0, verbose_name='리셋 수')),
+            ],
+            options={
+                'verbose_name': 'MOSCOM 시간별 증가량',
+                'verbose_name_plural': 'MOSCOM 시간별 증가량',
+                'ordering': ['-hour', 'device_uuid'],
+                'indexes': [models.Index(fields=['hour', 'device_uuid'], name='moscom_hour_hour_90f2ff_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='hourlydelta',
+            constraint=models.UniqueConstraint(fields=('device_uuid', 'hour'), name='uniq_hourly_delta'),
+        ),
+    ]
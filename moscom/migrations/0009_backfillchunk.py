@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-17 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moscom', '0008_hourlydelta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField(verbose_name='시작')),
+                ('end', models.DateTimeField(verbose_name='끝')),
+                ('status', models.CharField(choices=[('running', '진행 중'), ('done', '완료'), ('failed', '실패')], default='running', max_length=10, verbose_name='상태')),
+                ('rows', models.IntegerField(default=0, verbose_name='응답 행 수')),
+                ('created', models.IntegerField(default=0, verbose_name='생성')),
+                ('updated', models.IntegerField(default=0, verbose_name='갱신')),
+                ('attempts', models.IntegerField(default=0, verbose_name='시도 횟수')),
+                ('seconds', models.FloatField(default=0, verbose_name='소요(초)')),
+                ('error', models.TextField(blank=True, default='', verbose_name='오류')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='갱신 시각')),
+            ],
+            options={
+                'verbose_name': '백필 구간',
+                'verbose_name_plural': '백필 구간',
+                'ordering': ['start'],
+                'indexes': [models.Index(fields=['status', 'start'], name='moscom_back_status_2b9d1a_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='backfillchunk',
+            constraint=models.UniqueConstraint(fields=('start', 'end'), name='uniq_backfill_chunk'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.11 on 2026-10-17 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moscom', '0009_backfillchunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='device',
+            name='weather_cell',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=32, verbose_name='날씨 셀'),
+        ),
+        migrations.CreateModel(
+            name='WeatherObservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell', models.CharField(max_length=32, verbose_name='셀')),
+                ('hour', models.DateTimeField(verbose_name='시각(정시)')),
+                ('temperature', models.FloatField(blank=True, null=True, verbose_name='기온(°C)')),
+                ('humidity', models.FloatField(blank=True, null=True, verbose_name='습도(%)')),
+                ('precipitation', models.FloatField(blank=True, null=True, verbose_name='강수량(mm)')),
+                ('wind_speed', models.FloatField(blank=True, null=True, verbose_name='풍속(m/s)')),
+                ('source', models.CharField(blank=True, default='forecast', max_length=10, verbose_name='출처')),
+                ('fetched_at', models.DateTimeField(auto_now_add=True, verbose_name='수집 시각')),
+            ],
+            options={
+                'verbose_name': '날씨 이력',
+                'verbose_name_plural': '날씨 이력',
+                'ordering': ['-hour', 'cell'],
+                'indexes': [models.Index(fields=['hour', 'cell'], name='moscom_weat_hour_725052_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='weatherobservation',
+            constraint=models.UniqueConstraint(fields=('cell', 'hour'), name='uniq_weather_obs'),
+        ),
+    ]
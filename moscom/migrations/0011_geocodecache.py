@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-17 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moscom', '0010_weatherobservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=200, unique=True, verbose_name='주소')),
+                ('latitude', models.FloatField(blank=True, null=True, verbose_name='위도')),
+                ('longitude', models.FloatField(blank=True, null=True, verbose_name='경도')),
+                ('found', models.BooleanField(default=True, verbose_name='찾음')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='조회 시각')),
+            ],
+            options={
+                'verbose_name': '주소 좌표 캐시',
+                'verbose_name_plural': '주소 좌표 캐시',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moscom', '0011_geocodecache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(db_index=True, verbose_name='시작')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='종료')),
+                ('status', models.CharField(choices=[('running', '진행 중'), ('ok', '성공'), ('error', '실패')], default='running', max_length=10, verbose_name='상태')),
+                ('error', models.TextField(blank=True, default='', verbose_name='오류')),
+                ('seconds', models.FloatField(default=0, verbose_name='소요(초)')),
+                ('db_seconds', models.FloatField(default=0, verbose_name='DB 시간(초)')),
+                ('bytes_fetched', models.BigIntegerField(default=0, verbose_name='수신 바이트')),
+                ('records_fetched', models.IntegerField(default=0, verbose_name='수신 레코드')),
+                ('rows_created', models.IntegerField(default=0, verbose_name='생성')),
+                ('rows_updated', models.IntegerField(default=0, verbose_name='갱신')),
+                ('rows_skipped', models.IntegerField(default=0, verbose_name='건너뜀')),
+                ('phases', models.JSONField(blank=True, default=dict, verbose_name='단계별 지표')),
+            ],
+            options={
+                'verbose_name': '동기화 실행 이력',
+                'verbose_name_plural': '동기화 실행 이력',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
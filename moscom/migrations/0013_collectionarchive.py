@@ -0,0 +1,32 @@
+# Generated by Django 4.2.11 on 2026-10-17 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moscom', '0012_syncrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True, verbose_name='월(1일)')),
+                ('path', models.CharField(max_length=300, verbose_name='파일')),
+                ('rows', models.IntegerField(default=0, verbose_name='행 수')),
+                ('size_bytes', models.BigIntegerField(default=0, verbose_name='파일 크기')),
+                ('min_created', models.DateTimeField(blank=True, null=True, verbose_name='최초 측정')),
+                ('max_created', models.DateTimeField(blank=True, null=True, verbose_name='마지막 측정')),
+                ('purged', models.BooleanField(default=False, verbose_name='DB 삭제됨')),
+                ('archived_at', models.DateTimeField(auto_now=True, verbose_name='보관 시각')),
+            ],
+            options={
+                'verbose_name': 'MOSCOM 포집 보관 월',
+                'verbose_name_plural': 'MOSCOM 포집 보관 월',
+                'ordering': ['month'],
+            },
+        ),
+    ]
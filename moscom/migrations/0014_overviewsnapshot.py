@@ -0,0 +1,34 @@
+# Generated by Django 4.2.11 on 2026-10-17 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moscom', '0013_collectionarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OverviewSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_date', models.DateField(verbose_name='영업일')),
+                ('scope', models.CharField(max_length=32, verbose_name='사용자 범위')),
+                ('payload', models.JSONField(default=dict, verbose_name='응답 데이터')),
+                ('final_until', models.DateField(blank=True, null=True, verbose_name='일별 확정 기준')),
+                ('seconds', models.FloatField(default=0, verbose_name='산출 소요(초)')),
+                ('built_at', models.DateTimeField(auto_now=True, verbose_name='산출 시각')),
+            ],
+            options={
+                'verbose_name': '종합현황 스냅샷',
+                'verbose_name_plural': '종합현황 스냅샷',
+                'ordering': ['-business_date', 'scope'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='overviewsnapshot',
+            constraint=models.UniqueConstraint(fields=('business_date', 'scope'), name='uniq_overview_snapshot'),
+        ),
+    ]
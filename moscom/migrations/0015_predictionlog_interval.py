@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-17 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moscom', '0014_overviewsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='predictionlog',
+            name='predicted_p10',
+            field=models.IntegerField(blank=True, null=True, verbose_name='예측 하한(P10)'),
+        ),
+        migrations.AddField(
+            model_name='predictionlog',
+            name='predicted_p50',
+            field=models.IntegerField(blank=True, null=True, verbose_name='예측 중앙(P50)'),
+        ),
+        migrations.AddField(
+            model_name='predictionlog',
+            name='predicted_p90',
+            field=models.IntegerField(blank=True, null=True, verbose_name='예측 상한(P90)'),
+        ),
+    ]
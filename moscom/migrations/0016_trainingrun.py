@@ -0,0 +1,38 @@
+# Generated by Django 4.2.11 on 2026-10-17 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moscom', '0015_predictionlog_interval'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('full', '전체 재학습'), ('warm', '이어 학습'), ('search', '모델 비교')], db_index=True, max_length=10, verbose_name='방식')),
+                ('family', models.CharField(max_length=40, verbose_name='모델 계열')),
+                ('status', models.CharField(choices=[('ok', '성공'), ('partial', '시간 초과(부분)'), ('skipped', '시간 초과(건너뜀)'), ('error', '실패')], default='ok', max_length=10, verbose_name='상태')),
+                ('version', models.CharField(blank=True, default='', max_length=20, verbose_name='모델 버전')),
+                ('n_samples', models.IntegerField(default=0, verbose_name='학습 행')),
+                ('n_new', models.IntegerField(default=0, verbose_name='새 날짜 행')),
+                ('fit_seconds', models.FloatField(default=0, verbose_name='학습 소요(초)')),
+                ('featurize_seconds', models.FloatField(default=0, verbose_name='피처 소요(초)')),
+                ('test_mae', models.FloatField(blank=True, null=True, verbose_name='검증 MAE')),
+                ('persistence_mae', models.FloatField(blank=True, null=True, verbose_name='persistence MAE')),
+                ('skill', models.FloatField(blank=True, null=True, verbose_name='스킬')),
+                ('drift', models.FloatField(blank=True, null=True, verbose_name='드리프트')),
+                ('detail', models.JSONField(blank=True, default=dict, verbose_name='상세')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='기록 시각')),
+            ],
+            options={
+                'verbose_name': 'AI 모델 학습 이력',
+                'verbose_name_plural': 'AI 모델 학습 이력',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moscom', '0016_trainingrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='overviewsnapshot',
+            name='labels',
+            field=models.CharField(blank=True, default='', max_length=16, verbose_name='표시명 지문'),
+        ),
+    ]
@@ -1,8 +1,15 @@
 """MOSCOM 데이터 로컬 저장 모델.
 
 - Device: 장비 마스터 (MOSCOM /device/listAll 스냅샷)
-- Collection: raw 포집 이벤트 (1행 = 1개 측정)
+- Collection: raw 포집 이벤트 (1행 = 1개 측정) — 최근 몇 달만 DB, 지난 달은 Parquet 보관 (archive.py)
+- CollectionArchive: Parquet 로 보관한 Collection 월 목록 (archive.py 가 읽기 시 DB 와 합침)
+- DailyCount: 장비×일 포집량 (MOSCOM 일별 집계 사본 — get_daily_map 의 로컬 소스)
+- HourlyDelta: 장비×시간 포집 증가량 (Collection 누적값 차분 결과 — deltas.py)
 - SyncState: 동기화 진행 상태 (마지막 cursor)
+- SyncRun: run_sync 1회 실행 이력 (phase 별 소요·수신량·행 수·DB 시간 — 시즌 추이 확인용)
+- WeatherObservation: 격자 셀×시간 날씨 이력 (weather.py — 장비는 Device.weather_cell 로 셀 공유)
+- GeocodeCache: 주소 텍스트 → 위경도 geocoding 결과 (weather.py — 매 동기화마다 재조회 안 함)
+- BackfillChunk: 병렬 백필 구간별 체크포인트 (backfill.py — 재시작 시 done 구간 건너뜀)
 - EditLog: 관리자 수정 이력
 """
 from django.db import models
@@ -60,6 +67,8 @@ class Device(models.Model):
     precipitation = models.FloatField('강수량(mm)', null=True, blank=True)
     wind_speed = models.FloatField('풍속(m/s)', null=True, blank=True)
     weather_synced_at = models.DateTimeField('날씨 동기화', null=True, blank=True)
+    # 날씨 격자 셀 키 (WeatherObservation.cell) — 가까운 장비끼리 같은 셀을 공유
+    weather_cell = models.CharField('날씨 셀', max_length=32, blank=True, default='', db_index=True)
 
     # 권역 코드 (device_name prefix 에서 자동 추출 — 예: KH, GH서, BD, HY)
     region_code = models.CharField('권역 코드', max_length=20, blank=True, default='', db_index=True)
@@ -111,11 +120,84 @@ class Collection(models.Model):
         return f'{self.device_uuid} @ {self.created_date}: {self.mosquito_count}'
 
 
+class CollectionArchive(models.Model):
+    """Collection 월(UTC) 1개 = 1행. 그 달 행은 path 의 Parquet 파일에 있고 purged=True 면 DB 에서 지워졌다."""
+    month = models.DateField('월(1일)', unique=True)
+    path = models.CharField('파일', max_length=300)
+    rows = models.IntegerField('행 수', default=0)
+    size_bytes = models.BigIntegerField('파일 크기', default=0)
+    min_created = models.DateTimeField('최초 측정', null=True, blank=True)
+    max_created = models.DateTimeField('마지막 측정', null=True, blank=True)
+    purged = models.BooleanField('DB 삭제됨', default=False)
+    archived_at = models.DateTimeField('보관 시각', auto_now=True)
+
+    class Meta:
+        ordering = ['month']
+        verbose_name = 'MOSCOM 포집 보관 월'
+        verbose_name_plural = 'MOSCOM 포집 보관 월'
+
+    def __str__(self):
+        return f'{self.month:%Y-%m} ({self.rows}행)'
+
+
+class DailyCount(models.Model):
+    """장비×일 포집량. MOSCOM /device/statisticsByDate aggregation=day 응답 1건 = 1행.
+    Collection.mosquito_count 는 누적값이라 Sum 하면 안 되므로, 일별 정확값은 여기서 읽는다.
+    run_sync 가 매시간 아직 확정 안 된 날부터 다시 받아 upsert 한다.
+    """
+    device_uuid = models.CharField('장비 UUID', max_length=64)
+    date = models.DateField('날짜')  # MOSCOM created_date[:10]
+    mosquito_count = models.IntegerField('포집량', default=0)
+    finalized = models.BooleanField('확정', default=False)
+    synced_at = models.DateTimeField('동기화 시각', auto_now=True)
+
+    class Meta:
+        ordering = ['-date', 'device_uuid']
+        constraints = [
+            models.UniqueConstraint(fields=['device_uuid', 'date'], name='uniq_daily_count'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'device_uuid']),
+        ]
+        verbose_name = 'MOSCOM 일별 포집량'
+        verbose_name_plural = 'MOSCOM 일별 포집량'
+
+    def __str__(self):
+        return f'{self.device_uuid} {self.date}: {self.mosquito_count}'
+
+
+class HourlyDelta(models.Model):
+    """장비×시간(UTC) 포집 증가량. Collection 누적값을 deltas.py 가 차분해서 채운다.
+    시간/일 단위 집계는 Collection 대신 여기를 Sum 한다.
+    """
+    device_uuid = models.CharField('장비 UUID', max_length=64)
+    hour = models.DateTimeField('시각(정시)')
+    delta = models.IntegerField('증가량', default=0)
+    events = models.IntegerField('이벤트 수', default=0)
+    resets = models.IntegerField('리셋 수', default=0)
+
+    class Meta:
+        ordering = ['-hour', 'device_uuid']
+        constraints = [
+            models.UniqueConstraint(fields=['device_uuid', 'hour'], name='uniq_hourly_delta'),
+        ]
+        indexes = [
+            models.Index(fields=['hour', 'device_uuid']),
+        ]
+        verbose_name = 'MOSCOM 시간별 증가량'
+        verbose_name_plural = 'MOSCOM 시간별 증가량'
+
+    def __str__(self):
+        return f'{self.device_uuid} {self.hour:%Y-%m-%d %H}시: +{self.delta}'
+
+
 class SyncState(models.Model):
     """싱글톤. id=1만 사용. 마지막 동기화 cursor 저장."""
     id = models.SmallIntegerField(primary_key=True, default=1)
     devices_synced_at = models.DateTimeField('장비 마지막 동기화', null=True, blank=True)
     collections_synced_until = models.DateTimeField('포집 마지막 가져온 시각', null=True, blank=True)
+    # 이 날짜까지의 DailyCount 는 확정값으로 모두 채워져 있음 (행 없는 장비 = 그날 데이터 없음)
+    daily_final_until = models.DateField('일별 확정 마지막 날짜', null=True, blank=True)
     last_run_at = models.DateTimeField('마지막 실행', null=True, blank=True)
     last_status = models.CharField('마지막 상태', max_length=20, blank=True, default='')
     last_error = models.TextField('마지막 오류', blank=True, default='')
@@ -128,6 +210,108 @@ class SyncState(models.Model):
         return f'last={self.last_run_at} status={self.last_status}'
 
 
+class SyncRun(models.Model):
+    """run_sync 1회 = 1행. phases 는 {phase: {seconds, db_seconds, db_queries, bytes, requests,
+    records, created, updated, skipped}} — phase 는 devices / collections / daily_counts / weather.
+    """
+    STATUS_CHOICES = [('running', '진행 중'), ('ok', '성공'), ('error', '실패')]
+
+    started_at = models.DateTimeField('시작', db_index=True)
+    finished_at = models.DateTimeField('종료', null=True, blank=True)
+    status = models.CharField('상태', max_length=10, choices=STATUS_CHOICES, default='running')
+    error = models.TextField('오류', blank=True, default='')
+    seconds = models.FloatField('소요(초)', default=0)
+    db_seconds = models.FloatField('DB 시간(초)', default=0)
+    bytes_fetched = models.BigIntegerField('수신 바이트', default=0)
+    records_fetched = models.IntegerField('수신 레코드', default=0)
+    rows_created = models.IntegerField('생성', default=0)
+    rows_updated = models.IntegerField('갱신', default=0)
+    rows_skipped = models.IntegerField('건너뜀', default=0)
+    phases = models.JSONField('단계별 지표', default=dict, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = '동기화 실행 이력'
+        verbose_name_plural = '동기화 실행 이력'
+
+    def __str__(self):
+        return f'{self.started_at:%Y-%m-%d %H:%M} {self.status} {self.seconds:.1f}s'
+
+
+class WeatherObservation(models.Model):
+    """날씨 격자 셀×시간(UTC 정시) 관측/재분석값. Open-Meteo hourly 응답 1시간 = 1행.
+    Device.temperature 등은 표시용 현재값이고, 학습·예측·과거 보고서는 여기서 읽는다.
+    """
+    cell = models.CharField('셀', max_length=32)
+    hour = models.DateTimeField('시각(정시)')
+    temperature = models.FloatField('기온(°C)', null=True, blank=True)
+    humidity = models.FloatField('습도(%)', null=True, blank=True)
+    precipitation = models.FloatField('강수량(mm)', null=True, blank=True)
+    wind_speed = models.FloatField('풍속(m/s)', null=True, blank=True)
+    source = models.CharField('출처', max_length=10, blank=True, default='forecast')  # forecast|archive
+    fetched_at = models.DateTimeField('수집 시각', auto_now_add=True)
+
+    class Meta:
+        ordering = ['-hour', 'cell']
+        constraints = [
+            models.UniqueConstraint(fields=['cell', 'hour'], name='uniq_weather_obs'),
+        ]
+        indexes = [
+            models.Index(fields=['hour', 'cell']),
+        ]
+        verbose_name = '날씨 이력'
+        verbose_name_plural = '날씨 이력'
+
+    def __str__(self):
+        return f'{self.cell} {self.hour:%Y-%m-%d %H}시: {self.temperature}°C'
+
+
+class GeocodeCache(models.Model):
+    """Open-Meteo geocoding 결과. 주소 텍스트 1개 = 1행. found=False 는 '못 찾음' 결과도 기억."""
+    query = models.CharField('주소', max_length=200, unique=True)
+    latitude = models.FloatField('위도', null=True, blank=True)
+    longitude = models.FloatField('경도', null=True, blank=True)
+    found = models.BooleanField('찾음', default=True)
+    updated_at = models.DateTimeField('조회 시각', auto_now=True)
+
+    class Meta:
+        verbose_name = '주소 좌표 캐시'
+        verbose_name_plural = '주소 좌표 캐시'
+
+    def __str__(self):
+        return f'{self.query} → ({self.latitude}, {self.longitude})' if self.found else f'{self.query} → 없음'
+
+
+class BackfillChunk(models.Model):
+    """백필 구간 1개 = 1행. 끝난 구간(status=done)은 재실행 시 건너뛴다."""
+    STATUS_CHOICES = [('running', '진행 중'), ('done', '완료'), ('failed', '실패')]
+
+    start = models.DateTimeField('시작')
+    end = models.DateTimeField('끝')
+    status = models.CharField('상태', max_length=10, choices=STATUS_CHOICES, default='running')
+    rows = models.IntegerField('응답 행 수', default=0)
+    created = models.IntegerField('생성', default=0)
+    updated = models.IntegerField('갱신', default=0)
+    attempts = models.IntegerField('시도 횟수', default=0)
+    seconds = models.FloatField('소요(초)', default=0)
+    error = models.TextField('오류', blank=True, default='')
+    updated_at = models.DateTimeField('갱신 시각', auto_now=True)
+
+    class Meta:
+        ordering = ['start']
+        constraints = [
+            models.UniqueConstraint(fields=['start', 'end'], name='uniq_backfill_chunk'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'start']),
+        ]
+        verbose_name = '백필 구간'
+        verbose_name_plural = '백필 구간'
+
+    def __str__(self):
+        return f'{self.start:%Y-%m-%d %H:%M} ~ {self.end:%Y-%m-%d %H:%M} {self.status}'
+
+
 class Region(models.Model):
     """권역 마스터. device_name prefix(code) → 사용자 친화적 이름(name) 매핑.
     sync 시 새 prefix 발견하면 자동 생성(name=code 기본값), 관리자가 name 수정.
@@ -187,6 +371,10 @@ class PredictionLog(models.Model):
     predicted_index = models.FloatField('예측 모기지수', null=True, blank=True)
     grade = models.CharField('예측 등급', max_length=10, blank=True, default='')
     remedy_factor = models.FloatField('방역 계수', default=1.0)
+    # 예측 구간 (트리별 예측 분위수, 방역 반영) — 트리 앙상블이 아닌 모델은 비움
+    predicted_p10 = models.IntegerField('예측 하한(P10)', null=True, blank=True)
+    predicted_p50 = models.IntegerField('예측 중앙(P50)', null=True, blank=True)
+    predicted_p90 = models.IntegerField('예측 상한(P90)', null=True, blank=True)
 
     # 입력 피처 요약 (사람이 검증 가능한 수준)
     lag1 = models.IntegerField('전일 실측', default=0)
@@ -226,3 +414,61 @@ class PredictionLog(models.Model):
 
     def __str__(self):
         return f'{self.device_name or self.device_uuid} {self.snapshot_date}→{self.target_date}: 예측 {self.predicted} / 실측 {self.actual}'
+
+
+class OverviewSnapshot(models.Model):
+    """종합현황(_build_overview_data) 확정 스냅샷. 1행 = (영업일 × 사용자 범위).
+    scope 는 core.device_context.scope_key (admin='all', 그 외 허용 장비 해시).
+    final_until 은 만들 당시 SyncState.daily_final_until — business_date 보다 작으면 무효.
+    labels 는 만들 당시 관측소·권역 표시명 지문 (core.overview_snapshots.labels_key) — 다르면 무효.
+    장비 상태·48시간 raw 부분은 payload 에 있어도 읽을 때 다시 채운다.
+    """
+    business_date = models.DateField('영업일')
+    scope = models.CharField('사용자 범위', max_length=32)
+    payload = models.JSONField('응답 데이터', default=dict)
+    final_until = models.DateField('일별 확정 기준', null=True, blank=True)
+    labels = models.CharField('표시명 지문', max_length=16, blank=True, default='')
+    seconds = models.FloatField('산출 소요(초)', default=0)
+    built_at = models.DateTimeField('산출 시각', auto_now=True)
+
+    class Meta:
+        ordering = ['-business_date', 'scope']
+        constraints = [
+            models.UniqueConstraint(fields=['business_date', 'scope'], name='uniq_overview_snapshot'),
+        ]
+        verbose_name = '종합현황 스냅샷'
+        verbose_name_plural = '종합현황 스냅샷'
+
+    def __str__(self):
+        return f'{self.business_date} [{self.scope}] {self.built_at:%Y-%m-%d %H:%M}'
+
+
+class TrainingRun(models.Model):
+    """AI 모델 학습 1회(주간 비교는 후보 1개) = 1행 — 시즌 데이터가 늘어도 학습 비용·스킬을 추적.
+    skill = 1 - MAE / persistence(전일 실측) MAE. drift = 어제 모델의 새 날짜 MAE / 기준 MAE (이어 학습 판정).
+    """
+    MODE_CHOICES = [('full', '전체 재학습'), ('warm', '이어 학습'), ('search', '모델 비교')]
+    STATUS_CHOICES = [('ok', '성공'), ('partial', '시간 초과(부분)'), ('skipped', '시간 초과(건너뜀)'), ('error', '실패')]
+
+    mode = models.CharField('방식', max_length=10, choices=MODE_CHOICES, db_index=True)
+    family = models.CharField('모델 계열', max_length=40)
+    status = models.CharField('상태', max_length=10, choices=STATUS_CHOICES, default='ok')
+    version = models.CharField('모델 버전', max_length=20, blank=True, default='')
+    n_samples = models.IntegerField('학습 행', default=0)
+    n_new = models.IntegerField('새 날짜 행', default=0)
+    fit_seconds = models.FloatField('학습 소요(초)', default=0)
+    featurize_seconds = models.FloatField('피처 소요(초)', default=0)
+    test_mae = models.FloatField('검증 MAE', null=True, blank=True)
+    persistence_mae = models.FloatField('persistence MAE', null=True, blank=True)
+    skill = models.FloatField('스킬', null=True, blank=True)
+    drift = models.FloatField('드리프트', null=True, blank=True)
+    detail = models.JSONField('상세', default=dict, blank=True)
+    created_at = models.DateTimeField('기록 시각', auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'AI 모델 학습 이력'
+        verbose_name_plural = 'AI 모델 학습 이력'
+
+    def __str__(self):
+        return f'{self.created_at:%Y-%m-%d %H:%M} {self.mode} {self.family} {self.fit_seconds:.1f}s'
@@ -3,19 +3,27 @@
 핵심 함수:
 - sync_devices(): /device/listAll 호출 → Device 테이블 upsert
 - sync_collections(since=None, until=None): /device/statisticsByDate raw → Collection upsert
-- run_sync(): 두 개 다 + SyncState 갱신 (1시간 주기 호출용)
-- backfill_collections(days=30): 최초 30일 백필
+- sync_daily_counts(since=None): /device/statisticsByDate day → DailyCount upsert (확정 안 된 날부터)
+- run_sync(): 두 개 다 + SyncState 갱신 (1시간 주기 호출용) + SyncRun 실행 이력 1행
+  (raw ingest 직후 영향받은 장비·구간의 HourlyDelta 를 deltas.update_hourly_deltas 로 재계산)
+- backfill_collections(days=30): 최초 30일 백필 (순차 — 대량·재시작은 backfill.backfill_parallel)
 """
+import csv
+import io
 import logging
+import os
 import re
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone as dt_timezone
 
-from django.db import transaction
+from django.db import connection, transaction
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
 from core import moscom_client
-from .models import Device, Collection, SyncState, Region
+from . import deltas
+from .models import Device, Collection, SyncState, SyncRun, Region, DailyCount
 
 logger = logging.getLogger(__name__)
 
@@ -57,94 +65,120 @@ def _parse_iso(s):
 
 # ─ 장비 동기화 ──────────────────────────────────
 
+DEVICE_BATCH_SIZE = 500
+
+
+def _device_defaults(d, region_code):
+    """listAll entry['device'] → Device 필드 dict (device_uuid·2축 분류 제외)."""
+    setting = d.get('deviceSetting') or {}
+    return {
+        'device_id': d.get('id'),
+        'device_name': (d.get('device_name') or '').strip()[:200],
+        'device_usim': (d.get('device_usim') or '')[:64],
+        'address_sido': (d.get('address_sido') or '')[:50],
+        'address_gungu': (d.get('address_gungu') or '')[:50],
+        'address_dong': (d.get('address_dong') or '')[:50],
+        'address_detail': (d.get('address_detail') or '')[:200],
+        'latitude': float(d.get('latitude') or 0),
+        'longitude': float(d.get('longitude') or 0),
+        'mode': int(d.get('mode') or 0),
+        'on_time': (d.get('on_time') or '')[:50],
+        'co2_on_time': (d.get('co2_on_time') or '')[:50],
+        'co2_period': int(d.get('co2_period') or 0),
+        'current_mosquito_count': int(d.get('mosquito_count') or 0),
+        'current_battery': int(d.get('battery') or 0),
+        'current_charge': int(d.get('charge') or 0),
+        'current_fan': int(d.get('fan') or 0),
+        'device_date': _parse_iso(d.get('device_date')),
+        'updated_date': _parse_iso(d.get('updated_date')),
+        'created_date': _parse_iso(d.get('created_date')),
+        'last_offline_alert_date': _parse_iso(d.get('last_offline_alert_date')),
+        'last_battery_alert_date': _parse_iso(d.get('last_battery_alert_date')),
+        'last_collection_alert_date': _parse_iso(d.get('last_collection_alert_date')),
+        'normal_min': int(setting.get('normal_min', 0) or 0),
+        'normal_max': int(setting.get('normal_max', 49) or 49),
+        'warning_min': int(setting.get('warning_min', 50) or 50),
+        'warning_max': int(setting.get('warning_max', 99) or 99),
+        'bad_min': int(setting.get('bad_min', 100) or 100),
+        'bad_max': int(setting.get('bad_max', 10000) or 10000),
+        'is_active': True,
+        'region_code': region_code,
+    }
+
+
 def sync_devices():
-    """전체 장비 동기화. listAll은 가벼우니 매번 전체 upsert."""
+    """전체 장비 동기화. listAll은 가벼우니 매번 전체 upsert.
+    기존 장비는 한 번에 읽어와 필드 값을 비교하고, 바뀐 행만 bulk_update 한다 (장비 수와 무관하게 쿼리 수 일정).
+    """
     raw = moscom_client.list_devices(force_refresh=True)
     if not isinstance(raw, list):
         raise RuntimeError(f'unexpected list_devices response: {type(raw).__name__}')
 
-    seen_uuids = set()
+    incoming = {}
     seen_prefixes = set()
-    n_create = n_update = 0
+    for entry in raw:
+        d = entry.get('device') or {}
+        uuid = d.get('device_uuid') or entry.get('device_uuid')
+        if not uuid:
+            continue
+        region_code = extract_region_code((d.get('device_name') or '').strip())[:20]
+        if region_code:
+            seen_prefixes.add(region_code)
+        incoming[uuid] = _device_defaults(d, region_code)  # 같은 uuid 중복 시 마지막 값
+
+    field_names = ['device_uuid', 'region_type', 'form_type'] + list(_device_defaults({}, ''))
+    now = timezone.now()
+    to_create, to_update = [], []
+    changed_fields = set()
+    n_unchanged = 0
     with transaction.atomic():
-        for entry in raw:
-            d = entry.get('device') or {}
-            uuid = d.get('device_uuid') or entry.get('device_uuid')
-            if not uuid:
-                continue
-            seen_uuids.add(uuid)
-            setting = d.get('deviceSetting') or {}
-            dev_name = (d.get('device_name') or '').strip()[:200]
-            region_code = extract_region_code(dev_name)[:20]
-            if region_code:
-                seen_prefixes.add(region_code)
-
-            defaults = {
-                'device_id': d.get('id'),
-                'device_name': dev_name,
-                'device_usim': (d.get('device_usim') or '')[:64],
-                'address_sido': (d.get('address_sido') or '')[:50],
-                'address_gungu': (d.get('address_gungu') or '')[:50],
-                'address_dong': (d.get('address_dong') or '')[:50],
-                'address_detail': (d.get('address_detail') or '')[:200],
-                'latitude': float(d.get('latitude') or 0),
-                'longitude': float(d.get('longitude') or 0),
-                'mode': int(d.get('mode') or 0),
-                'on_time': (d.get('on_time') or '')[:50],
-                'co2_on_time': (d.get('co2_on_time') or '')[:50],
-                'co2_period': int(d.get('co2_period') or 0),
-                'current_mosquito_count': int(d.get('mosquito_count') or 0),
-                'current_battery': int(d.get('battery') or 0),
-                'current_charge': int(d.get('charge') or 0),
-                'current_fan': int(d.get('fan') or 0),
-                'device_date': _parse_iso(d.get('device_date')),
-                'updated_date': _parse_iso(d.get('updated_date')),
-                'created_date': _parse_iso(d.get('created_date')),
-                'last_offline_alert_date': _parse_iso(d.get('last_offline_alert_date')),
-                'last_battery_alert_date': _parse_iso(d.get('last_battery_alert_date')),
-                'last_collection_alert_date': _parse_iso(d.get('last_collection_alert_date')),
-                'normal_min': int(setting.get('normal_min', 0) or 0),
-                'normal_max': int(setting.get('normal_max', 49) or 49),
-                'warning_min': int(setting.get('warning_min', 50) or 50),
-                'warning_max': int(setting.get('warning_max', 99) or 99),
-                'bad_min': int(setting.get('bad_min', 100) or 100),
-                'bad_max': int(setting.get('bad_max', 10000) or 10000),
-                'is_active': True,
-                'region_code': region_code,
-            }
-            # 신규 생성 시에만 2축 분류를 빈 문자열로 초기화 (NOT NULL 제약 대응).
-            # 기존 장비는 관리자가 지정한 값을 덮어쓰지 않도록 defaults 에서 제외한다.
-            existing = Device.objects.filter(device_uuid=uuid).first()
+        existing_map = {
+            dev.device_uuid: dev for dev in
+            Device.objects.filter(device_uuid__in=list(incoming)).only('id', *field_names)
+        }
+        for uuid, defaults in incoming.items():
+            existing = existing_map.get(uuid)
             if existing is None:
-                create_defaults = dict(defaults, region_type='', form_type='')
-                Device.objects.create(device_uuid=uuid, **create_defaults)
-                created = True
-            else:
-                for k, v in defaults.items():
-                    setattr(existing, k, v)
-                # 과거에 NULL 로 저장된 행 방어
-                if existing.region_type is None:
-                    existing.region_type = ''
-                if existing.form_type is None:
-                    existing.form_type = ''
-                existing.save()
-                created = False
-            if created:
-                n_create += 1
-            else:
-                n_update += 1
+                # 신규 생성 시에만 2축 분류를 빈 문자열로 초기화 (NOT NULL 제약 대응).
+                to_create.append(Device(device_uuid=uuid, region_type='', form_type='', **defaults))
+                continue
+            # 기존 장비는 관리자가 지정한 2축 분류를 덮어쓰지 않는다 — listAll 필드만 비교
+            diff = [k for k, v in defaults.items() if getattr(existing, k) != v]
+            # 과거에 NULL 로 저장된 행 방어
+            for k in ('region_type', 'form_type'):
+                if getattr(existing, k) is None:
+                    diff.append(k)
+                    defaults = dict(defaults, **{k: ''})
+            if not diff:
+                n_unchanged += 1
+                continue
+            for k in diff:
+                setattr(existing, k, defaults[k])
+            existing.synced_at = now  # bulk_update 는 auto_now 를 채우지 않음
+            changed_fields.update(diff)
+            to_update.append(existing)
+
+        if to_create:
+            Device.objects.bulk_create(to_create, batch_size=DEVICE_BATCH_SIZE)
+        if to_update:
+            Device.objects.bulk_update(
+                to_update, sorted(changed_fields) + ['synced_at'], batch_size=DEVICE_BATCH_SIZE,
+            )
 
         # MOSCOM에서 빠진 장비는 비활성으로 표시 (삭제는 안 함 — Collection 참조 깨질 위험)
-        Device.objects.exclude(device_uuid__in=seen_uuids).update(is_active=False)
+        Device.objects.filter(is_active=True).exclude(device_uuid__in=list(incoming)).update(is_active=False)
 
         # 새로 발견된 prefix 는 Region 마스터에 자동 생성 (name=code 기본값, 관리자가 수정)
-        existing = set(Region.objects.values_list('code', flat=True))
-        for code in seen_prefixes:
-            if code not in existing:
-                Region.objects.create(code=code, name=code, sort_order=100)
-
-    logger.info(f'sync_devices: created={n_create}, updated={n_update}, total={len(seen_uuids)}, prefixes={len(seen_prefixes)}')
-    return {'created': n_create, 'updated': n_update, 'total': len(seen_uuids), 'prefixes': len(seen_prefixes)}
+        known = set(Region.objects.filter(code__in=seen_prefixes).values_list('code', flat=True))
+        new_regions = [Region(code=code, name=code, sort_order=100)
+                       for code in sorted(seen_prefixes - known)]
+        if new_regions:
+            Region.objects.bulk_create(new_regions, ignore_conflicts=True)
+
+    result = {'created': len(to_create), 'updated': len(to_update), 'unchanged': n_unchanged,
+              'total': len(incoming), 'prefixes': len(seen_prefixes)}
+    logger.info(f'sync_devices: {result}')
+    return result
 
 
 # ─ 포집 데이터 동기화 ───────────────────────────
@@ -156,24 +190,75 @@ def _fmt_dt(dt):
     return dt.strftime('%Y-%m-%dT%H:%M:%S')
 
 
-def _ingest_raw_batch(records, overwrite_edited=False):
+# raw 응답에서 덮어쓰는 Collection 필드 (device_uuid·moscom_id 는 자연 키라 제외)
+_OVERWRITE_FIELDS = ['mosquito_count', 'reset', 'battery', 'charge', 'fan', 'created_date', 'edited']
+INGEST_BATCH_SIZE = 1000
+# 이 행 수 이상이면 PostgreSQL 에서는 COPY → 임시테이블 → ON CONFLICT 머지 사용
+PG_MERGE_MIN_ROWS = int(os.environ.get('MOSCOM_PG_MERGE_MIN_ROWS', '2000'))
+
+
+def _pg_merge_collections(rows):
+    """PostgreSQL 전용: rows(Collection 객체) 를 COPY 로 임시테이블에 넣고 한 번에 upsert."""
+    table = connection.ops.quote_name(Collection._meta.db_table)
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    for c in rows:
+        w.writerow([c.moscom_id, c.device_uuid, c.mosquito_count, 't' if c.reset else 'f',
+                    c.battery, c.charge, c.fan, c.created_date.isoformat()])
+    buf.seek(0)
+    with connection.cursor() as cur:
+        cur.execute(
+            'CREATE TEMP TABLE tmp_moscom_collection ('
+            ' moscom_id bigint, device_uuid varchar(64), mosquito_count integer, reset boolean,'
+            ' battery integer, charge integer, fan integer, created_date timestamptz'
+            ') ON COMMIT DROP'
+        )
+        cur.copy_expert('COPY tmp_moscom_collection FROM STDIN WITH (FORMAT csv)', buf)
+        cur.execute(
+            f'INSERT INTO {table} (moscom_id, device_uuid, mosquito_count, reset, battery, charge, fan,'
+            f' created_date, edited, synced_at)'
+            f' SELECT moscom_id, device_uuid, mosquito_count, reset, battery, charge, fan, created_date,'
+            f' false, now() FROM tmp_moscom_collection'
+            f' ON CONFLICT (moscom_id) DO UPDATE SET'
+            f' mosquito_count = EXCLUDED.mosquito_count, reset = EXCLUDED.reset,'
+            f' battery = EXCLUDED.battery, charge = EXCLUDED.charge, fan = EXCLUDED.fan,'
+            f' created_date = EXCLUDED.created_date, edited = false'
+        )
+
+
+def _ingest_raw_batch(records, overwrite_edited=False, update_deltas=True, touched=None):
     """raw 응답 리스트 → Collection 행 일괄 ingest.
     overwrite_edited=False (기본): 이미 있는 행 자체를 스킵 — 데이터 보존.
     overwrite_edited=True: 이미 있는 행의 값(mosquito_count 등) 을 새 응답값으로 덮어쓰기.
         edited=True 인 행도 강제 덮어씀 (수정 이력은 EditLog 에 남아있음).
+        값이 실제로 바뀐 행·필드만 bulk_update (PostgreSQL 대량이면 COPY 머지).
+    새로 들어오거나 바뀐 행이 있는 장비는 가장 이른 시각부터 HourlyDelta 를 다시 계산한다.
+    update_deltas=False: 재계산 생략 (병렬 백필처럼 호출자가 끝에 한 번에 재계산할 때).
+    touched: {device_uuid: 가장 이른 변경 시각} 을 모을 dict (배치 여러 개를 묶어 재계산할 때).
     """
+    t0 = time.monotonic()
     if not records:
-        return {'created': 0, 'updated': 0, 'skipped': 0}
+        return {'created': 0, 'updated': 0, 'skipped': 0, 'delta_hours': 0, 'seconds': 0, 'rows_per_sec': 0}
 
     incoming_ids = [r.get('id') for r in records if r.get('id') is not None]
-    existing_map = {
-        c.moscom_id: c for c in
-        Collection.objects.filter(moscom_id__in=incoming_ids)
-    }
+    existing_qs = Collection.objects.filter(moscom_id__in=incoming_ids)
+    if overwrite_edited:
+        existing_map = {c.moscom_id: c for c in
+                        existing_qs.only('id', 'moscom_id', 'device_uuid', *_OVERWRITE_FIELDS)}
+    else:
+        existing_map = dict.fromkeys(existing_qs.values_list('moscom_id', flat=True))
 
     new_rows = []
-    n_updated = 0
+    changed_rows = []
+    changed_fields = set()
     n_skipped = 0
+    if touched is None:
+        touched = {}  # device_uuid → 가장 이른 변경 시각
+
+    def _touch(uuid, dt):
+        if uuid and (uuid not in touched or dt < touched[uuid]):
+            touched[uuid] = dt
+
     for r in records:
         mid = r.get('id')
         if mid is None:
@@ -181,21 +266,30 @@ def _ingest_raw_batch(records, overwrite_edited=False):
         cd = _parse_iso(r.get('created_date'))
         if cd is None:
             continue
-        existing = existing_map.get(mid)
-        if existing is not None:
+        if mid in existing_map:
             if not overwrite_edited:
                 n_skipped += 1
                 continue
+            existing = existing_map[mid]
             # 덮어쓰기 — edited 상태도 풀고 원본으로 복원
-            existing.mosquito_count = int(r.get('mosquito_count') or 0)
-            existing.reset = bool(r.get('reset'))
-            existing.battery = int(r.get('battery') or 0)
-            existing.charge = int(r.get('charge') or 0)
-            existing.fan = int(r.get('fan') or 0)
-            existing.created_date = cd
-            existing.edited = False
-            existing.save()
-            n_updated += 1
+            values = {
+                'mosquito_count': int(r.get('mosquito_count') or 0),
+                'reset': bool(r.get('reset')),
+                'battery': int(r.get('battery') or 0),
+                'charge': int(r.get('charge') or 0),
+                'fan': int(r.get('fan') or 0),
+                'created_date': cd,
+                'edited': False,
+            }
+            diff = [k for k, v in values.items() if getattr(existing, k) != v]
+            if not diff:
+                n_skipped += 1
+                continue
+            _touch(existing.device_uuid, min(existing.created_date, cd))
+            for k in diff:
+                setattr(existing, k, values[k])
+            changed_fields.update(diff)
+            changed_rows.append(existing)
             continue
         new_rows.append(Collection(
             moscom_id=mid,
@@ -208,9 +302,51 @@ def _ingest_raw_batch(records, overwrite_edited=False):
             created_date=cd,
             edited=False,
         ))
-    if new_rows:
-        Collection.objects.bulk_create(new_rows, batch_size=500, ignore_conflicts=True)
-    return {'created': len(new_rows), 'updated': n_updated, 'skipped': n_skipped}
+        existing_map[mid] = new_rows[-1]  # 같은 배치 안 중복 id 방어
+        _touch(new_rows[-1].device_uuid, cd)
+
+    n_write = len(new_rows) + len(changed_rows)
+    if connection.vendor == 'postgresql' and overwrite_edited and n_write >= PG_MERGE_MIN_ROWS:
+        with transaction.atomic():
+            _pg_merge_collections(new_rows + changed_rows)
+    else:
+        if new_rows:
+            Collection.objects.bulk_create(new_rows, batch_size=500, ignore_conflicts=True)
+        if changed_rows:
+            Collection.objects.bulk_update(changed_rows, sorted(changed_fields), batch_size=INGEST_BATCH_SIZE)
+    delta_result = deltas.update_hourly_deltas(touched) if update_deltas else {'hours': 0}
+    elapsed = time.monotonic() - t0
+    return {'created': len(new_rows), 'updated': len(changed_rows), 'skipped': n_skipped,
+            'delta_hours': delta_result['hours'], 'seconds': round(elapsed, 3),
+            'rows_per_sec': round(len(records) / elapsed, 1) if elapsed > 0 else 0}
+
+
+STREAM_BATCH_SIZE = int(os.environ.get('MOSCOM_STREAM_BATCH', '5000'))
+
+
+def _ingest_raw_stream(start, end, overwrite_edited=False, update_deltas=True):
+    """[start, end] raw 응답을 스트리밍으로 받아 STREAM_BATCH_SIZE 개씩 _ingest_raw_batch.
+    메모리 사용은 기간 길이와 무관하게 배치 크기로 고정. HourlyDelta 는 끝에서 한 번만 재계산.
+    """
+    t0 = time.monotonic()
+    total = {'created': 0, 'updated': 0, 'skipped': 0, 'rows': 0, 'batches': 0}
+    touched = {}
+    for batch in moscom_client.iter_statistics_raw(
+            _fmt_dt(start), _fmt_dt(end), device_uuid='0', batch_size=STREAM_BATCH_SIZE):
+        r = _ingest_raw_batch(batch, overwrite_edited=overwrite_edited, update_deltas=False, touched=touched)
+        for k in ('created', 'updated', 'skipped'):
+            total[k] += r[k]
+        total['rows'] += len(batch)
+        total['batches'] += 1
+    total['delta_hours'] = deltas.update_hourly_deltas(touched)['hours'] if update_deltas else 0
+    if touched:
+        # 지난 날 행이 새로 들어오거나 바뀌었으면 그날부터 종합현황 스냅샷 무효 (평소 매시 동기화는 오늘만)
+        from core.overview_snapshots import invalidate_for_time
+        invalidate_for_time(min(touched.values()))
+    elapsed = time.monotonic() - t0
+    total['seconds'] = round(elapsed, 3)
+    total['rows_per_sec'] = round(total['rows'] / elapsed, 1) if elapsed > 0 else 0
+    return total
 
 
 def sync_collections(since=None, until=None, overwrite_edited=False):
@@ -226,13 +362,7 @@ def sync_collections(since=None, until=None, overwrite_edited=False):
     if since >= until:
         return {'created': 0, 'updated': 0, 'skipped': 0, 'since': since.isoformat(), 'until': until.isoformat()}
 
-    data = moscom_client.get_statistics_by_date(
-        start_dt=_fmt_dt(since), end_dt=_fmt_dt(until),
-        aggregation='raw', device_uuid='0', force_refresh=True,
-    )
-    if not isinstance(data, list):
-        raise RuntimeError(f'unexpected raw response: {type(data).__name__}')
-    result = _ingest_raw_batch(data, overwrite_edited=overwrite_edited)
+    result = _ingest_raw_stream(since, until, overwrite_edited=overwrite_edited)
 
     state.collections_synced_until = until
     state.save(update_fields=['collections_synced_until'])
@@ -248,53 +378,220 @@ def backfill_collections(days=30, chunk_days=7, overwrite_edited=False):
     now = timezone.now()
     start = now - timedelta(days=days)
     total = {'created': 0, 'updated': 0, 'skipped': 0, 'chunks': 0}
+    n_rows = 0
+    ingest_sec = 0.0
     cur = start
     while cur < now:
         nxt = min(cur + timedelta(days=chunk_days), now)
-        data = moscom_client.get_statistics_by_date(
-            start_dt=_fmt_dt(cur), end_dt=_fmt_dt(nxt),
-            aggregation='raw', device_uuid='0', force_refresh=True,
-        )
-        if isinstance(data, list):
-            r = _ingest_raw_batch(data, overwrite_edited=overwrite_edited)
-            total['created'] += r['created']
-            total['updated'] += r.get('updated', 0)
-            total['skipped'] += r['skipped']
-            total['chunks'] += 1
-            logger.info(f'backfill chunk {cur} ~ {nxt}: {r}')
+        r = _ingest_raw_stream(cur, nxt, overwrite_edited=overwrite_edited)
+        total['created'] += r['created']
+        total['updated'] += r['updated']
+        total['skipped'] += r['skipped']
+        total['chunks'] += 1
+        n_rows += r['rows']
+        ingest_sec += r['seconds']
+        logger.info(f'backfill chunk {cur} ~ {nxt}: {r}')
         cur = nxt
 
     state = _get_state()
     state.collections_synced_until = now
     state.save(update_fields=['collections_synced_until'])
     total['overwrite_edited'] = overwrite_edited
+    total['rows_per_sec'] = round(n_rows / ingest_sec, 1) if ingest_sec > 0 else 0
     return total
 
 
+# ─ 일별 집계 동기화 ─────────────────────────────
+
+DAILY_CHUNK_DAYS = 31
+
+
+def sync_daily_counts(since=None):
+    """MOSCOM 일별 집계(aggregation='day') → DailyCount upsert.
+    since 미지정: 마지막 확정일 다음날부터 (처음이면 Collection 최초일부터) 오늘까지.
+    확정된 날까지 SyncState.daily_final_until 을 전진시킨다.
+    """
+    state = _get_state()
+    today = datetime.now(dt_timezone.utc).date()
+    if since is not None and state.daily_final_until and since <= state.daily_final_until:
+        # 확정 구간을 다시 받는 경우 — 그 구간 종합현황 스냅샷·학습 피처 행은 새 값으로 다시 만든다
+        from core.overview_snapshots import invalidate_from
+        from . import features
+        invalidate_from(since)
+        features.invalidate_from(since)
+    if since is None:
+        if state.daily_final_until:
+            since = state.daily_final_until + timedelta(days=1)
+        else:
+            from .archive import collection_range
+            first = collection_range()[0]
+            since = first.astimezone(dt_timezone.utc).date() if first else today - timedelta(days=30)
+
+    n_rows = 0
+    final_until = state.daily_final_until
+    cur = since
+    while cur <= today:
+        last = min(cur + timedelta(days=DAILY_CHUNK_DAYS - 1), today)
+        data = moscom_client.get_statistics_by_date(
+            start_dt=cur.strftime('%Y-%m-%dT00:00:00.000Z'),
+            end_dt=(last + timedelta(days=1)).strftime('%Y-%m-%dT00:00:00.000Z'),
+            aggregation='day', device_uuid='0', force_refresh=True,
+        )
+        if not isinstance(data, list):
+            raise RuntimeError(f'unexpected day response: {type(data).__name__}')
+        objs = {}
+        for r in data:
+            u = (r.get('device_uuid') or '')[:64]
+            try:
+                d = datetime.strptime((r.get('created_date') or '')[:10], '%Y-%m-%d').date()
+            except ValueError:
+                continue
+            if not u or d < cur or d > last:
+                continue
+            objs[(u, d)] = DailyCount(
+                device_uuid=u, date=d,
+                mosquito_count=int(r.get('mosquito_count') or 0),
+                finalized=moscom_client.is_final_day(d),
+            )
+        with transaction.atomic():
+            if objs:
+                DailyCount.objects.bulk_create(
+                    list(objs.values()), batch_size=1000,
+                    update_conflicts=True, unique_fields=['device_uuid', 'date'],
+                    update_fields=['mosquito_count', 'finalized', 'synced_at'],
+                )
+            # 청크 안에서 확정된 마지막 날까지 커서 전진
+            d = last
+            while d >= cur and not moscom_client.is_final_day(d):
+                d -= timedelta(days=1)
+            if d >= cur and (final_until is None or d > final_until):
+                final_until = d
+                state.daily_final_until = final_until
+                state.save(update_fields=['daily_final_until'])
+        n_rows += len(objs)
+        cur = last + timedelta(days=1)
+
+    result = {'rows': n_rows, 'since': since.isoformat(),
+              'final_until': final_until.isoformat() if final_until else None}
+    logger.info(f'sync_daily_counts: {result}')
+    return result
+
+
 # ─ 메인 진입점 ─────────────────────────────────
 
+# run_sync phase 결과 → (수신 레코드, 생성, 갱신, 건너뜀) 키
+_PHASE_COUNT_KEYS = {
+    'devices': ('total', 'created', 'updated', 'unchanged'),
+    'collections': ('rows', 'created', 'updated', 'skipped'),
+    'daily_counts': ('rows', None, 'rows', None),
+    'weather': ('fetched_cells', 'observations', 'updated', None),
+}
+SYNC_RUN_RETENTION_DAYS = int(os.environ.get('MOSCOM_SYNC_RUN_RETENTION_DAYS', '180'))
+
+
+class _RunRecorder:
+    """run_sync 의 phase 별 소요·DB 시간·upstream 수신량을 재서 SyncRun.phases 에 모은다."""
+
+    def __init__(self):
+        self.phases = {}
+
+    @staticmethod
+    def _upstream():
+        from .weather import transfer_totals as weather_totals
+        a, b = moscom_client.transfer_totals(), weather_totals()
+        return a['requests'] + b['requests'], a['bytes'] + b['bytes']
+
+    @contextmanager
+    def phase(self, name):
+        db = {'seconds': 0.0, 'queries': 0}
+
+        def _timed(execute, sql, params, many, context):
+            t = time.monotonic()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                db['seconds'] += time.monotonic() - t
+                db['queries'] += 1
+
+        req0, bytes0 = self._upstream()
+        t0 = time.monotonic()
+        out = {}
+        try:
+            with connection.execute_wrapper(_timed):
+                yield out
+        finally:
+            req1, bytes1 = self._upstream()
+            m = {'seconds': round(time.monotonic() - t0, 3),
+                 'db_seconds': round(db['seconds'], 3), 'db_queries': db['queries'],
+                 'requests': req1 - req0, 'bytes': bytes1 - bytes0}
+            r = out.get('result') or {}
+            for metric, key in zip(('records', 'created', 'updated', 'skipped'), _PHASE_COUNT_KEYS[name]):
+                m[metric] = int(r.get(key) or 0) if key else 0
+            if 'error' in r:
+                m['error'] = str(r['error'])[:300]
+            self.phases[name] = m
+
+    def save(self, run, status, error=''):
+        ph = self.phases.values()
+        run.finished_at = timezone.now()
+        run.status = status
+        run.error = error[:1000]
+        run.seconds = round((run.finished_at - run.started_at).total_seconds(), 3)
+        run.db_seconds = round(sum(p['db_seconds'] for p in ph), 3)
+        run.bytes_fetched = sum(p['bytes'] for p in ph)
+        run.records_fetched = sum(p['records'] for p in ph)
+        run.rows_created = sum(p['created'] for p in ph)
+        run.rows_updated = sum(p['updated'] for p in ph)
+        run.rows_skipped = sum(p['skipped'] for p in ph)
+        run.phases = self.phases
+        run.save()
+
+
 def run_sync():
-    """Celery 가 1시간마다 호출. 장비 + 포집 incremental + 날씨."""
+    """Celery 가 1시간마다 호출. 장비 + 포집 incremental + 날씨.
+    실행마다 SyncRun 1행 (phase 별 소요·수신량·행 수·DB 시간) 을 남긴다.
+    """
     state = _get_state()
     state.last_run_at = timezone.now()
+    run = SyncRun.objects.create(started_at=state.last_run_at)
+    rec = _RunRecorder()
     try:
-        dr = sync_devices()
-        cr = sync_collections()
+        with rec.phase('devices') as ph:
+            dr = ph['result'] = sync_devices()
+        with rec.phase('collections') as ph:
+            cr = ph['result'] = sync_collections()
+        # 일별 집계 (get_daily_map 로컬 소스) — 실패해도 sync 전체 fail 시키지 않음
+        with rec.phase('daily_counts') as ph:
+            try:
+                dcr = sync_daily_counts()
+            except Exception as de:
+                logger.warning(f'daily count sync failed: {de}')
+                dcr = {'error': str(de)}
+            ph['result'] = dcr
         # 날씨 동기화 (실패해도 sync 전체 fail 시키지 않음)
-        try:
-            from .weather import sync_weather
-            wr = sync_weather()
-        except Exception as we:
-            logger.warning(f'weather sync failed: {we}')
-            wr = {'error': str(we)}
+        with rec.phase('weather') as ph:
+            try:
+                from .weather import sync_weather
+                wr = sync_weather()
+            except Exception as we:
+                logger.warning(f'weather sync failed: {we}')
+                wr = {'error': str(we)}
+            ph['result'] = wr
         state.last_status = 'ok'
         state.last_error = ''
         state.devices_synced_at = timezone.now()
         state.save(update_fields=['last_run_at', 'last_status', 'last_error', 'devices_synced_at'])
-        return {'devices': dr, 'collections': cr, 'weather': wr}
+        rec.save(run, 'ok')
+        # 장비·권역·날씨가 바뀌었으니 대시보드 장비 컨텍스트 새 세대로
+        from core.device_context import bump_generation
+        bump_generation()
+        SyncRun.objects.filter(
+            started_at__lt=timezone.now() - timedelta(days=SYNC_RUN_RETENTION_DAYS)).delete()
+        return {'devices': dr, 'collections': cr, 'daily_counts': dcr, 'weather': wr, 'run_id': run.id}
     except Exception as e:
         logger.exception('run_sync failed')
         state.last_status = 'error'
         state.last_error = (str(e) or repr(e))[:1000]
         state.save(update_fields=['last_run_at', 'last_status', 'last_error'])
+        rec.save(run, 'error', state.last_error)
         raise
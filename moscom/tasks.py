@@ -1,32 +1,105 @@
-"""Celery 태스크 — 1시간마다 동기화, 매일 새벽 5시 재학습."""
+"""Celery 태스크 — 1시간마다 동기화(+종합현황 스냅샷·예측 저장소·학습 피처 테이블), 매일 새벽 5시 재학습, 매월 Collection Parquet 보관."""
 import logging
+import os
 from celery import shared_task
 from .sync import run_sync
 
 logger = logging.getLogger(__name__)
 
+# 주간 모델 비교 — 전역 CELERY_TASK_TIME_LIMIT(30분)으로는 비교 + 전체 재학습이 못 끝난다.
+# 태스크 제한을 따로 두고, 비교 예산은 그 안에서 피처 테이블 읽기·새 계열 전체 재학습 여유를 뺀 만큼.
+SEARCH_TIME_LIMIT = int(os.environ.get('MOSCOM_SEARCH_TIME_LIMIT', str(2 * 60 * 60)))
+SEARCH_HEADROOM = int(os.environ.get('MOSCOM_SEARCH_HEADROOM', str(60 * 60)))
+
 
 @shared_task(name='moscom.sync_hourly')
 def sync_hourly():
-    return run_sync()
+    result = run_sync()
+    # 확정일이 전진했을 수 있으니 종합현황 스냅샷은 별도 태스크로 (동기화 worker 를 붙잡지 않게)
+    overview_snapshots.delay()
+    fill_predictions.delay()
+    append_features.delay()
+    return result
+
+
+@shared_task(name='moscom.overview_snapshots')
+def overview_snapshots():
+    """동기화 직후 — 최근 확정 영업일 × 사용자 범위 종합현황 스냅샷 채우기."""
+    from core.overview_snapshots import materialize
+    return materialize()
+
+
+@shared_task(name='moscom.append_features')
+def append_features():
+    """동기화 직후 — 새로 확정된 날의 학습 피처 행만 피처 테이블에 덧붙인다."""
+    from .features import append_finalized
+    return append_finalized()
+
+
+@shared_task(name='moscom.fill_predictions')
+def fill_predictions():
+    """동기화·재학습 직후 — 오늘(영업일) 전체 장비 예측을 계산해 예측 저장소에 채운다."""
+    from core.prediction_store import fill
+    return fill()
 
 
 @shared_task(name='moscom.retrain_daily')
 def retrain_daily():
-    """매일 새벽 5시 — 어제까지 들어온 데이터로 AI 모델 재학습.
+    """매일 새벽 5시 — 어제까지 들어온 데이터로 AI 모델 이어 학습 (드리프트가 크면 전체 재학습).
     Celery 가 worker 안에서 management command 호출."""
     from django.core.management import call_command
     from io import StringIO
     buf = StringIO()
     try:
-        call_command('moscom_train', stdout=buf)
-        # predictor lru_cache 무효화
-        from core import predictor
+        call_command('moscom_train', mode='warm', stdout=buf)
+        # 이 worker 는 새 버전으로 바로 교체 (다른 프로세스는 model_registry 공지를 보고 백그라운드 교체)
+        from core import model_registry
         try:
-            predictor._load.cache_clear()
+            model_registry.refresh()
         except Exception:
-            pass
+            logger.exception('model refresh after retrain failed')
+        # 새 모델 버전으로 오늘 예측 미리 채우기
+        fill_predictions.delay()
         return {'ok': True, 'stdout_tail': buf.getvalue()[-2000:]}
     except Exception as e:
         logger.exception('retrain_daily failed')
         return {'ok': False, 'error': str(e), 'stdout': buf.getvalue()[-2000:]}
+
+
+@shared_task(name='moscom.model_search_weekly',
+             time_limit=SEARCH_TIME_LIMIT, soft_time_limit=SEARCH_TIME_LIMIT - 60)
+def model_search_weekly():
+    """매주 — 후보 모델 계열을 시간 예산 안에서 병렬 비교. 계열이 바뀌면 바로 전체 재학습·공지."""
+    from django.core.management import call_command
+    from io import StringIO
+    from .management.commands.moscom_model_search import BUDGET_SECONDS
+    buf = StringIO()
+    budget = max(60, min(BUDGET_SECONDS, SEARCH_TIME_LIMIT - SEARCH_HEADROOM))
+    try:
+        call_command('moscom_model_search', apply=True, budget=budget, stdout=buf)
+        from core import model_registry
+        if model_registry.current_version() != model_registry.get().version:
+            try:
+                model_registry.refresh()
+            except Exception:
+                logger.exception('model refresh after model search failed')
+            fill_predictions.delay()
+        return {'ok': True, 'stdout_tail': buf.getvalue()[-2000:]}
+    except Exception as e:
+        logger.exception('model_search_weekly failed')
+        return {'ok': False, 'error': str(e), 'stdout': buf.getvalue()[-2000:]}
+
+
+@shared_task(name='moscom.archive_monthly')
+def archive_monthly():
+    """매월 2일 — HOT_MONTHS 이전 닫힌 달의 Collection 을 Parquet 로 보관하고 DB 에서 삭제."""
+    from .archive import archive_month, closed_months
+    out = []
+    for m in closed_months():
+        try:
+            out.append(archive_month(m))
+        except Exception as e:
+            logger.exception('archive_month failed: %s', m)
+            out.append({'month': f'{m:%Y-%m}', 'error': str(e)})
+            break
+    return out
@@ -0,0 +1,103 @@
+"""moscom.deltas — 누적 카운터 차분 규칙 (compute_deltas) 과 장비별 HourlyDelta 재계산."""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from .deltas import compute_deltas, update_device_deltas
+from .models import Collection, HourlyDelta
+
+T0 = datetime(2026, 7, 1, 3, 0, tzinfo=dt_timezone.utc)
+
+
+def _ns(*minutes):
+    return np.array([int((T0 + timedelta(minutes=m)).timestamp() * 1e9) for m in minutes], dtype=np.int64)
+
+
+class ComputeDeltasTests(SimpleTestCase):
+    def test_empty(self):
+        t, d, r = compute_deltas([], [], [])
+        self.assertEqual((t.size, d.size, r.size), (0, 0, 0))
+
+    def test_increments_from_baseline(self):
+        t, d, r = compute_deltas(_ns(0, 10, 20, 30), [5, 8, 8, 12], [False] * 4, baseline=3)
+        self.assertEqual(d.tolist(), [2, 3, 0, 4])
+        self.assertEqual(r.tolist(), [False] * 4)
+
+    def test_missing_baseline_first_row_is_zero(self):
+        _, d, r = compute_deltas(_ns(0, 10), [40, 45], [False, False])
+        self.assertEqual(d.tolist(), [0, 5])
+        self.assertEqual(r.tolist(), [False, False])
+
+    def test_missing_baseline_first_row_reset_counts_itself(self):
+        _, d, r = compute_deltas(_ns(0, 10), [4, 6], [True, False])
+        self.assertEqual(d.tolist(), [4, 2])
+        self.assertEqual(r.tolist(), [True, False])
+
+    def test_reset_flag_restarts_counter(self):
+        # reset 행은 직전보다 커도 그 행의 값이 증가량
+        _, d, r = compute_deltas(_ns(0, 10, 20), [10, 12, 15], [False, True, False], baseline=10)
+        self.assertEqual(d.tolist(), [0, 12, 3])
+        self.assertEqual(r.tolist(), [False, True, False])
+
+    def test_decrease_without_flag_is_restart(self):
+        _, d, r = compute_deltas(_ns(0, 10, 20), [10, 4, 6], [False] * 3, baseline=9)
+        self.assertEqual(d.tolist(), [1, 4, 2])
+        self.assertEqual(r.tolist(), [False, True, False])
+
+    def test_decrease_from_baseline_is_restart(self):
+        _, d, r = compute_deltas(_ns(0), [3], [False], baseline=50)
+        self.assertEqual(d.tolist(), [3])
+        self.assertEqual(r.tolist(), [True])
+
+    def test_duplicate_timestamp_keeps_largest_moscom_id(self):
+        # 같은 시각 두 행 — 입력 순서와 무관하게 moscom_id 가 큰 행(7)만
+        t, d, _ = compute_deltas(_ns(0, 0, 10), [7, 9, 12], [False] * 3, moscom_ids=[2, 1, 3], baseline=5)
+        self.assertEqual(t.tolist(), _ns(0, 10).tolist())
+        self.assertEqual(d.tolist(), [2, 5])
+
+    def test_out_of_order_rows_are_sorted(self):
+        t, d, r = compute_deltas(_ns(20, 0, 10), [9, 3, 6], [False] * 3, baseline=0)
+        self.assertEqual(t.tolist(), _ns(0, 10, 20).tolist())
+        self.assertEqual(d.tolist(), [3, 3, 3])
+        self.assertEqual(r.tolist(), [False] * 3)
+
+
+class UpdateDeviceDeltasTests(TestCase):
+    uuid = 'dev-test-1'
+
+    def _add(self, moscom_id, minutes, count, reset=False):
+        Collection.objects.create(moscom_id=moscom_id, device_uuid=self.uuid, mosquito_count=count,
+                                  reset=reset, created_date=T0 + timedelta(minutes=minutes))
+
+    def _hours(self):
+        return [(h.hour, h.delta, h.events, h.resets)
+                for h in HourlyDelta.objects.filter(device_uuid=self.uuid).order_by('hour')]
+
+    def test_full_rebuild_groups_by_hour(self):
+        self._add(1, 0, 10)
+        self._add(2, 20, 14)
+        self._add(3, 70, 3, reset=True)
+        self._add(4, 90, 8)
+        update_device_deltas(self.uuid)
+        h1 = T0 + timedelta(hours=1)
+        # 첫 행은 기준값이 없어 0 — 이후 4, 그리고 리셋 3 + 5
+        self.assertEqual(self._hours(), [(T0, 4, 2, 0), (h1, 8, 2, 1)])
+
+    def test_incremental_uses_previous_row_as_baseline(self):
+        self._add(1, 0, 10)
+        self._add(2, 20, 14)
+        self._add(3, 70, 20)
+        update_device_deltas(self.uuid)
+        Collection.objects.filter(moscom_id=3).update(mosquito_count=25)
+        update_device_deltas(self.uuid, since=T0 + timedelta(minutes=70))
+        h1 = T0 + timedelta(hours=1)
+        self.assertEqual(self._hours(), [(T0, 4, 2, 0), (h1, 11, 1, 0)])
+
+    def test_incremental_drops_hours_without_rows(self):
+        self._add(1, 0, 10)
+        self._add(2, 70, 20)
+        update_device_deltas(self.uuid)
+        Collection.objects.filter(moscom_id=2).delete()
+        update_device_deltas(self.uuid, since=T0 + timedelta(minutes=70))
+        self.assertEqual(self._hours(), [(T0, 0, 1, 0)])
@@ -0,0 +1,313 @@
+"""AI 예측 모델 학습 공용 — 데이터셋 · 모델 계열 · 이어 학습(warm-start) · 실행 기록.
+
+moscom_train(매일 05:10 retrain_daily, --mode warm) 과 moscom_model_search(매주 model_search_weekly) 가 같이 쓴다.
+
+- load_dataset(): moscom.features 피처 테이블 → 학습 행렬 + 마릿수/모기지수 타깃.
+- 모델 계열(family): RandomForest(기본) · ExtraTrees · HistGradientBoosting · Ridge (+ 설치돼 있으면 LightGBM · XGBoost).
+  현재 계열은 moscom/ml/FAMILY — 주간 비교에서 더 나은 계열이 나오면 바뀐다.
+- warm_update(prev, X, y): 어제 모델을 이어서 학습.
+    트리 앙상블 → 새 데이터로 WARM_TREES 개를 만들고 가장 오래된 WARM_TREES 개를 버린다 (크기 유지, 매일 일부씩 교체).
+    부스팅 → WARM_ITERS 라운드를 이어서 (누적 MAX_BOOST_ROUNDS 를 넘으면 None → 전체 재학습).
+- holdout_mask(): (장비, 날짜) 해시로 고정된 검증 행 — 밤마다 데이터가 늘어도 같은 행은 계속 검증 쪽에 남아,
+  이어 학습한 트리·라운드가 예전 밤에 검증 행을 본 적이 없다.
+- 드리프트: 최근 DRIFT_WINDOW_DAYS 일 검증 행에서 어제 모델 MAE / 기준 MAE(마지막 전체 재학습 때 같은 구간 MAE)
+  > DRIFT_THRESHOLD 면 전체 재학습.
+- fit_budgeted(model, X, y, deadline): 트리 수·반복 수를 나눠 늘려 가며 마감 시각을 넘으면 거기서 멈춘다.
+- evaluate(): MAE + persistence(전일 실측 = lag1) MAE → skill = 1 - MAE / persistence MAE.
+- record(): 실행마다 moscom.TrainingRun 1행 (학습 시간·스킬·드리프트).
+"""
+import importlib.util
+import json
+import logging
+import os
+import time
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SEED = 42
+DEFAULT_FAMILY = 'RandomForest'
+# 이어 학습 — 트리 앙상블은 매일 교체할 트리 수, 부스팅은 이어 붙일 라운드 수 / 누적 상한
+WARM_TREES = int(os.environ.get('MOSCOM_WARM_TREES', '25'))
+WARM_ITERS = int(os.environ.get('MOSCOM_WARM_ITERS', '50'))
+MAX_BOOST_ROUNDS = int(os.environ.get('MOSCOM_WARM_MAX_ROUNDS', '1000'))
+# 새 날짜 MAE / 기준 MAE 가 이 배율을 넘으면 전체 재학습
+DRIFT_THRESHOLD = float(os.environ.get('MOSCOM_RETRAIN_DRIFT', '1.25'))
+# 드리프트 판정에 필요한 최소 새 행 수 (적으면 판정 없이 이어 학습)
+DRIFT_MIN_ROWS = 30
+# 드리프트를 재는 최근 구간 (검증 행 중 마지막 N일)
+DRIFT_WINDOW_DAYS = int(os.environ.get('MOSCOM_RETRAIN_DRIFT_DAYS', '14'))
+
+_TREE_FORESTS = ('RandomForestRegressor', 'ExtraTreesRegressor')
+
+Dataset = namedtuple('Dataset', 'X y_count y_index lag1 dates uuids feature_cols p95 mi_weights '
+                                'built_until appended featurize_seconds n_devices skipped_few')
+
+
+def _family_file():
+    from core import model_registry
+    return os.path.join(model_registry.ML_DIR, 'FAMILY')
+
+
+# ─ 데이터셋 ─────────────────────────────────
+
+def load_dataset(min_days=5, use_weather=True, rebuild=False):
+    """피처 테이블(확정일까지, 밀린 날은 여기서 채움) → Dataset. 행이 없으면 X 가 빈 배열."""
+    import pandas as pd
+    from django.db.models import Count
+    from . import features
+    from .models import DailyCount, Device
+    from .mosquito_index import WEIGHTS as MI_WEIGHTS, compute_index
+
+    t0 = time.monotonic()
+    appended = features.rebuild() if rebuild else features.append_finalized()
+    table = features.load_table()
+    built_until = features.built_until()
+
+    # 장비당 일별 기록 수 (min_days) — 피처 테이블과 같은 확정 구간
+    n_by_uuid = {}
+    if built_until is not None:
+        n_by_uuid = dict(DailyCount.objects.filter(date__lte=built_until)
+                         .values('device_uuid').annotate(n=Count('id')).values_list('device_uuid', 'n'))
+    skipped_few = sum(1 for n in n_by_uuid.values() if n < min_days)
+    if not table.empty:
+        table = table[table['device_uuid'].map(n_by_uuid).fillna(0) >= min_days].reset_index(drop=True)
+
+    devices = {d.device_uuid: d for d in Device.objects.all()}
+    uu = table['device_uuid']
+    df = table[['lag1', 'lag2', 'lag3', 'lag7', 'ma3', 'ma7', 'weekday', 'is_weekend', 'month', 'day']].copy()
+    df['region_code'] = uu.map(lambda u: (devices[u].region_code if u in devices else '') or 'NONE')
+    df['sido'] = uu.map(lambda u: (devices[u].address_sido if u in devices else '') or 'NONE')
+    df['target'] = table['target'].values
+    if use_weather:
+        # 그 날짜의 기상 이력 — 없으면(이력 이전 기간) 장비 현재값, 그것도 없으면 기본값
+        for col, dflt in (('temperature', 22.0), ('humidity', 60.0), ('precipitation', 0.0), ('wind_speed', 2.0)):
+            cur = uu.map(lambda u: getattr(devices[u], col) if u in devices else None).astype('float64')
+            df[col] = table[col].fillna(cur).fillna(dflt).values
+
+    # 모기지수 라벨 — 우리만의 다축 합성공식 (moscom/mosquito_index.py)
+    p95 = float(np.percentile(df['target'].values, 95)) if len(df) else 100.0
+    if p95 <= 0:
+        p95 = 100.0
+    temps = df['temperature'] if use_weather else [None] * len(df)
+    humids = df['humidity'] if use_weather else [None] * len(df)
+    target_index = []
+    for cnt, ma7, temp, humid, rc in zip(df['target'], df['ma7'], temps, humids, df['region_code']):
+        # axis_trend 는 list 를 받으니 7일 평균(ma7, 이미 학습 피처에 들어있음)을 7번 복제
+        mi = compute_index(count=cnt, last7_counts=[ma7] * 7, temperature=temp, humidity=humid,
+                           p95=p95, name=rc or '', addr='', detail='')  # 권역 키로 habitat 추정 (정확하진 않음)
+        target_index.append(mi['index'])
+    df['target_index'] = target_index
+
+    # 카테고리 인코딩
+    df_enc = pd.get_dummies(df, columns=['region_code', 'sido'], drop_first=False)
+    y_count = df_enc.pop('target').values
+    y_index = df_enc.pop('target_index').values
+    return Dataset(
+        X=df_enc.values.astype('float64'), y_count=y_count, y_index=y_index,
+        lag1=df['lag1'].values.astype('float64'), dates=table['date'].values, uuids=uu.values,
+        feature_cols=list(df_enc.columns), p95=p95, mi_weights=list(MI_WEIGHTS),
+        built_until=built_until, appended=appended, featurize_seconds=time.monotonic() - t0,
+        n_devices=int(uu.nunique()), skipped_few=skipped_few,
+    )
+
+
+# ─ 모델 계열 ─────────────────────────────────
+
+def available_families():
+    """쓸 수 있는 계열 (싼 것부터). LightGBM · XGBoost 는 설치돼 있을 때만."""
+    out = ['Ridge', 'HistGradientBoosting', 'RandomForest', 'ExtraTrees']
+    if importlib.util.find_spec('lightgbm'):
+        out.append('LightGBM')
+    if importlib.util.find_spec('xgboost'):
+        out.append('XGBoost')
+    return out
+
+
+def make_model(family, n_jobs=-1, seed=SEED):
+    if family == 'RandomForest':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(n_estimators=200, max_depth=12, min_samples_leaf=2,
+                                     n_jobs=n_jobs, random_state=seed)
+    if family == 'ExtraTrees':
+        from sklearn.ensemble import ExtraTreesRegressor
+        return ExtraTreesRegressor(n_estimators=300, max_depth=14, min_samples_leaf=2,
+                                   n_jobs=n_jobs, random_state=seed)
+    if family == 'HistGradientBoosting':
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        # early_stopping 끔 — 이어 학습 라운드 수가 데이터 크기에 따라 달라지지 않게
+        return HistGradientBoostingRegressor(max_iter=300, learning_rate=0.05, max_leaf_nodes=31,
+                                             l2_regularization=1.0, early_stopping=False, random_state=seed)
+    if family == 'Ridge':
+        from sklearn.linear_model import Ridge
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        return make_pipeline(StandardScaler(), Ridge(alpha=10.0))
+    if family == 'LightGBM':
+        import lightgbm as lgb
+        return lgb.LGBMRegressor(n_estimators=400, learning_rate=0.03, num_leaves=31, subsample=0.8,
+                                 subsample_freq=1, colsample_bytree=0.8, n_jobs=n_jobs,
+                                 random_state=seed, verbose=-1)
+    if family == 'XGBoost':
+        import xgboost as xgb
+        return xgb.XGBRegressor(n_estimators=400, learning_rate=0.03, max_depth=6, subsample=0.8,
+                                colsample_bytree=0.8, n_jobs=n_jobs, random_state=seed, verbosity=0)
+    raise ValueError(f'unknown model family: {family}')
+
+
+def family_of(model):
+    name = type(model).__name__
+    if name == 'Pipeline':
+        name = type(model.steps[-1][1]).__name__
+    return {
+        'RandomForestRegressor': 'RandomForest', 'ExtraTreesRegressor': 'ExtraTrees',
+        'HistGradientBoostingRegressor': 'HistGradientBoosting', 'Ridge': 'Ridge',
+        'LGBMRegressor': 'LightGBM', 'XGBRegressor': 'XGBoost',
+    }.get(name, name)
+
+
+def current_family():
+    """주간 비교가 고른 계열 (moscom/ml/FAMILY). 없거나 지금 못 쓰는 계열이면 기본값."""
+    try:
+        with open(_family_file(), 'r', encoding='utf-8') as f:
+            family = f.read().strip()
+    except OSError:
+        return DEFAULT_FAMILY
+    return family if family in available_families() else DEFAULT_FAMILY
+
+
+def set_family(family):
+    path = _family_file()
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(family)
+    os.replace(tmp, path)
+
+
+# ─ 학습 ─────────────────────────────────────
+
+def _boost_rounds(model):
+    name = type(model).__name__
+    if name == 'HistGradientBoostingRegressor':
+        return model.n_iter_
+    if name == 'LGBMRegressor':
+        return model.booster_.current_iteration()
+    if name == 'XGBRegressor':
+        return model.get_booster().num_boosted_rounds()
+    return None
+
+
+def warm_update(prev, X, y):
+    """어제 모델을 이어 학습한 모델. 이 계열은 못 하거나 누적 라운드 상한이면 None (전체 재학습)."""
+    name = type(prev).__name__
+    if name in _TREE_FORESTS:
+        k = min(WARM_TREES, len(prev.estimators_))
+        # 트리 수가 매번 같아 random_state 그대로면 새 트리 시드가 매일 같다 — 실행마다 바꿈
+        prev.set_params(warm_start=True, n_estimators=len(prev.estimators_) + k,
+                        random_state=int(time.time()) % (2 ** 31))
+        prev.fit(X, y)
+        prev.estimators_ = prev.estimators_[k:]
+        prev.set_params(warm_start=False, n_estimators=len(prev.estimators_))
+        return prev
+    rounds = _boost_rounds(prev)
+    if rounds is None or rounds + WARM_ITERS > MAX_BOOST_ROUNDS:
+        return None
+    if name == 'HistGradientBoostingRegressor':
+        prev.set_params(warm_start=True, max_iter=rounds + WARM_ITERS)
+        prev.fit(X, y)
+        prev.set_params(warm_start=False)
+        return prev
+    from sklearn.base import clone
+    new = clone(prev).set_params(n_estimators=WARM_ITERS)
+    if name == 'LGBMRegressor':
+        new.fit(X, y, init_model=prev.booster_)
+    else:
+        new.fit(X, y, xgb_model=prev.get_booster())
+    return new
+
+
+def fit_budgeted(model, X, y, deadline=None):
+    """deadline(time.monotonic 기준) 안에서 학습 → (model, 다 했는지).
+    트리 앙상블·HistGradientBoosting 은 1/8 씩 늘려 가다 마감을 넘기면 그 크기로 멈춘다.
+    그 외는 마감 전이면 한 번에 학습, 이미 지났으면 (None, False)."""
+    if deadline is None:
+        return model.fit(X, y), True
+    name = type(model).__name__
+    if name in _TREE_FORESTS or name == 'HistGradientBoostingRegressor':
+        attr = 'max_iter' if name == 'HistGradientBoostingRegressor' else 'n_estimators'
+        target = model.get_params()[attr]
+        step = max(1, target // 8)
+        n = 0
+        model.set_params(warm_start=True)
+        while n < target:
+            n = min(target, n + step)
+            model.set_params(**{attr: n})
+            model.fit(X, y)
+            if time.monotonic() > deadline:
+                break
+        model.set_params(warm_start=False)
+        return model, n >= target
+    if time.monotonic() > deadline:
+        return None, False
+    return model.fit(X, y), True
+
+
+def holdout_mask(ds, test_size=0.2):
+    """(장비, 날짜) crc32 해시로 정한 검증 행 (bool 배열). 프로세스·날짜가 바뀌어도 같은 행은 같은 쪽."""
+    cut = int(test_size * 1000)
+    return np.fromiter((zlib.crc32(f'{u}:{d}'.encode()) % 1000 < cut for u, d in zip(ds.uuids, ds.dates)),
+                       dtype=bool, count=len(ds.dates))
+
+
+def drift_window(ds, test):
+    """드리프트를 재는 행 — 검증 행 중 최근 DRIFT_WINDOW_DAYS 일."""
+    from datetime import timedelta
+    return test & (ds.dates > ds.built_until - timedelta(days=DRIFT_WINDOW_DAYS))
+
+
+def evaluate(model, X, y, lag1):
+    """MAE · persistence(lag1) MAE · skill. 행이 없으면 값이 None."""
+    if not len(y):
+        return {'mae': None, 'persistence_mae': None, 'skill': None, 'n': 0}
+    pred = np.maximum(model.predict(X), 0)
+    mae = float(np.mean(np.abs(y - pred)))
+    pmae = float(np.mean(np.abs(y - lag1)))
+    return {'mae': mae, 'persistence_mae': pmae,
+            'skill': (1 - mae / pmae) if pmae > 0 else None, 'n': int(len(y))}
+
+
+def previous():
+    """현재 공지된 버전의 (sklearn 원본) 모델·모기지수 모델·피처·학습 리포트. 예전 배치면 None."""
+    import joblib
+    from core import model_registry
+
+    version = model_registry.current_version()
+    if not version:
+        return None
+    base = os.path.join(model_registry.VERSIONS_DIR, version)
+    try:
+        with open(os.path.join(base, 'training_report.json'), 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        return {
+            'version': version,
+            'report': report,
+            'model': joblib.load(os.path.join(base, model_registry.MODEL_FILE)),
+            'idx_model': joblib.load(os.path.join(base, model_registry.INDEX_FILE)),
+            'feature_cols': joblib.load(os.path.join(base, model_registry.FEATURES_FILE)),
+        }
+    except (OSError, ValueError) as e:
+        logger.warning('previous model %s unreadable: %s', version, e)
+        return None
+
+
+def record(mode, family, **fields):
+    """moscom.TrainingRun 1행. 기록 실패가 학습을 막지 않게."""
+    from .models import TrainingRun
+    try:
+        return TrainingRun.objects.create(mode=mode, family=family, **fields)
+    except Exception:
+        logger.exception('training run record failed')
+        return None
@@ -10,10 +10,11 @@ from django.utils import timezone
 from django.utils.dateparse import parse_datetime, parse_date
 from django.views.decorators.http import require_GET, require_POST, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Q
 
-from .models import Device, Collection, SyncState, EditLog, Region
+from .models import Device, Collection, SyncState, SyncRun, EditLog, Region
 from .edit_helpers import log_change
+from core.device_context import bump_generation
 
 
 def _is_admin(request):
@@ -362,6 +363,7 @@ def region_upsert(request, code=None):
                 log_change('moscom.Region', r.id, k, old, new, edited_by=actor)
                 setattr(r, k, new)
     r.save()
+    bump_generation()  # 대시보드 장비 컨텍스트의 권역명 갱신
     return JsonResponse({'ok': True})
 
 
@@ -377,6 +379,7 @@ def region_delete(request, code):
     actor = _admin_name(request)
     log_change('moscom.Region', r.id, '_deleted', f'{r.code}={r.name}', '', edited_by=actor)
     r.delete()
+    bump_generation()
     return JsonResponse({'ok': True})
 
 
@@ -406,6 +409,7 @@ def device_update(request, device_id):
                 log_change('moscom.Device', d.id, k, old, new, edited_by=actor)
                 setattr(d, k, new)
     d.save()
+    bump_generation()  # 2축 분류 등 대시보드 장비 컨텍스트 갱신
     return JsonResponse({'ok': True})
 
 
@@ -419,6 +423,7 @@ def collections(request):
       device_uuid (옵셔널)
       limit (기본 5000)
       agg = none|hourly|daily (옵셔널, 집계)
+    집계는 누적값 Sum 이 아니라 HourlyDelta(구간 증가량) 합계 — total = 그 구간에 새로 잡힌 마릿수.
     """
     end_str = request.GET.get('end')
     start_str = request.GET.get('start')
@@ -438,33 +443,37 @@ def collections(request):
     agg = (request.GET.get('agg') or 'none').strip().lower()
     limit = min(int(request.GET.get('limit') or 5000), 20000)
 
-    qs = Collection.objects.filter(created_date__gte=start, created_date__lte=end)
-    if device_uuid:
-        qs = qs.filter(device_uuid=device_uuid)
-
     if agg == 'none':
-        rows = list(qs.order_by('-created_date')[:limit].values(
-            'id', 'moscom_id', 'device_uuid', 'mosquito_count', 'battery',
+        # 지난 달 행은 Parquet 보관으로 옮겨졌을 수 있음 — archive 가 DB 와 합쳐 준다
+        from .archive import collection_rows
+        rows = collection_rows(start, end, device_uuid=device_uuid, limit=limit, fields=[
+            'moscom_id', 'device_uuid', 'mosquito_count', 'battery',
             'charge', 'fan', 'reset', 'created_date', 'edited',
-        ))
+        ])
         for r in rows:
             r['created_date'] = r['created_date'].isoformat() if r['created_date'] else None
         return JsonResponse({'count': len(rows), 'items': rows})
 
-    # 집계
+    # 집계 — 시간 단위 증가량 테이블에서 (start 가 속한 정시부터)
+    from .models import HourlyDelta
+    hqs = HourlyDelta.objects.filter(
+        hour__gte=start.replace(minute=0, second=0, microsecond=0), hour__lte=end,
+    )
+    if device_uuid:
+        hqs = hqs.filter(device_uuid=device_uuid)
     if agg == 'hourly':
-        from django.db.models.functions import TruncHour
-        qs = qs.annotate(bucket=TruncHour('created_date'))
+        from django.db.models import F
+        hqs = hqs.annotate(bucket=F('hour'))
     elif agg == 'daily':
         from django.db.models.functions import TruncDate
-        qs = qs.annotate(bucket=TruncDate('created_date'))
+        hqs = hqs.annotate(bucket=TruncDate('hour'))
     else:
         return JsonResponse({'error': 'agg 는 none|hourly|daily'}, status=400)
 
     rows = list(
-        qs.values('bucket', 'device_uuid')
-          .annotate(total=Sum('mosquito_count'), events=Count('id'))
-          .order_by('bucket', 'device_uuid')
+        hqs.values('bucket', 'device_uuid')
+           .annotate(total=Sum('delta'), events=Sum('events'))
+           .order_by('bucket', 'device_uuid')
     )
     for r in rows:
         b = r['bucket']
@@ -482,10 +491,14 @@ def collection_detail(request, collection_id):
     except Collection.DoesNotExist:
         return JsonResponse({'error': '없음'}, status=404)
     actor = _admin_name(request)
+    from . import deltas
+    from core import overview_snapshots
 
     if request.method == 'DELETE':
         log_change('moscom.Collection', c.id, '_deleted', f'mc={c.mosquito_count},ts={c.created_date}', '', edited_by=actor)
         c.delete()
+        deltas.update_hourly_deltas({c.device_uuid: c.created_date})
+        overview_snapshots.invalidate_for_time(c.created_date)
         return JsonResponse({'ok': True})
 
     try:
@@ -493,6 +506,7 @@ def collection_detail(request, collection_id):
     except json.JSONDecodeError:
         return JsonResponse({'error': 'JSON 파싱 실패'}, status=400)
     EDITABLE = ['mosquito_count', 'battery', 'charge', 'fan', 'reset', 'created_date']
+    orig_created = c.created_date
     changed = False
     for k in EDITABLE:
         if k not in body:
@@ -503,7 +517,7 @@ def collection_detail(request, collection_id):
             parsed = parse_datetime(new)
             if parsed is None:
                 return JsonResponse({'error': f'{k} 형식 오류'}, status=400)
-            new = parsed
+            new = parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
         if old != new:
             log_change('moscom.Collection', c.id, k, old, new, edited_by=actor)
             setattr(c, k, new)
@@ -511,14 +525,61 @@ def collection_detail(request, collection_id):
     if changed:
         c.edited = True
         c.save()
+        # 값·시각이 바뀌면 이전/이후 중 이른 시각부터 증가량 재계산
+        deltas.update_hourly_deltas({c.device_uuid: min(orig_created, c.created_date)})
+        overview_snapshots.invalidate_for_time(min(orig_created, c.created_date))
     return JsonResponse({'ok': True})
 
 
 # ─ 동기화 상태 ────────────────────────────────
 
+def _percentile(sorted_vals, q):
+    """정렬된 리스트의 q 분위수 (선형 보간)."""
+    if not sorted_vals:
+        return None
+    k = (len(sorted_vals) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return round(sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo), 3)
+
+
+def _sync_run_trends(runs):
+    """SyncRun 목록 → phase 별 p50/p90/p95 + KST 일별 평균 소요."""
+    per_phase = {}
+    daily = {}
+    for r in runs:
+        day = timezone.localtime(r.started_at, timezone.get_fixed_timezone(9 * 60)).date().isoformat()
+        for name, m in (r.phases or {}).items():
+            per_phase.setdefault(name, []).append(m)
+            d = daily.setdefault(day, {}).setdefault(name, [])
+            d.append(m.get('seconds') or 0)
+    percentiles = {}
+    for name, ms in per_phase.items():
+        out = {'runs': len(ms)}
+        for metric in ('seconds', 'db_seconds', 'bytes', 'records'):
+            vals = sorted(float(m.get(metric) or 0) for m in ms)
+            out[metric] = {'p50': _percentile(vals, 0.5), 'p90': _percentile(vals, 0.9),
+                           'p95': _percentile(vals, 0.95), 'max': vals[-1]}
+        secs = sum(m.get('seconds') or 0 for m in ms)
+        out['records_per_sec'] = round(sum(m.get('records') or 0 for m in ms) / secs, 1) if secs > 0 else 0
+        percentiles[name] = out
+    trend = [{'date': day, **{n: round(sum(v) / len(v), 3) for n, v in phases.items()}}
+             for day, phases in sorted(daily.items())]
+    return percentiles, trend
+
+
 @require_GET
 def sync_status(request):
+    """동기화 상태 + 최근 ?days=14 일 SyncRun 추이 (phase 별 분위수, 일별 평균 소요, 최근 ?limit=20 건)."""
     state, _ = SyncState.objects.get_or_create(id=1)
+    try:
+        days = max(1, min(int(request.GET.get('days') or 14), 180))
+        limit = max(1, min(int(request.GET.get('limit') or 20), 200))
+    except ValueError:
+        return JsonResponse({'error': 'days/limit 형식 오류'}, status=400)
+    runs = list(SyncRun.objects.filter(started_at__gte=timezone.now() - timedelta(days=days))
+                .exclude(status='running'))
+    percentiles, trend = _sync_run_trends(runs)
     return JsonResponse({
         'last_run_at': state.last_run_at.isoformat() if state.last_run_at else None,
         'last_status': state.last_status,
@@ -527,6 +588,23 @@ def sync_status(request):
         'collections_synced_until': state.collections_synced_until.isoformat() if state.collections_synced_until else None,
         'devices_count': Device.objects.filter(is_active=True).count(),
         'collections_count': Collection.objects.count(),
+        'runs': {
+            'days': days,
+            'count': len(runs),
+            'errors': sum(1 for r in runs if r.status == 'error'),
+            'phases': percentiles,
+            'daily': trend,
+            'recent': [
+                {
+                    'id': r.id, 'started_at': r.started_at.isoformat(), 'status': r.status,
+                    'error': r.error, 'seconds': r.seconds, 'db_seconds': r.db_seconds,
+                    'bytes_fetched': r.bytes_fetched, 'records_fetched': r.records_fetched,
+                    'rows_created': r.rows_created, 'rows_updated': r.rows_updated,
+                    'rows_skipped': r.rows_skipped, 'phases': r.phases,
+                }
+                for r in runs[:limit]
+            ],
+        },
     })
 
 
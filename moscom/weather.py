@@ -1,78 +1,206 @@
 """Open-Meteo 기반 날씨 동기화.
 
-- /forecast (실황): 현재 기온/습도/강수량/풍속
+- /forecast: 현재값(Device 표시용) + 최근 hourly (WeatherObservation 이력)
+- archive-api /archive: 과거 hourly 재분석값 (학습용 이력 백필)
 - /geocoding/v1/search: 주소 텍스트 → 위경도 (lat/lng 0 인 장비용 fallback)
 
+이력은 격자 셀×정시 1행. 좌표는 WEATHER_GRID(기본 0.05° ≈ 5km) 격자로 스냅해서
+가까운 장비끼리 셀을 공유한다 — 호출 수는 장비 수가 아니라 셀 수에 비례.
+장비는 Device.weather_cell 로 셀을 가리키고, 학습·예측·종합현황은
+daily_summary() 한 번의 쿼리로 날짜별 값을 읽는다.
+
+- geocoding 결과는 GeocodeCache 테이블에 영구 저장 (매 실행마다 재조회 안 함)
+- 셀 배치는 ThreadPoolExecutor(WEATHER_WORKERS) 로 동시에 받고, DB 쓰기는 메인 스레드에서
+- 셀별 마지막 조회 시각/현재값을 캐시 — WEATHER_CELL_TTL 안에 다시 돌면 그 셀은 건너뜀
+
 API 키 불필요, 완전 무료.
 """
 import logging
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+
 import requests
+from requests.adapters import HTTPAdapter
 from django.utils import timezone
 from django.core.cache import cache
 
-from .models import Device
+from .models import Device, GeocodeCache, WeatherObservation
+from .timeutil import KST
 
 logger = logging.getLogger(__name__)
 
 FORECAST_URL = 'https://api.open-meteo.com/v1/forecast'
+ARCHIVE_URL = 'https://archive-api.open-meteo.com/v1/archive'
 GEOCODE_URL = 'https://geocoding-api.open-meteo.com/v1/search'
-GEOCODE_CACHE_TTL = 30 * 86400  # 30일
+GEOCODE_RETRY_DAYS = 30  # '못 찾음' 결과는 30일 뒤 다시 시도
+HOURLY_VARS = 'temperature_2m,relative_humidity_2m,precipitation,wind_speed_10m'
+FETCH_BATCH = 50  # Open-Meteo 는 100개 정도까지 한 호출 가능
+
+# 격자 크기(도). 0 이면 스냅 없이 좌표 소수 4자리 그대로 셀 키로 사용
+WEATHER_GRID = float(os.environ.get('MOSCOM_WEATHER_GRID', '0.05'))
+# 배치 동시 호출 수
+WEATHER_WORKERS = int(os.environ.get('MOSCOM_WEATHER_WORKERS', '4'))
+# 이 시간 안에 받은 셀은 다시 받지 않음 (1시간 주기 sync 보다 짧게)
+WEATHER_CELL_TTL = int(os.environ.get('MOSCOM_WEATHER_CELL_TTL', str(45 * 60)))
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+# 프로세스 누적 수신량 (moscom_client.transfer_totals 와 같은 형태)
+_transfer_lock = threading.Lock()
+_transfer = {'requests': 0, 'bytes': 0}
+# 모기 측정 시간대 (timeutil 운영 정책) — 영업일 D 의 밤 = D 18:00 ~ D+1 05:00 KST
+NIGHT_START_HOUR = 18
+NIGHT_END_HOUR = 5
+
+
+def _get_session():
+    """Open-Meteo 용 프로세스 공유 Session (배치 동시 호출 수만큼 커넥션 풀)."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            adapter = HTTPAdapter(pool_connections=3, pool_maxsize=max(WEATHER_WORKERS, 1))
+            s = requests.Session()
+            s.mount('https://', adapter)
+            s.hooks['response'].append(_record_transfer)
+            _session = s
+            _session_pid = pid
+    return _session
+
+
+def _record_transfer(resp, *args, **kwargs):
+    with _transfer_lock:
+        _transfer['requests'] += 1
+        _transfer['bytes'] += len(resp.content)
+
+
+def transfer_totals():
+    """프로세스 시작 후 Open-Meteo 응답 누적 {'requests', 'bytes'}."""
+    with _transfer_lock:
+        return dict(_transfer)
 
 
 def _geocode(query):
-    """주소 문자열 → (lat, lng). 못 찾으면 None."""
-    if not query:
-        return None
-    key = f'moscom:geocode:{query}'
-    cached = cache.get(key)
-    if cached is not None:
-        return cached if cached else None
+    """주소 문자열 → (lat, lng). 못 찾으면 None. (API 호출만 — 저장은 _geocode_many)"""
     try:
-        r = requests.get(GEOCODE_URL, params={'name': query, 'count': 1, 'language': 'ko'}, timeout=8)
+        r = _get_session().get(GEOCODE_URL, params={'name': query, 'count': 1, 'language': 'ko'}, timeout=8)
         r.raise_for_status()
-        data = r.json()
-        results = data.get('results') or []
+        results = r.json().get('results') or []
         if not results:
-            cache.set(key, '', GEOCODE_CACHE_TTL)
             return None
-        lat = float(results[0].get('latitude'))
-        lng = float(results[0].get('longitude'))
-        cache.set(key, (lat, lng), GEOCODE_CACHE_TTL)
-        return (lat, lng)
+        return (float(results[0].get('latitude')), float(results[0].get('longitude')))
     except Exception as e:
         logger.warning(f'geocode failed for {query!r}: {e}')
-        return None
+        raise
 
 
-def _resolve_latlng(d):
-    """장비의 위경도 결정. lat/lng 가 0 이면 주소로 geocoding."""
-    if d.latitude and d.longitude and abs(d.latitude) > 0.1 and abs(d.longitude) > 0.1:
+def _device_address(d):
+    parts = [p for p in [d.address_sido, d.address_gungu, d.address_dong] if p]
+    return ' '.join(parts)[:200]
+
+
+def _geocode_many(queries):
+    """주소 목록 → {query: (lat, lng) | None}. GeocodeCache 한 번 조회 후 없는 것만 API 호출해 저장."""
+    queries = {q for q in queries if q}
+    if not queries:
+        return {}
+    out = {}
+    retry_before = timezone.now() - timedelta(days=GEOCODE_RETRY_DAYS)
+    for g in GeocodeCache.objects.filter(query__in=queries):
+        if g.found:
+            out[g.query] = (g.latitude, g.longitude)
+        elif g.updated_at >= retry_before:
+            out[g.query] = None
+    for q in queries - set(out):
+        try:
+            c = _geocode(q)
+        except Exception:
+            continue  # 네트워크 오류는 저장하지 않음 — 다음 실행에서 재시도
+        out[q] = c
+        GeocodeCache.objects.update_or_create(query=q, defaults={
+            'latitude': c[0] if c else None, 'longitude': c[1] if c else None, 'found': bool(c),
+        })
+    return out
+
+
+def _has_coords(d):
+    return bool(d.latitude and d.longitude and abs(d.latitude) > 0.1 and abs(d.longitude) > 0.1)
+
+
+def _resolve_latlng(d, geocoded=None):
+    """장비의 위경도 결정. lat/lng 가 0 이면 주소로 geocoding (geocoded: _geocode_many 결과)."""
+    if _has_coords(d):
         return (d.latitude, d.longitude)
     # 주소 텍스트로 geocoding 시도
-    parts = [p for p in [d.address_sido, d.address_gungu, d.address_dong] if p]
-    if not parts:
+    addr = _device_address(d)
+    if not addr:
         return None
-    addr = ' '.join(parts)
-    return _geocode(addr)
+    if geocoded is None:
+        geocoded = _geocode_many([addr])
+    return geocoded.get(addr)
+
+
+def cell_key(lat, lng, grid=None):
+    """좌표 → 셀 키 (WeatherObservation.cell / Device.weather_cell). 격자 중심 좌표 문자열."""
+    grid = WEATHER_GRID if grid is None else grid
+    if grid > 0:
+        lat = round(lat / grid) * grid
+        lng = round(lng / grid) * grid
+    return f'{lat:.4f},{lng:.4f}'
 
 
-def _fetch_weather_batch(coords):
-    """Open-Meteo 한 번에 여러 좌표 조회.
-    coords: [(lat, lng), ...]
-    Returns: dict {(lat, lng): {temperature, humidity, precipitation, wind_speed}}
+def _cell_coords(cell):
+    lat, lng = cell.split(',')
+    return (float(lat), float(lng))
+
+
+def _parse_hourly(hourly):
+    """Open-Meteo hourly 블록 → [(hour_utc, {temperature, humidity, precipitation, wind_speed})]."""
+    times = hourly.get('time') or []
+    cols = {
+        'temperature': hourly.get('temperature_2m') or [],
+        'humidity': hourly.get('relative_humidity_2m') or [],
+        'precipitation': hourly.get('precipitation') or [],
+        'wind_speed': hourly.get('wind_speed_10m') or [],
+    }
+    out = []
+    for i, t in enumerate(times):
+        try:
+            hour = datetime.fromisoformat(t).replace(tzinfo=dt_timezone.utc)
+        except (TypeError, ValueError):
+            continue
+        vals = {k: (v[i] if i < len(v) else None) for k, v in cols.items()}
+        if vals['temperature'] is None and vals['humidity'] is None:
+            continue  # 아직 값 없는 시간 (archive 최근 며칠)
+        out.append((hour, vals))
+    return out
+
+
+def _fetch_weather_batch(cells, url=FORECAST_URL, extra=None):
+    """Open-Meteo 한 번에 여러 셀 조회.
+    cells: [cell_key, ...]
+    Returns: dict {cell: {'current': {...}, 'hourly': [(hour_utc, {...}), ...]}}
     """
-    if not coords:
+    if not cells:
         return {}
+    coords = [_cell_coords(c) for c in cells]
     # Open-Meteo는 lat/lng 콤마 구분 다중 좌표 지원
     lats = ','.join(f'{lat:.4f}' for lat, _ in coords)
     lngs = ','.join(f'{lng:.4f}' for _, lng in coords)
     params = {
         'latitude': lats, 'longitude': lngs,
-        'current': 'temperature_2m,relative_humidity_2m,precipitation,wind_speed_10m',
-        'timezone': 'Asia/Seoul',
+        'hourly': HOURLY_VARS,
+        'timezone': 'GMT',  # hourly time 을 UTC 로 받아 그대로 저장
+        **(extra or {}),
     }
     try:
-        r = requests.get(FORECAST_URL, params=params, timeout=15)
+        r = _get_session().get(url, params=params, timeout=30)
         r.raise_for_status()
         data = r.json()
     except Exception as e:
@@ -83,55 +211,207 @@ def _fetch_weather_batch(coords):
         data = [data]
     out = {}
     for i, item in enumerate(data):
-        if i >= len(coords):
+        if i >= len(cells):
             break
         cur = item.get('current') or {}
-        out[coords[i]] = {
-            'temperature': cur.get('temperature_2m'),
-            'humidity': cur.get('relative_humidity_2m'),
-            'precipitation': cur.get('precipitation'),
-            'wind_speed': cur.get('wind_speed_10m'),
+        out[cells[i]] = {
+            'current': {
+                'temperature': cur.get('temperature_2m'),
+                'humidity': cur.get('relative_humidity_2m'),
+                'precipitation': cur.get('precipitation'),
+                'wind_speed': cur.get('wind_speed_10m'),
+            },
+            'hourly': _parse_hourly(item.get('hourly') or {}),
         }
     return out
 
 
-def sync_weather():
-    """모든 활성 장비의 날씨 데이터 갱신. 1시간 주기."""
-    devices = list(Device.objects.filter(is_active=True))
-    # 1) 좌표 결정
-    dev_coords = {}
-    coord_set = []
+def _store_observations(weather_map, source, until=None):
+    """hourly 결과를 WeatherObservation 으로 bulk_create. 이미 있는 (cell, hour) 는 그대로 둔다.
+    until 이 주어지면 그 이전(끝난) 시간만 저장 — 진행 중인 시간 값이 이력으로 굳지 않게.
+    """
+    rows = []
+    for cell, w in weather_map.items():
+        for hour, vals in w.get('hourly') or []:
+            if until is not None and hour >= until:
+                continue
+            rows.append(WeatherObservation(cell=cell, hour=hour, source=source, **vals))
+    if rows:
+        WeatherObservation.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+    return len(rows)
+
+
+def _device_cells(devices):
+    """장비 목록 → ({device.id: cell}, [distinct cell, ...])."""
+    geocoded = _geocode_many(_device_address(d) for d in devices if not _has_coords(d))
+    dev_cells = {}
+    cells = []
+    seen = set()
     for d in devices:
-        c = _resolve_latlng(d)
-        if c:
-            dev_coords[d.id] = c
-            if c not in coord_set:
-                coord_set.append(c)
+        c = _resolve_latlng(d, geocoded)
+        if not c:
+            continue
+        cell = cell_key(*c)
+        dev_cells[d.id] = cell
+        if cell not in seen:
+            seen.add(cell)
+            cells.append(cell)
+    return dev_cells, cells
 
-    # 2) 좌표 배치로 날씨 조회 (Open-Meteo는 100개 정도까지 한 호출 가능)
+
+def _fetch_cells(cells, url=FORECAST_URL, extra=None):
+    """셀 목록을 FETCH_BATCH 씩 나눠 WEATHER_WORKERS 개 스레드로 동시에 조회. 결과 dict 병합."""
+    batches = [cells[i:i + FETCH_BATCH] for i in range(0, len(cells), FETCH_BATCH)]
+    if not batches:
+        return {}
+    out = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(WEATHER_WORKERS, len(batches)))) as pool:
+        for res in pool.map(lambda b: _fetch_weather_batch(b, url=url, extra=extra), batches):
+            out.update(res)
+    return out
+
+
+def _cell_cache_key(cell):
+    return f'moscom:weather:cell:{cell}'
+
+
+def sync_weather(force=False):
+    """모든 활성 장비의 날씨 데이터 갱신. 1시간 주기.
+    현재값은 Device 에(표시용), 최근 이틀 hourly 는 WeatherObservation 에 쌓는다.
+    force=False 면 WEATHER_CELL_TTL 안에 받은 셀은 캐시된 현재값을 쓰고 호출하지 않는다.
+    """
+    devices = list(Device.objects.filter(is_active=True))
+    # 1) 좌표 → 셀
+    dev_cells, cells = _device_cells(devices)
+
+    # 2) 최근에 받은 셀은 캐시된 현재값 사용
     weather_map = {}
-    BATCH = 50
-    for i in range(0, len(coord_set), BATCH):
-        chunk = coord_set[i:i + BATCH]
-        weather_map.update(_fetch_weather_batch(chunk))
+    stale = cells
+    if not force and cells:
+        fresh = cache.get_many([_cell_cache_key(c) for c in cells])
+        for c in cells:
+            hit = fresh.get(_cell_cache_key(c))
+            if hit:
+                weather_map[c] = {'current': hit, 'hourly': []}
+        stale = [c for c in cells if c not in weather_map]
+
+    # 3) 나머지 셀 배치로 동시 조회 — 지난 시간이 빠지지 않게 past_days=1 로 겹쳐 받는다
+    fetched = _fetch_cells(stale, extra={'current': HOURLY_VARS, 'past_days': 1, 'forecast_days': 1})
+    if fetched:
+        cache.set_many({_cell_cache_key(c): w['current'] for c, w in fetched.items()}, WEATHER_CELL_TTL)
+    weather_map.update(fetched)
 
-    # 3) 장비별로 저장
+    # 4) 이력 저장 (끝난 시간만)
     now = timezone.now()
-    n_updated = 0
+    n_obs = _store_observations(
+        fetched, 'forecast', until=now.replace(minute=0, second=0, microsecond=0))
+
+    # 5) 장비 현재값 + 셀 — bulk_update 한 번
+    changed = []
     for d in devices:
-        c = dev_coords.get(d.id)
-        if not c:
+        cell = dev_cells.get(d.id)
+        if not cell:
             continue
-        w = weather_map.get(c)
+        w = weather_map.get(cell)
         if not w:
             continue
-        d.temperature = w.get('temperature')
-        d.humidity = w.get('humidity')
-        d.precipitation = w.get('precipitation')
-        d.wind_speed = w.get('wind_speed')
+        cur = w['current']
+        d.temperature = cur.get('temperature')
+        d.humidity = cur.get('humidity')
+        d.precipitation = cur.get('precipitation')
+        d.wind_speed = cur.get('wind_speed')
         d.weather_synced_at = now
-        d.save(update_fields=['temperature', 'humidity', 'precipitation', 'wind_speed', 'weather_synced_at'])
-        n_updated += 1
+        d.weather_cell = cell
+        changed.append(d)
+    if changed:
+        Device.objects.bulk_update(
+            changed,
+            ['temperature', 'humidity', 'precipitation', 'wind_speed', 'weather_synced_at', 'weather_cell'],
+            batch_size=500,
+        )
+
+    logger.info(f'sync_weather: {len(changed)}/{len(devices)} devices updated, {n_obs} hourly rows')
+    return {'updated': len(changed), 'total': len(devices), 'coord_count': len(cells),
+            'fetched_cells': len(fetched), 'observations': n_obs}
+
+
+def backfill_weather(days=365):
+    """과거 days 일치 hourly 이력을 archive API 로 채운다 (source=archive). 이미 있는 시간은 건너뜀."""
+    devices = list(Device.objects.filter(is_active=True))
+    dev_cells, cells = _device_cells(devices)
+    end = timezone.now().astimezone(KST).date()
+    start = end - timedelta(days=days)
+    wm = _fetch_cells(cells, url=ARCHIVE_URL, extra={
+        'start_date': start.isoformat(), 'end_date': end.isoformat(),
+    })
+    n_obs = _store_observations(wm, 'archive')
+    # 셀 미지정 장비도 이력을 읽을 수 있게 셀만 기록
+    changed = []
+    for d in devices:
+        cell = dev_cells.get(d.id)
+        if cell and d.weather_cell != cell:
+            d.weather_cell = cell
+            changed.append(d)
+    if changed:
+        Device.objects.bulk_update(changed, ['weather_cell'], batch_size=500)
+    logger.info(f'backfill_weather: {len(cells)} cells, {n_obs} hourly rows ({start}~{end})')
+    return {'cells': len(cells), 'observations': n_obs, 'start': start.isoformat(), 'end': end.isoformat()}
+
+
+def _mean(vals):
+    vals = [v for v in vals if v is not None]
+    return sum(vals) / len(vals) if vals else None
 
-    logger.info(f'sync_weather: {n_updated}/{len(devices)} devices updated')
-    return {'updated': n_updated, 'total': len(devices), 'coord_count': len(coord_set)}
+
+def daily_summary(cells, d0, d1):
+    """셀×KST 날짜별 날씨 요약. WeatherObservation 한 번 조회.
+    Returns: {(cell, date): {temperature, temperature_max, temperature_min, humidity,
+                             precipitation, wind_speed, night_temperature, night_temperature_min,
+                             night_humidity, night_precipitation, night_wind_speed}}
+    - 일 값: KST 00~23시 (precipitation 은 합계, 나머지는 평균/최대/최소)
+    - night_*: 그 날 18:00 ~ 다음날 05:00 KST (모기 측정 시간대)
+    """
+    cells = [c for c in set(cells) if c]
+    if not cells:
+        return {}
+    start = datetime(d0.year, d0.month, d0.day, tzinfo=KST)
+    end = datetime(d1.year, d1.month, d1.day, tzinfo=KST) + timedelta(days=1, hours=NIGHT_END_HOUR + 1)
+    day_vals = defaultdict(lambda: defaultdict(list))
+    night_vals = defaultdict(lambda: defaultdict(list))
+    qs = (WeatherObservation.objects
+          .filter(cell__in=cells, hour__gte=start, hour__lt=end)
+          .values_list('cell', 'hour', 'temperature', 'humidity', 'precipitation', 'wind_speed'))
+    for cell, hour, t, h, p, w in qs.iterator(chunk_size=5000):
+        k = hour.astimezone(KST)
+        if k.date() <= d1:
+            dv = day_vals[(cell, k.date())]
+            dv['t'].append(t); dv['h'].append(h); dv['p'].append(p); dv['w'].append(w)
+        if k.hour >= NIGHT_START_HOUR:
+            night_d = k.date()
+        elif k.hour <= NIGHT_END_HOUR:
+            night_d = k.date() - timedelta(days=1)
+        else:
+            continue
+        if d0 <= night_d <= d1:
+            nv = night_vals[(cell, night_d)]
+            nv['t'].append(t); nv['h'].append(h); nv['p'].append(p); nv['w'].append(w)
+
+    out = {}
+    for key, v in day_vals.items():
+        temps = [x for x in v['t'] if x is not None]
+        n = night_vals.get(key) or {}
+        n_temps = [x for x in n.get('t', []) if x is not None]
+        out[key] = {
+            'temperature': _mean(temps),
+            'temperature_max': max(temps) if temps else None,
+            'temperature_min': min(temps) if temps else None,
+            'humidity': _mean(v['h']),
+            'precipitation': sum(x for x in v['p'] if x is not None),
+            'wind_speed': _mean(v['w']),
+            'night_temperature': _mean(n_temps),
+            'night_temperature_min': min(n_temps) if n_temps else None,
+            'night_humidity': _mean(n.get('h', [])),
+            'night_precipitation': sum(x for x in n.get('p', []) if x is not None) if n else None,
+            'night_wind_speed': _mean(n.get('w', [])),
+        }
+    return out
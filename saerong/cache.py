@@ -0,0 +1,41 @@
+"""Redis 캐시용 직렬화기.
+
+Django 기본 RedisSerializer(pickle) 와 같되, 큰 값(MOSCOM raw/일별 응답 등)은
+zlib 으로 압축해서 저장한다. 정수는 incr/decr 가 동작하도록 그대로 둔다.
+
+저장 형식:
+- int                → 그대로
+- 압축 안 함          → pickle (b'\x80' 로 시작)
+- 압축               → b'Z' + zlib(pickle)
+"""
+import pickle
+import zlib
+
+from django.conf import settings
+
+_ZLIB_PREFIX = b'Z'
+
+
+class CompressedPickleSerializer:
+    def __init__(self, protocol=None):
+        self.protocol = pickle.HIGHEST_PROTOCOL if protocol is None else protocol
+        self.min_length = getattr(settings, 'CACHE_COMPRESS_MIN_BYTES', 1024)
+        self.level = getattr(settings, 'CACHE_COMPRESS_LEVEL', 6)
+
+    def dumps(self, obj):
+        # incr/decr 를 위해 정수는 직렬화하지 않는다 (Django RedisSerializer 와 동일)
+        if type(obj) is int:
+            return obj
+        data = pickle.dumps(obj, self.protocol)
+        if len(data) >= self.min_length:
+            return _ZLIB_PREFIX + zlib.compress(data, self.level)
+        return data
+
+    def loads(self, data):
+        try:
+            return int(data)
+        except ValueError:
+            pass
+        if data[:1] == _ZLIB_PREFIX:
+            data = zlib.decompress(data[1:])
+        return pickle.loads(data)
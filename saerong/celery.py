@@ -1,6 +1,7 @@
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_init
 
 # Django settings 모듈 설정
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'saerong.settings')
@@ -31,6 +32,16 @@ app.conf.beat_schedule = {
         'task': 'moscom.retrain_daily',
         'schedule': crontab(hour=5, minute=10),
     },
+    # 모델 계열 주간 비교 (일요일 새벽 2시 — 매시 05분 동기화·05:10 재학습 전에 끝나게, 예산 MOSCOM_SEARCH_BUDGET)
+    'moscom-model-search-weekly': {
+        'task': 'moscom.model_search_weekly',
+        'schedule': crontab(day_of_week='sun', hour=2, minute=10),
+    },
+    # 지난 달 Collection → Parquet 보관 (매월 2일 새벽 3시 30분 — 동기화·재학습과 겹치지 않게)
+    'moscom-archive-monthly': {
+        'task': 'moscom.archive_monthly',
+        'schedule': crontab(day_of_month=2, hour=3, minute=30),
+    },
 }
 
 app.conf.timezone = 'Asia/Seoul'
@@ -39,3 +50,11 @@ app.conf.timezone = 'Asia/Seoul'
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
+
+
+@worker_init.connect
+def _warm_models(**kwargs):
+    """prefork pool 을 띄우기 전 부모 프로세스에서 AI 모델을 미리 읽어 자식들이 공유."""
+    if os.environ.get('MOSCOM_MODEL_PRELOAD', '1') == '1':
+        from core import model_registry
+        model_registry.warm()
@@ -88,6 +88,7 @@ MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "saerong.host_routing.MoscomHostMiddleware",  # moscom.ai 호스트 가상 라우팅
+    "core.middleware.MoscomCacheMetaMiddleware",  # MOSCOM 캐시 stale 여부 응답 헤더
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -233,6 +234,56 @@ CORS_ALLOWED_ORIGIN_REGEXES = env.list("CORS_ALLOWED_ORIGIN_REGEXES", default=[
 # CORS credentials 허용 (Basic Auth 등)
 CORS_ALLOW_CREDENTIALS = True
 
+# Cache
+# 모든 gunicorn/celery 워커가 공유하는 Redis 캐시 (MOSCOM 응답, JWT, KAMIS 등).
+# 프로세스 사이 single-flight 락·모델 버전 공지·피처 테이블 락·예측 저장소가 모두 이 캐시를 공유해야 하므로
+# CACHE_REDIS_URL 이 있으면 부팅 시 Redis 가 잠깐 안 돼도 RedisCache 로 두고 오류는 캐시 호출에서 드러나게 한다.
+# 프로세스별 LocMem 은 CACHE_REDIS_URL 을 비웠을 때(로컬 개발)만.
+CACHE_REDIS_URL = env.str("CACHE_REDIS_URL", default="redis://localhost:6379/1")
+CACHE_KEY_PREFIX = env.str("CACHE_KEY_PREFIX", default="saerong")
+CACHE_VERSION = env.int("CACHE_VERSION", default=1)  # 올리면 기존 키 전체 무효화
+CACHE_COMPRESS_MIN_BYTES = env.int("CACHE_COMPRESS_MIN_BYTES", default=1024)
+CACHE_COMPRESS_LEVEL = env.int("CACHE_COMPRESS_LEVEL", default=6)
+
+
+def _warn_if_redis_down(url):
+    """부팅 시 한 번 ping — 안 되면 크게 경고만 (fallback 하지 않음, 나중에 Redis 가 살아나면 그대로 붙는다)."""
+    try:
+        import redis
+        redis.Redis.from_url(url, socket_connect_timeout=0.3, socket_timeout=0.3).ping()
+    except Exception as e:
+        print(f"WARNING: redis cache unreachable at startup ({url}): {e} — "
+              f"cache calls will fail until it is back (no LocMem fallback)", file=sys.stderr)
+
+
+if CACHE_REDIS_URL:
+    _warn_if_redis_down(CACHE_REDIS_URL)
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+            "KEY_PREFIX": CACHE_KEY_PREFIX,
+            "VERSION": CACHE_VERSION,
+            "TIMEOUT": 300,
+            "OPTIONS": {
+                "serializer": "saerong.cache.CompressedPickleSerializer",
+                "socket_connect_timeout": 1,
+                "socket_timeout": 2,
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "saerong-default",
+            "KEY_PREFIX": CACHE_KEY_PREFIX,
+            "VERSION": CACHE_VERSION,
+            "TIMEOUT": 300,
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+
 # Celery Configuration
 CELERY_BROKER_URL = env.str("CELERY_BROKER_URL", default="redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = env.str("CELERY_RESULT_BACKEND", default="redis://localhost:6379/0")
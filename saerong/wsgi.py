@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "saerong.settings")
 
 application = get_wsgi_application()
+
+# AI 예측 모델 미리 로드 — gunicorn --preload 면 fork 전 master 에서 한 번 읽고 worker 들이 copy-on-write 로 공유.
+# (preload 없이 띄워도 worker 부팅 때 읽으므로 첫 요청이 cold load 를 떠안지 않는다)
+if os.environ.get('MOSCOM_MODEL_PRELOAD', '1') == '1':
+    from core import model_registry
+    model_registry.warm()
@@ -48,14 +48,15 @@ def _load_ml():
     """sklearn ExtraTrees joblib 로드. extra_trees → random_forest 폴백.
 
     joblib 파일 구조: {'model': Pipeline, 'feature_cols': list, 'target_cols': list, 'args': dict}
+    MOSCOM_TREE_ENGINE=compiled 면 'model' 은 core.tree_engine 컴파일본 (predict 인터페이스 동일).
     """
-    import joblib
+    from core import tree_engine
     candidates = ['extra_trees.joblib', 'random_forest.joblib']
     for fname in candidates:
         path = os.path.join(ART_DIR, fname)
         if os.path.exists(path):
             logger.info('TDM ML 모델 로드: %s', fname)
-            bundle = joblib.load(path)
+            bundle = tree_engine.load(path)
             if isinstance(bundle, dict) and 'model' in bundle:
                 return bundle['model'], bundle.get('feature_cols') or ML_FEATURES, bundle.get('target_cols') or ML_TARGETS, fname.replace('.joblib', '')
             # 구조가 다르면 raw sklearn 모델로 간주